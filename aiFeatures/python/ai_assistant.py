@@ -1,16 +1,18 @@
 import os
 import sys
+import asyncio
 import html2text
 from dotenv import load_dotenv
 
-# Add aiFeatures/python to sys.path for module imports
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "aiFeatures/python")))
+# Add the repository root to sys.path; the pipeline modules use package-relative imports,
+# so they are imported through the aiFeatures.python package
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
 
-from ai_response import generate_response_without_retrieval, generate_response_with_retrieval, ChatSessionManager
-from web_scraping import web_response
-from speech_to_text import speech_to_text
-from text_to_speech import say as text_to_speech
-from rag_pipeline import retrieve_answer, index_pdfs
+from aiFeatures.python.ai_response import generate_response_without_retrieval, generate_response_with_retrieval, ChatSessionManager
+from aiFeatures.python.ask_pipeline import gather_context
+from aiFeatures.python.speech_to_text import speech_to_text
+from aiFeatures.python.text_to_speech import say as text_to_speech
+from aiFeatures.python.rag_pipeline import index_pdfs
 
 # Load environment variables
 load_dotenv()
@@ -90,10 +92,9 @@ def main():
     else:
         print("\nInvalid mode. Choose 'text' (1) or 'voice' (2).")
         return
-    scraped_text= web_response(user_input)  # Call web_response function to get the scraped content
-    # Step 1: Check if retrieval is needed
-    retrieved_info = retrieve_answer(user_input, vector_store) if vector_store else ""
-    
+    # Step 1: Retrieve from the PDFs and search the web concurrently; the web search is
+    # only used (and otherwise cancelled) when retrieval finds nothing relevant
+    retrieved_info, scraped_text = asyncio.run(gather_context(user_input, vector_store))
     
     if retrieved_info:
         print("\nRetrieved information:")
@@ -101,7 +102,7 @@ def main():
 
     # Step 2: Choose AI response function based on retrieval
     if retrieved_info:
-        response = generate_response_with_retrieval(default_session_id, user_input, scraped_text, retrieved_info, session_manager)
+        response = generate_response_with_retrieval(default_session_id, user_input, retrieved_info, session_manager)
     else:
         response = generate_response_without_retrieval(default_session_id, user_input, scraped_text, session_manager)
 
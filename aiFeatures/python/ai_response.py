@@ -1,14 +1,23 @@
 import os
 import time
+import json
+import hashlib
+import logging
+import threading
 import mistune  # Markdown to HTML conversion
 import sys
 from dotenv import load_dotenv
 from langchain.prompts import ChatPromptTemplate
 from langchain.schema.output_parser import StrOutputParser
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
 from langchain_google_genai import ChatGoogleGenerativeAI
 from dataclasses import dataclass, field
-from typing import List, Dict, Tuple, Optional
+from collections import OrderedDict
+from typing import List, Dict, Tuple, Optional, Iterator, Callable
+from .caching import TTLCache, SQLiteCache
+from .session_store import SessionBackend, InMemorySessionBackend
 
+logger = logging.getLogger(__name__)
 
 load_dotenv()
 # Initialize AI Tutor Models
@@ -16,6 +25,89 @@ llm_shunya = ChatGoogleGenerativeAI(model="gemini-1.5-flash")   # Shunya LLM
 llm_pratham = ChatGoogleGenerativeAI(model="gemini-1.5-flash")  # Pratham LLM
 llm_dviteey = ChatGoogleGenerativeAI(model="gemini-2.0-flash")  # Dviteey LLM
 
+# LLM response cache: in-memory LRU by default, or a SQLite file shared by all
+# workers when RESPONSE_CACHE_PATH is set. Replace with set_response_cache().
+RESPONSE_CACHE_TTL = 24 * 3600
+if os.getenv("RESPONSE_CACHE_PATH"):
+    response_cache = SQLiteCache(os.getenv("RESPONSE_CACHE_PATH"), max_entries=50_000, ttl=RESPONSE_CACHE_TTL)
+else:
+    response_cache = TTLCache(max_entries=2048, ttl=RESPONSE_CACHE_TTL)
+
+def set_response_cache(cache) -> None:
+    """Replace the LLM response cache (a TTLCache, SQLiteCache, or None to disable caching)."""
+    global response_cache
+    response_cache = cache
+
+def invoke_cached(prompt_template: ChatPromptTemplate, llm, inputs: Dict) -> str:
+    """
+    Runs prompt_template | llm | StrOutputParser, serving repeated prompts from the response cache.
+    
+    The cache key covers the model name and the fully rendered prompt messages
+    (system prompt, chat history and filled-in inputs), so only identical requests
+    to the same model share an answer.
+    """
+    messages = prompt_template.format_messages(**inputs)
+    if response_cache is None:
+        return (llm | StrOutputParser()).invoke(messages)
+    
+    key = _response_cache_key(llm, messages)
+    response = _cached_response(key)
+    if response is not None:
+        return response
+    
+    response = (llm | StrOutputParser()).invoke(messages)
+    response_cache.set(key, response)
+    return response
+
+async def ainvoke_cached(prompt_template: ChatPromptTemplate, llm, inputs: Dict) -> str:
+    """Async counterpart of invoke_cached; the LLM call is awaited instead of blocking."""
+    messages = prompt_template.format_messages(**inputs)
+    if response_cache is None:
+        return await (llm | StrOutputParser()).ainvoke(messages)
+    
+    key = _response_cache_key(llm, messages)
+    response = _cached_response(key)
+    if response is not None:
+        return response
+    
+    response = await (llm | StrOutputParser()).ainvoke(messages)
+    response_cache.set(key, response)
+    return response
+
+def stream_cached(prompt_template: ChatPromptTemplate, llm, inputs: Dict) -> Iterator[str]:
+    """
+    Streaming counterpart of invoke_cached: yields the response text chunk by chunk as the
+    LLM produces it, and stores the complete response in the cache once the stream ends.
+    A cached response is yielded as a single chunk.
+    """
+    messages = prompt_template.format_messages(**inputs)
+    key = _response_cache_key(llm, messages) if response_cache is not None else None
+    if key:
+        response = _cached_response(key)
+        if response is not None:
+            yield response
+            return
+    
+    parts = []
+    for token in (llm | StrOutputParser()).stream(messages):
+        parts.append(token)
+        yield token
+    
+    if key:
+        response_cache.set(key, "".join(parts))
+
+def _response_cache_key(llm, messages) -> str:
+    payload = json.dumps([getattr(llm, "model", type(llm).__name__),
+                          [(message.type, message.content) for message in messages]])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def _cached_response(key: str) -> Optional[str]:
+    response = response_cache.get(key)
+    if response is not None:
+        stats = response_cache.stats
+        logger.info(f"LLM response cache hit (hit rate {stats.hit_rate:.1%} over {stats.hits + stats.misses} calls)")
+    return response
+
 @dataclass
 class Message:
     role: str  # 'user' or 'assistant'
@@ -28,6 +120,11 @@ class ChatSession:
     messages: List[Message] = field(default_factory=list)
     metadata: Dict = field(default_factory=dict)
     max_history_length: int = 20  # Default limit for messages to store
+    history_token_budget: int = 1500  # Approximate tokens of verbatim history sent with a prompt
+    summary: str = ""  # Running summary of turns that no longer fit the token budget
+    summarized_until: float = 0.0  # Timestamp of the newest message folded into the summary
+    last_active: float = field(default_factory=time.monotonic)
+    backend: Optional[SessionBackend] = field(default=None, repr=False, compare=False)
     
     def add_message(self, role: str, content: str) -> None:
         """Add a message to the chat history."""
@@ -36,7 +133,17 @@ class ChatSession:
             # Remove oldest messages (keep the most recent)
             self.messages = self.messages[-(self.max_history_length-1):]
         
-        self.messages.append(Message(role=role, content=content))
+        message = Message(role=role, content=content)
+        self.messages.append(message)
+        if self.backend is not None:
+            self.backend.append(self.session_id, (message.role, message.content, message.timestamp))
+    
+    def load_history(self) -> None:
+        """Replace the in-memory history with the latest messages from the backend."""
+        if self.backend is not None:
+            records = self.backend.load(self.session_id, self.max_history_length)
+            self.messages = [Message(role=role, content=content, timestamp=timestamp)
+                             for role, content, timestamp in records]
     
     def get_formatted_history(self) -> str:
         """Return the chat history in a formatted string for context."""
@@ -48,20 +155,71 @@ class ChatSession:
     def get_langchain_messages(self) -> List[Tuple[str, str]]:
         """Return chat history in LangChain message format."""
         return [(msg.role, msg.content) for msg in self.messages]
+    
+    def history_size(self) -> int:
+        """Approximate size of the stored history in bytes."""
+        return len(self.summary) + sum(len(msg.content) + 64 for msg in self.messages)
 
 # Session manager to handle multiple chat sessions
 class ChatSessionManager:
-    def __init__(self):
-        self.sessions: Dict[str, ChatSession] = {}
+    """
+    Bounded store of chat sessions.
+    
+    Sessions are kept in least-recently-used order and evicted when they have been
+    idle for longer than ``idle_ttl`` seconds, when there are more than
+    ``max_sessions`` of them, or when their combined size exceeds ``max_memory_bytes``.
+    A session's size is measured by ``size_of`` (history only by default; callers that
+    keep per-session indexes in ``metadata`` should count those too) and re-measured
+    every time the session is accessed.
+    
+    Histories are written through to ``backend``. With a shared backend (e.g.
+    SQLiteSessionBackend) several worker processes serve the same conversations:
+    a session's history is reloaded from the backend whenever it is accessed.
+    """
+    def __init__(self, max_sessions: int = 10_000, idle_ttl: Optional[float] = 2 * 3600,
+                 max_memory_bytes: Optional[int] = 512 * 1024 * 1024,
+                 size_of: Optional[Callable[[ChatSession], int]] = None,
+                 backend: Optional[SessionBackend] = None):
+        self.backend = backend or InMemorySessionBackend()
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.max_memory_bytes = max_memory_bytes
+        self.size_of = size_of or ChatSession.history_size
+        self.sessions: "OrderedDict[str, ChatSession]" = OrderedDict()
+        self.evictions = 0
+        self._sizes: Dict[str, int] = {}
+        self._total_size = 0
+        self._lock = threading.RLock()
     
     def create_session(self, session_id: str) -> ChatSession:
         """Create a new chat session."""
-        self.sessions[session_id] = ChatSession(session_id=session_id)
-        return self.sessions[session_id]
+        with self._lock:
+            self._drop(session_id)
+            session = ChatSession(session_id=session_id, backend=self.backend)
+            session.load_history()  # Resumes a conversation another worker (or an earlier run) stored
+            self.sessions[session_id] = session
+            self._measure(session)
+            self._enforce_limits()
+            return session
     
     def get_session(self, session_id: str) -> Optional[ChatSession]:
-        """Get an existing chat session by ID."""
-        return self.sessions.get(session_id)
+        """Get an existing chat session by ID, marking it as recently used."""
+        with self._lock:
+            session = self.sessions.get(session_id)
+            if session is None:
+                return None
+            if self._is_idle(session, time.monotonic()):
+                self._drop(session_id)
+                self.backend.release(session_id)
+                self.evictions += 1
+                return None
+            session.last_active = time.monotonic()
+            self.sessions.move_to_end(session_id)
+            if self.backend.shared:
+                session.load_history()  # Pick up turns answered by other workers
+            self._measure(session)
+            self._enforce_limits()
+            return session
     
     def get_or_create_session(self, session_id: str) -> ChatSession:
         """Get an existing session or create a new one if it doesn't exist."""
@@ -70,15 +228,165 @@ class ChatSessionManager:
             session = self.create_session(session_id)
         return session
     
-    def delete_session(self, session_id: str) -> bool:
-        """Delete a chat session."""
-        if session_id in self.sessions:
-            del self.sessions[session_id]
+    def is_live(self, session: ChatSession) -> bool:
+        """True if ``session`` is still the stored session for its ID (not deleted, evicted or replaced)."""
+        with self._lock:
+            return self.sessions.get(session.session_id) is session
+    
+    def set_metadata(self, session: ChatSession, **values) -> bool:
+        """
+        Updates a session's metadata if the session is still live, and re-measures it.
+        
+        The check and the update happen under the manager's lock, so a session that
+        is deleted or evicted concurrently is never written to (or resurrected).
+        
+        Returns:
+            False if the session is no longer live and nothing was changed
+        """
+        with self._lock:
+            if self.sessions.get(session.session_id) is not session:
+                return False
+            session.metadata.update(values)
+            self._measure(session)
+            self._enforce_limits()
             return True
-        return False
+    
+    def delete_session(self, session_id: str) -> bool:
+        """Delete a chat session and its stored history."""
+        with self._lock:
+            self.backend.delete(session_id)
+            return self._drop(session_id)
+    
+    @property
+    def memory_usage(self) -> int:
+        """Combined size of all sessions as last measured, in bytes."""
+        return self._total_size
+    
+    def __len__(self) -> int:
+        return len(self.sessions)
+    
+    def _is_idle(self, session: ChatSession, now: float) -> bool:
+        return self.idle_ttl is not None and now - session.last_active > self.idle_ttl
+    
+    def _measure(self, session: ChatSession) -> None:
+        size = self.size_of(session)
+        self._total_size += size - self._sizes.get(session.session_id, 0)
+        self._sizes[session.session_id] = size
+    
+    def _drop(self, session_id: str) -> bool:
+        if self.sessions.pop(session_id, None) is None:
+            return False
+        self._total_size -= self._sizes.pop(session_id, 0)
+        return True
+    
+    def _enforce_limits(self) -> None:
+        """Evicts idle sessions, then least recently used ones until within the caps."""
+        now = time.monotonic()
+        evicted = 0
+        # Sessions are in LRU order, so idle ones are at the front
+        while self.sessions:
+            session_id, session = next(iter(self.sessions.items()))
+            over_count = len(self.sessions) > self.max_sessions
+            over_memory = (self.max_memory_bytes is not None and len(self.sessions) > 1
+                           and self._total_size > self.max_memory_bytes)
+            if not (over_count or over_memory or self._is_idle(session, now)):
+                break
+            self._drop(session_id)
+            self.backend.release(session_id)
+            evicted += 1
+        if evicted:
+            self.evictions += evicted
+            logger.info(f"Evicted {evicted} chat sessions ({len(self.sessions)} active, "
+                        f"~{self._total_size / 1e6:.1f} MB)")
+
+# History compaction: recent turns are sent verbatim within the session's token
+# budget, and older turns are folded into a running summary. The verbatim part is
+# cut to half the budget whenever it overflows, so the summary is only recomputed
+# every few turns rather than on every request.
+CHARS_PER_TOKEN = 4  # Rough estimate for English text; avoids a tokenizer round trip
+DVITEEY_HISTORY_MESSAGES = 2  # The verifier only needs the previous exchange for continuity
+
+def estimate_tokens(text: str) -> int:
+    """Approximate number of LLM tokens in a piece of text."""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+def create_summary_prompt():
+    """Create the prompt that folds older turns into the running conversation summary."""
+    return ChatPromptTemplate.from_messages([
+        ("system", "You maintain a running summary of a conversation between a student and KIRA, an AI Tutor. "
+                   "Merge the earlier summary and the new exchanges into one concise summary of at most 150 words. "
+                   "Keep the topics covered, the student's level, any misconceptions and any open questions."),
+        ("human", "Earlier summary: {summary}\n\n"
+                  "New exchanges:\n{exchanges}")
+    ])
+
+def _split_history(session: ChatSession) -> Tuple[List[Message], List[Message]]:
+    """Returns (messages to fold into the summary, messages to keep verbatim)."""
+    # The last message is the current query, which every prompt template already contains
+    pending = [msg for msg in session.messages[:-1] if msg.timestamp > session.summarized_until]
+    budget = session.history_token_budget
+    if (sum(estimate_tokens(msg.content) for msg in pending) <= budget
+            and len(pending) < session.max_history_length - 2):
+        return [], pending
+    
+    keep, used = [], 0
+    for msg in reversed(pending):
+        used += estimate_tokens(msg.content)
+        if keep and (used > budget // 2 or len(keep) >= session.max_history_length // 2):
+            break
+        keep.append(msg)
+    keep.reverse()
+    return pending[:len(pending) - len(keep)], keep
+
+def _summary_inputs(session: ChatSession, fold: List[Message]) -> Dict:
+    exchanges = "\n\n".join(f"{msg.role.capitalize()}: {msg.content}" for msg in fold)
+    return {"summary": session.summary or "(none)", "exchanges": exchanges}
+
+def _apply_summary(session: ChatSession, fold: List[Message], summary: str) -> None:
+    session.summary = summary.strip()
+    session.summarized_until = fold[-1].timestamp
+    logger.info(f"Folded {len(fold)} messages into the summary of session {session.session_id}")
+
+def _history_messages(session: ChatSession, keep: List[Message]) -> List[BaseMessage]:
+    # History goes in as message objects, not templates, so braces in it are not parsed as variables
+    history: List[BaseMessage] = []
+    if session.summary:
+        history.append(SystemMessage(content=f"Summary of the earlier conversation: {session.summary}"))
+    limit = session.history_token_budget * CHARS_PER_TOKEN // 2
+    for msg in keep:
+        content = msg.content if len(msg.content) <= limit else msg.content[:limit] + " ..."
+        history.append(AIMessage(content=content) if msg.role == "assistant" else HumanMessage(content=content))
+    return history
+
+def compact_history(session: ChatSession) -> List[BaseMessage]:
+    """
+    Return the chat history to send with a prompt, within the session's token budget.
+    
+    Older turns are summarised with the Shunya model when the verbatim history
+    overflows; if summarisation fails they are simply left out.
+    """
+    fold, keep = _split_history(session)
+    if fold:
+        try:
+            _apply_summary(session, fold, invoke_cached(create_summary_prompt(), llm_shunya,
+                                                        _summary_inputs(session, fold)))
+        except Exception as e:
+            logger.warning(f"Could not summarise chat history, dropping older turns: {e}")
+    return _history_messages(session, keep)
+
+async def acompact_history(session: ChatSession) -> List[BaseMessage]:
+    """Async counterpart of compact_history."""
+    fold, keep = _split_history(session)
+    if fold:
+        try:
+            _apply_summary(session, fold, await ainvoke_cached(create_summary_prompt(), llm_shunya,
+                                                               _summary_inputs(session, fold)))
+        except Exception as e:
+            logger.warning(f"Could not summarise chat history, dropping older turns: {e}")
+    return _history_messages(session, keep)
 
 # Prompt templates with updated system messages and chat history context
-def create_shunya_prompt_with_history(session: ChatSession):
+def create_shunya_prompt_with_history(session: ChatSession, history: Optional[List[BaseMessage]] = None):
     """Create a prompt template that includes chat history."""
     return ChatPromptTemplate.from_messages([
         ("system", "You are an experienced AI Tutor named KIRA."
@@ -92,14 +400,14 @@ def create_shunya_prompt_with_history(session: ChatSession):
                    "compassionately and encourage critical thinking. Adjust your teaching style based on "
                    "the student's responses and questions."
                    "Incorporate relevant web information when available to provide up-to-date and accurate information."),
-        *session.get_langchain_messages(),
+        *(history if history is not None else compact_history(session)),
         ("human",  "User Query: {query}\n\n"
                   "Web Scraped Content: {scraped_content}\n\n"
                   "Please provide a helpful, educational response.")
     ])
 
         
-def create_pratham_prompt_with_history(session: ChatSession):
+def create_pratham_prompt_with_history(session: ChatSession, history: Optional[List[BaseMessage]] = None):
     """Create a pratham prompt template with chat history for retrieval-based responses."""
     return ChatPromptTemplate.from_messages([
         ("system", "You are an AI Assistant that generates educational content based on retrieved information. "
@@ -110,14 +418,14 @@ def create_pratham_prompt_with_history(session: ChatSession):
                   "Identify key concepts, create logical connections between ideas, and ensure "
                   "the information is factually accurate based on the retrieved data."
                   "When using web-scraped information, prioritize recent and authoritative content."),
-        *session.get_langchain_messages(),
+        *(history if history is not None else compact_history(session)),
         ("human", "User Query: {query}\n\n"
                   "Vector Database Retrieval Response: {retrieved}\n\n"
                   "Your Task: Generate a comprehensive topic explanation based on the retrieved information "
                   "while considering the conversation history and addressing the specific query.")
     ])
 
-def create_dviteey_prompt_with_history(session: ChatSession):
+def create_dviteey_prompt_with_history(session: ChatSession, history: Optional[List[BaseMessage]] = None):
     """Create a dviteey prompt template with chat history for response verification."""
     return ChatPromptTemplate.from_messages([
         ("system", "You are an expert AI Tutor named KIRA."
@@ -139,7 +447,7 @@ def create_dviteey_prompt_with_history(session: ChatSession):
                    "Your final output should appear as a direct response to the user with no indication "
                    "that any verification or refinement process occurred. The user should perceive your "
                    "response as coming directly from their tutor, not as a refined version of another system's output."),
-        *session.get_langchain_messages(),
+        *(history if history is not None else compact_history(session)),
         ("human", "User Query: {query}\n\n"
                   "Draft Educational Content: {response}\n\n"
                   "Retrieved Reference Information: {retrieved}\n\n"
@@ -167,7 +475,7 @@ def generate_response_without_retrieval(session_id: str, prompt: str,scraped_con
         
         # Create prompt with history and generate response
         prompt_template = create_shunya_prompt_with_history(session)
-        shunya_response = (prompt_template | llm_shunya | StrOutputParser()).invoke({
+        shunya_response = invoke_cached(prompt_template, llm_shunya, {
             "query": prompt,
             "scraped_content": scraped_content,
             })
@@ -190,15 +498,17 @@ def generate_response_with_retrieval(session_id: str, prompt: str, retrieved_dat
         session.add_message("human", prompt)
 
         # Step 1: Generate initial response with history
-        pratham_prompt = create_pratham_prompt_with_history(session)
-        pratham_response = (pratham_prompt | llm_pratham | StrOutputParser()).invoke({
+        history = compact_history(session)
+        pratham_prompt = create_pratham_prompt_with_history(session, history)
+        pratham_response = invoke_cached(pratham_prompt, llm_pratham, {
             "query": prompt,
             "retrieved": retrieved_data,
         })
 
-        # Step 2: Verify & refine response using retrieval data and history
-        dviteey_prompt = create_dviteey_prompt_with_history(session)
-        dviteey_response = (dviteey_prompt | llm_dviteey | StrOutputParser()).invoke({
+        # Step 2: Verify & refine response using retrieval data; the draft already
+        # reflects the full history, so only the previous exchange is repeated here
+        dviteey_prompt = create_dviteey_prompt_with_history(session, history[-DVITEEY_HISTORY_MESSAGES:])
+        dviteey_response = invoke_cached(dviteey_prompt, llm_dviteey, {
             "query": prompt,
             "retrieved": retrieved_data,
             "response": pratham_response,
@@ -210,9 +520,104 @@ def generate_response_with_retrieval(session_id: str, prompt: str, retrieved_dat
         return format_response(dviteey_response)
     except Exception as e:
         return f"Error: {str(e)}"
+
+# Async variants: the LLM calls are awaited so one event loop can serve many requests
+async def agenerate_response_without_retrieval(session_id: str, prompt: str, scraped_content: str, session_manager: ChatSessionManager):
+    """Async counterpart of generate_response_without_retrieval."""
+    try:
+        session = session_manager.get_or_create_session(session_id)
+        session.add_message("human", prompt)
+        
+        prompt_template = create_shunya_prompt_with_history(session, await acompact_history(session))
+        shunya_response = await ainvoke_cached(prompt_template, llm_shunya, {
+            "query": prompt,
+            "scraped_content": scraped_content,
+            })
+        
+        session.add_message("assistant", shunya_response)
+        return format_response(shunya_response)
+    except Exception as e:
+        return f"Error: {str(e)}"
+
+async def agenerate_response_with_retrieval(session_id: str, prompt: str, retrieved_data: str, session_manager: ChatSessionManager):
+    """Async counterpart of generate_response_with_retrieval."""
+    try:
+        session = session_manager.get_or_create_session(session_id)
+        session.add_message("human", prompt)
+
+        history = await acompact_history(session)
+        pratham_prompt = create_pratham_prompt_with_history(session, history)
+        pratham_response = await ainvoke_cached(pratham_prompt, llm_pratham, {
+            "query": prompt,
+            "retrieved": retrieved_data,
+        })
+
+        dviteey_prompt = create_dviteey_prompt_with_history(session, history[-DVITEEY_HISTORY_MESSAGES:])
+        dviteey_response = await ainvoke_cached(dviteey_prompt, llm_dviteey, {
+            "query": prompt,
+            "retrieved": retrieved_data,
+            "response": pratham_response,
+        })
+        
+        session.add_message("assistant", dviteey_response)
+        return format_response(dviteey_response)
+    except Exception as e:
+        return f"Error: {str(e)}"
+
+# Streaming variants: yield raw Markdown tokens from the final LLM stage as they arrive.
+# The caller is responsible for formatting the joined text (see format_response).
+def stream_response_without_retrieval(session_id: str, prompt: str, scraped_content: str, session_manager: ChatSessionManager) -> Iterator[str]:
+    """Streams the Shunya response token by token, then records it in the chat history."""
+    try:
+        session = session_manager.get_or_create_session(session_id)
+        session.add_message("human", prompt)
+        
+        prompt_template = create_shunya_prompt_with_history(session)
+        parts = []
+        for token in stream_cached(prompt_template, llm_shunya, {
+            "query": prompt,
+            "scraped_content": scraped_content,
+            }):
+            parts.append(token)
+            yield token
+        
+        session.add_message("assistant", "".join(parts))
+    except Exception as e:
+        yield f"Error: {str(e)}"
+
+def stream_response_with_retrieval(session_id: str, prompt: str, retrieved_data: str, session_manager: ChatSessionManager) -> Iterator[str]:
+    """Generates the Pratham draft, then streams the Dviteey refinement token by token."""
+    try:
+        session = session_manager.get_or_create_session(session_id)
+        session.add_message("human", prompt)
+
+        # Step 1: The draft is an intermediate result, so it is not streamed
+        history = compact_history(session)
+        pratham_prompt = create_pratham_prompt_with_history(session, history)
+        pratham_response = invoke_cached(pratham_prompt, llm_pratham, {
+            "query": prompt,
+            "retrieved": retrieved_data,
+        })
+
+        # Step 2: Stream the verified & refined response
+        dviteey_prompt = create_dviteey_prompt_with_history(session, history[-DVITEEY_HISTORY_MESSAGES:])
+        parts = []
+        for token in stream_cached(dviteey_prompt, llm_dviteey, {
+            "query": prompt,
+            "retrieved": retrieved_data,
+            "response": pratham_response,
+        }):
+            parts.append(token)
+            yield token
+        
+        session.add_message("assistant", "".join(parts))
+    except Exception as e:
+        yield f"Error: {str(e)}"
     
 
 # Test Run
+# This module uses package-relative imports; run the example from the repository root with
+#     python -m aiFeatures.python.ai_response
 if __name__ == "__main__":
     # Create a session manager
     session_manager = ChatSessionManager()
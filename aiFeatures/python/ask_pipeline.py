@@ -0,0 +1,100 @@
+import asyncio
+import logging
+from typing import Dict, Optional, Tuple
+from langchain_community.vectorstores import FAISS
+from .ai_response import ChatSessionManager, agenerate_response_with_retrieval, agenerate_response_without_retrieval
+from .retrieval_cache import RetrievalCache
+from .rag_pipeline import retrieve_answer
+from .web_scraping import aweb_response
+
+logger = logging.getLogger(__name__)
+
+
+def is_relevant(retrieved_info: str) -> bool:
+    """
+    True if retrieval found something worth answering from. Chunks below the
+    similarity threshold, or matching too few of the query's terms, are already
+    dropped by retrieve_hits, so any remaining result counts. Keyword matches
+    alone (no chunk similar enough) only remain if they contain
+    LEXICAL_ONLY_MIN_MATCH of the query's term weight.
+    """
+    return bool(retrieved_info)
+
+
+async def _retrieve(query: str, vector_store: FAISS, retrieval_cache: Optional[RetrievalCache]) -> str:
+    if retrieval_cache is not None:
+        return await retrieval_cache.aretrieve(query, vector_store)
+    return await asyncio.to_thread(retrieve_answer, query, vector_store)
+
+
+async def gather_context(query: str, vector_store: Optional[FAISS],
+                         retrieval_cache: Optional[RetrievalCache] = None,
+                         speculative: bool = True) -> Tuple[str, str]:
+    """
+    Gets the context for a query: retrieved document chunks, or scraped web content
+    when retrieval finds nothing relevant.
+
+    With ``speculative`` the web search starts at the same time as retrieval, so a
+    query that misses the documents waits max(retrieval, search) instead of their
+    sum; when retrieval is relevant the search is cancelled. Cancelling stops the
+    page downloads, but a SerpAPI request already sent still completes (and is
+    cached for the next time the query is asked). A speculative search does not
+    open the best link in the browser.
+
+    Returns:
+        (retrieved_info, scraped_text), at most one of them non-empty
+    """
+    if vector_store is None:
+        return "", await aweb_response(query)
+
+    search = asyncio.ensure_future(aweb_response(query, open_browser=False)) if speculative else None
+    try:
+        try:
+            retrieved_info = await _retrieve(query, vector_store, retrieval_cache)
+        except Exception as e:
+            logger.warning(f"Retrieval failed, answering from the web instead: {e}")
+            retrieved_info = ""
+
+        if is_relevant(retrieved_info):
+            return retrieved_info, ""
+        if search is None:
+            search = asyncio.ensure_future(aweb_response(query))
+        return "", await search
+    finally:
+        if search is not None:
+            # Also collects a search that already failed, so its exception is not
+            # reported as never retrieved
+            search.cancel()
+            await asyncio.gather(search, return_exceptions=True)
+
+
+async def answer_query(query: str, vector_store: Optional[FAISS], session_id: str,
+                       session_manager: ChatSessionManager,
+                       retrieval_cache: Optional[RetrievalCache] = None) -> Dict:
+    """
+    Async /ask pipeline: retrieval and web search (see gather_context), followed by
+    the matching LLM chain.
+
+    Every stage is awaited, so while one request waits on SerpAPI, a scraped site,
+    Ollama or Gemini the event loop can make progress on other requests.
+
+    Returns:
+        Dict with the same keys /ask returns ("response" plus "retrieved"/"hasRetrieval"
+        or "scraped"/"hasScraping")
+    """
+    retrieved_info, scraped_text = await gather_context(query, vector_store, retrieval_cache)
+
+    if retrieved_info:
+        response = await agenerate_response_with_retrieval(session_id, query, retrieved_info, session_manager)
+        return {
+            "response": response,
+            "retrieved": retrieved_info,
+            "hasRetrieval": True,
+        }
+
+    response = await agenerate_response_without_retrieval(session_id, query, scraped_text, session_manager)
+    return {
+        "response": response,
+        "scraped": scraped_text,
+        "hasScraping": bool(scraped_text),
+    }
@@ -0,0 +1,41 @@
+import asyncio
+import logging
+import threading
+from typing import Any, Awaitable, Optional
+
+logger = logging.getLogger(__name__)
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_lock = threading.Lock()
+
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    """
+    The process-wide event loop the /ask pipeline runs on, started on first use.
+
+    The async clients behind the pipeline (Ollama's httpx client, Gemini's gRPC
+    channel) bind to the loop they were first used on and fail once that loop is
+    closed. Running every coroutine on this one long-lived loop, instead of a new
+    loop per request (asyncio.run, or Flask's async views under WSGI), keeps them
+    usable for the life of the process.
+    """
+    global _loop
+    with _lock:
+        if _loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="pipeline-loop", daemon=True).start()
+            _loop = loop
+        return _loop
+
+
+def run(coroutine: Awaitable[Any]) -> Any:
+    """Runs a coroutine on the background loop and blocks until it finishes (for sync callers)."""
+    return asyncio.run_coroutine_threadsafe(coroutine, get_loop()).result()
+
+
+async def arun(coroutine: Awaitable[Any]) -> Any:
+    """Awaits a coroutine on the background loop from another event loop (e.g. the ASGI server's)."""
+    loop = get_loop()
+    if asyncio.get_running_loop() is loop:
+        return await coroutine
+    return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coroutine, loop))
@@ -0,0 +1,206 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+def normalize_query(query: str) -> str:
+    """Lower-cases a query, collapses whitespace and drops trailing punctuation."""
+    return re.sub(r"\s+", " ", query).strip().lower().rstrip("?!. ")
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class TTLCache:
+    """
+    Thread-safe in-memory LRU cache with an optional time-to-live per entry.
+
+    Once ``max_entries`` is reached the least recently used entry is evicted;
+    entries older than ``ttl`` seconds are treated as misses and dropped.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: Optional[float] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, stored_at = entry
+                if self.ttl is None or time.monotonic() - stored_at <= self.ttl:
+                    self._entries.move_to_end(key)
+                    self.stats.hits += 1
+                    return value
+                del self._entries[key]
+            self.stats.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats.evictions += 1
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+class SQLiteCache:
+    """
+    Persistent cache with the same interface as TTLCache, stored in a local SQLite file.
+
+    Values must be JSON-serializable. The database runs in WAL mode so several
+    worker processes can share one cache file. When more than ``max_entries`` are
+    stored the least recently used ones are evicted.
+    """
+
+    def __init__(self, path: str, max_entries: int = 10_000, ttl: Optional[float] = None):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS cache ("
+                           " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+                           " stored_at REAL NOT NULL, last_used REAL NOT NULL)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_last_used ON cache (last_used)")
+        self._conn.commit()
+
+    @staticmethod
+    def _key(key: Hashable) -> str:
+        return key if isinstance(key, str) else json.dumps(key)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        key = self._key(key)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, stored_at FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                value, stored_at = row
+                if self.ttl is None or now - stored_at <= self.ttl:
+                    self._conn.execute("UPDATE cache SET last_used = ? WHERE key = ?", (now, key))
+                    self._conn.commit()
+                    self.stats.hits += 1
+                    return json.loads(value)
+                self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                self._conn.commit()
+            self.stats.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?)",
+                               (self._key(key), json.dumps(value), now, now))
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()
+            excess = count - self.max_entries
+            if excess > 0:
+                self._conn.execute("DELETE FROM cache WHERE key IN "
+                                   "(SELECT key FROM cache ORDER BY last_used ASC LIMIT ?)", (excess,))
+                self.stats.evictions += excess
+            self._conn.commit()
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE key = ?", (self._key(key),))
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM cache")
+            self._conn.commit()
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM cache WHERE key = ?", (self._key(key),)).fetchone() is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key into one.
+
+    The first caller for a key runs the function; callers that arrive while it is
+    still running wait for it and receive the same result (or exception) instead of
+    repeating the work.
+    """
+
+    def __init__(self):
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = fn()
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
@@ -0,0 +1,189 @@
+from bisect import bisect_right
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+# Preferred places to end a chunk, best first (paragraph, line, word)
+SEPARATORS = ("\n\n", "\n", " ")
+# Pages are joined with a paragraph break, so chunks prefer to end at page boundaries
+PAGE_SEPARATOR = "\n\n"
+
+
+class FileRecord(NamedTuple):
+    file_name: str
+    file_path: str
+    total_pages: int
+
+
+class Chunk(NamedTuple):
+    """A chunk of a document and the (inclusive) range of pages it was taken from."""
+    text: str
+    file_id: int
+    page_start: int
+    page_end: int
+
+
+class FileTable:
+    """
+    Interns the per-file part of chunk metadata.
+
+    Every chunk of a file refers to one FileRecord by its integer ID instead of
+    carrying its own copy of the file name, path and page count. Records are
+    interned by all three fields, so a file re-indexed with a different name or
+    page count gets a new record while chunks of the old version keep theirs.
+    """
+
+    def __init__(self):
+        self.files: List[FileRecord] = []
+        self._ids: Dict[FileRecord, int] = {}
+
+    def intern(self, file_name: str, file_path: str, total_pages: int) -> int:
+        """Returns the ID of a file, adding it to the table on first use."""
+        record = FileRecord(file_name, file_path, total_pages)
+        file_id = self._ids.get(record)
+        if file_id is None:
+            file_id = len(self.files)
+            self.files.append(record)
+            self._ids[record] = file_id
+        return file_id
+
+    def __getitem__(self, file_id: int) -> FileRecord:
+        return self.files[file_id]
+
+    def __len__(self) -> int:
+        return len(self.files)
+
+    def metadata(self, chunk: Chunk) -> Dict:
+        """Expands a chunk's file ID and page range into the metadata dict stored with it."""
+        record = self.files[chunk.file_id]
+        return {
+            "file_name": record.file_name,
+            "file_path": record.file_path,
+            "page_index": chunk.page_start,
+            "page_end": chunk.page_end,
+            "total_pages": record.total_pages,
+        }
+
+
+def _chunk_end(text: str, start: int, chunk_size: int) -> int:
+    """End offset of a chunk starting at ``start``: the best separator in its second half."""
+    limit = start + chunk_size
+    if limit >= len(text):
+        return len(text)
+    earliest = start + chunk_size // 2
+    for separator in SEPARATORS:
+        cut = text.rfind(separator, earliest, limit)
+        if cut != -1:
+            return cut
+    return limit  # No separator: cut inside the word
+
+
+def check_chunk_params(chunk_size: int, chunk_overlap: int) -> None:
+    """Raises ValueError unless chunks are non-empty and overlap by less than their size."""
+    if chunk_size <= 0:
+        raise ValueError(f"Chunk size must be positive, got {chunk_size}")
+    if chunk_overlap >= chunk_size:
+        raise ValueError(f"Chunk overlap ({chunk_overlap}) must be smaller than chunk size ({chunk_size})")
+
+
+def chunk_text(text: str, chunk_size: int = 1000, chunk_overlap: int = 200) -> Iterator[Tuple[int, int]]:
+    """
+    Splits a text into chunks of at most ``chunk_size`` characters.
+
+    Chunks end at the last paragraph break in their second half, else the last
+    line break, else the last space, like RecursiveCharacterTextSplitter, and the
+    next chunk starts about ``chunk_overlap`` characters before the previous one
+    ended (at a word boundary). Only offsets are computed, with str.rfind/find;
+    no intermediate pieces are allocated.
+
+    Yields:
+        (start, end) offsets of each chunk, with surrounding whitespace excluded
+
+    Raises:
+        ValueError: On the call itself (not the first iteration) if ``chunk_overlap``
+                    is not smaller than ``chunk_size``
+    """
+    check_chunk_params(chunk_size, chunk_overlap)
+    return _chunk_offsets(text, chunk_size, chunk_overlap)
+
+
+def _chunk_offsets(text: str, chunk_size: int, chunk_overlap: int) -> Iterator[Tuple[int, int]]:
+    length = len(text)
+    start = 0
+    while start < length:
+        while start < length and text[start].isspace():
+            start += 1
+        if start >= length:
+            return
+        end = _chunk_end(text, start, chunk_size)
+        stripped_end = end
+        while stripped_end > start and text[stripped_end - 1].isspace():
+            stripped_end -= 1
+        yield start, stripped_end
+        if end >= length:
+            return
+
+        next_start = max(end - chunk_overlap, start + 1)
+        if next_start > start + 1:
+            # Start the overlap at a word boundary rather than mid-word
+            space = text.find(" ", next_start - 1, end)
+            if space != -1:
+                next_start = space + 1
+        start = next_start
+
+
+def _chunk_file(pages: List[Tuple[str, Dict]], file_id: int, chunk_size: int,
+                chunk_overlap: int) -> Iterator[Chunk]:
+    offsets = []
+    page_indices = []
+    position = 0
+    for text, metadata in pages:
+        offsets.append(position)
+        page_indices.append(metadata["page_index"])
+        position += len(text) + len(PAGE_SEPARATOR)
+    document = PAGE_SEPARATOR.join(text for text, _ in pages)
+
+    for start, end in chunk_text(document, chunk_size, chunk_overlap):
+        first = bisect_right(offsets, start) - 1
+        last = bisect_right(offsets, end - 1) - 1
+        yield Chunk(document[start:end], file_id, page_indices[first], page_indices[last])
+
+
+def chunk_pages(texts_with_metadata: Iterable[Tuple[str, Dict]], chunk_size: int = 1000,
+                chunk_overlap: int = 200, file_table: Optional[FileTable] = None) -> Iterator[Chunk]:
+    """
+    Chunks extracted PDF pages a whole document at a time.
+
+    Consecutive pages of the same file are treated as one text, so chunks can run
+    across page breaks; each chunk records the range of pages it covers. Only one
+    document is held in memory at a time.
+
+    Args:
+        texts_with_metadata: (text, metadata) pages as returned by extract_text_from_pdf
+        chunk_size: Maximum chunk length in characters
+        chunk_overlap: Approximate overlap between consecutive chunks
+        file_table: Table the files are interned in (a new one if omitted)
+
+    Yields:
+        Chunks in document order
+
+    Raises:
+        ValueError: On the call itself if ``chunk_overlap`` is not smaller than ``chunk_size``
+    """
+    check_chunk_params(chunk_size, chunk_overlap)
+    return _chunk_documents(texts_with_metadata, chunk_size, chunk_overlap,
+                            file_table if file_table is not None else FileTable())
+
+
+def _chunk_documents(texts_with_metadata: Iterable[Tuple[str, Dict]], chunk_size: int,
+                     chunk_overlap: int, file_table: FileTable) -> Iterator[Chunk]:
+    pages: List[Tuple[str, Dict]] = []
+    current_path = None
+    for text, metadata in texts_with_metadata:
+        if metadata["file_path"] != current_path and pages:
+            yield from _chunk_file(pages, file_id, chunk_size, chunk_overlap)
+            pages = []
+        if not pages:
+            current_path = metadata["file_path"]
+            file_id = file_table.intern(metadata["file_name"], current_path, metadata["total_pages"])
+        pages.append((text, metadata))
+    if pages:
+        yield from _chunk_file(pages, file_id, chunk_size, chunk_overlap)
@@ -0,0 +1,188 @@
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+import logging
+from array import array
+from typing import Dict, List, Optional
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+# Default on-disk location of the embedding cache (relative to the working directory)
+EMBEDDING_CACHE_PATH = "data/cache/embeddings.sqlite"
+
+
+def hash_text(text: str) -> str:
+    """Return a stable content hash for a chunk of text."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Persistent, content-addressed store of embedding vectors.
+
+    Vectors are keyed by (model name, sha256 of the chunk text), so the same chunk
+    is only embedded once per model no matter which PDF it came from. The store is
+    bounded by ``max_entries``; when it grows past the limit the least recently
+    used vectors are evicted.
+    """
+
+    def __init__(self, path: str = EMBEDDING_CACHE_PATH, max_entries: int = 500_000):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " model TEXT NOT NULL,"
+            " text_hash TEXT NOT NULL,"
+            " vector BLOB NOT NULL,"
+            " last_used REAL NOT NULL,"
+            " PRIMARY KEY (model, text_hash))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings (last_used)")
+        self._conn.commit()
+
+    def get_many(self, model: str, texts: List[str]) -> List[Optional[List[float]]]:
+        """
+        Look up cached vectors for a batch of texts.
+
+        Args:
+            model: Embedding model name
+            texts: Chunk texts to look up
+
+        Returns:
+            List aligned with ``texts`` holding the cached vector or None on a miss
+        """
+        hashes = [hash_text(text) for text in texts]
+        found = {}
+        with self._lock:
+            # Stay well below SQLite's bound-parameter limit
+            for start in range(0, len(hashes), 500):
+                batch = hashes[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND text_hash IN ({placeholders})",
+                    [model, *batch],
+                ).fetchall()
+                found.update(rows)
+
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE model = ? AND text_hash = ?",
+                    [(now, model, h) for h in found],
+                )
+                self._conn.commit()
+
+        results = []
+        for h in hashes:
+            blob = found.get(h)
+            results.append(array("f", blob).tolist() if blob is not None else None)
+
+        hit_count = sum(1 for r in results if r is not None)
+        self.hits += hit_count
+        self.misses += len(results) - hit_count
+        return results
+
+    def put_many(self, model: str, texts: List[str], vectors: List[List[float]]) -> None:
+        """Store vectors for the given texts and evict old entries if over capacity."""
+        now = time.time()
+        rows = [(model, hash_text(text), array("f", vector).tobytes(), now)
+                for text, vector in zip(texts, vectors)]
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?)", rows)
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        """Drop least recently used vectors until the cache is within its size bound."""
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        excess = count - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM embeddings WHERE rowid IN "
+                "(SELECT rowid FROM embeddings ORDER BY last_used ASC LIMIT ?)",
+                (excess,),
+            )
+            logger.info(f"Evicted {excess} entries from embedding cache")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def clear(self) -> None:
+        """Remove every cached vector."""
+        with self._lock:
+            self._conn.execute("DELETE FROM embeddings")
+            self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self) -> "EmbeddingCache":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+_shared_caches: Dict[str, EmbeddingCache] = {}
+_shared_caches_lock = threading.Lock()
+
+
+def shared_embedding_cache(path: str = EMBEDDING_CACHE_PATH) -> EmbeddingCache:
+    """
+    Returns the process-wide EmbeddingCache for a path, opening it on first use.
+
+    Every index (e.g. one per chat session) can then share a single SQLite
+    connection instead of opening, and never closing, one of its own.
+    """
+    key = os.path.abspath(path)
+    with _shared_caches_lock:
+        cache = _shared_caches.get(key)
+        if cache is None:
+            cache = _shared_caches[key] = EmbeddingCache(path)
+        return cache
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that serves document vectors from an EmbeddingCache."""
+
+    def __init__(self, embeddings: Embeddings, model: str, cache: EmbeddingCache):
+        self.embeddings = embeddings
+        self.model = model
+        self.cache = cache
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed documents, only calling the underlying model for cache misses."""
+        vectors = self.cache.get_many(self.model, texts)
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+
+        if missing:
+            new_vectors = self.embeddings.embed_documents([texts[i] for i in missing])
+            self.cache.put_many(self.model, [texts[i] for i in missing], new_vectors)
+            for i, vector in zip(missing, new_vectors):
+                vectors[i] = vector
+
+        logger.info(f"Embedding cache: {len(texts) - len(missing)} hits, {len(missing)} misses "
+                    f"(total {self.cache.hits} hits, {self.cache.misses} misses)")
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        """Queries are not cached; delegate to the underlying model."""
+        return self.embeddings.embed_query(text)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return await self.embeddings.aembed_query(text)
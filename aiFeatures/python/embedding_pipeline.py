@@ -0,0 +1,116 @@
+import time
+import hashlib
+import logging
+from array import array
+from collections import deque
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from langchain_core.embeddings import Embeddings
+from langchain_community.vectorstores import FAISS
+from .lexical_index import lexical_index_of
+
+logger = logging.getLogger(__name__)
+
+
+class StubEmbeddings(Embeddings):
+    """
+    Deterministic local embedder for exercising the indexing pipeline without Ollama.
+
+    Each text is mapped to a pseudo-random unit vector derived from its sha256 hash,
+    so identical texts always get identical vectors. ``latency`` adds an artificial
+    per-call delay to mimic a remote embedding service.
+    """
+
+    def __init__(self, size: int = 256, latency: float = 0.0):
+        self.size = size
+        self.latency = latency
+
+    def _embed(self, text: str) -> List[float]:
+        values = array("f")
+        seed = hashlib.sha256(text.encode("utf-8")).digest()
+        counter = 0
+        while len(values) < self.size:
+            block = hashlib.sha256(seed + counter.to_bytes(4, "little")).digest()
+            values.extend((b - 127.5) / 127.5 for b in block)
+            counter += 1
+        vector = values[:self.size].tolist()
+        norm = sum(v * v for v in vector) ** 0.5 or 1.0
+        return [v / norm for v in vector]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if self.latency:
+            time.sleep(self.latency)
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        if self.latency:
+            time.sleep(self.latency)
+        return self._embed(text)
+
+
+def iter_batches(chunks: Iterable[Tuple[str, Dict]], batch_size: int) -> Iterator[List[Tuple[str, Dict]]]:
+    """Yield lists of at most ``batch_size`` (text, metadata) pairs from a chunk stream."""
+    iterator = iter(chunks)
+    while True:
+        batch = list(islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def embed_and_index(vector_store: FAISS, chunks: Iterable[Tuple[str, Dict]],
+                    batch_size: int = 64, max_workers: int = 4,
+                    on_chunks: Optional[Callable[[int], None]] = None) -> List[str]:
+    """
+    Streams chunks through the embedding model in batches and appends them to a FAISS store.
+
+    At most ``max_workers`` batches are embedded concurrently and at most twice that many
+    are held in memory, so large uploads keep a flat memory profile. Batches are appended
+    in submission order, which keeps index positions deterministic across runs. If the
+    store has a lexical index, each batch is added to it as well.
+
+    Args:
+        vector_store: FAISS vector store to append to
+        chunks: Iterable of (text, metadata) pairs; may be a lazy generator
+        batch_size: Number of chunks per embedding request
+        max_workers: Number of embedding requests in flight at once
+        on_chunks: Called with the size of each batch once it has been added to the index
+
+    Returns:
+        Docstore IDs of the indexed chunks, in input order
+    """
+    embeddings = vector_store.embedding_function
+    lexical_index = lexical_index_of(vector_store)
+    max_pending = max_workers * 2
+    pending = deque()
+    ids = []
+    started = time.perf_counter()
+
+    def flush_oldest():
+        batch, future = pending.popleft()
+        vectors = future.result()
+        texts = [text for text, _ in batch]
+        metadatas = [metadata for _, metadata in batch]
+        batch_ids = vector_store.add_embeddings(list(zip(texts, vectors)), metadatas=metadatas)
+        if lexical_index is not None:
+            lexical_index.add(batch_ids, texts)
+        ids.extend(batch_ids)
+        logger.debug(f"Indexed {len(ids)} chunks")
+        if on_chunks:
+            on_chunks(len(batch))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for batch in iter_batches(chunks, batch_size):
+            future = executor.submit(embeddings.embed_documents, [text for text, _ in batch])
+            pending.append((batch, future))
+            if len(pending) >= max_pending:
+                flush_oldest()
+
+        while pending:
+            flush_oldest()
+
+    elapsed = time.perf_counter() - started
+    rate = len(ids) / elapsed if elapsed > 0 else 0.0
+    logger.info(f"Embedded {len(ids)} chunks in {elapsed:.2f}s ({rate:.1f} chunks/s)")
+    return ids
@@ -0,0 +1,276 @@
+import math
+import logging
+import itertools
+import warnings
+import faiss
+import numpy as np
+from typing import Any, Dict, List, Optional, Type
+from langchain_community.docstore.base import Docstore
+from langchain_community.vectorstores import FAISS
+from langchain_community.vectorstores.utils import DistanceStrategy
+from .lexical_index import LexicalIndex, lexical_index_of
+
+logger = logging.getLogger(__name__)
+
+# Supported index types; "auto" picks one based on the corpus size
+INDEX_TYPES = ("auto", "flat", "ivf_flat", "ivf_pq", "hnsw")
+
+# Corpus sizes at which "auto" switches to approximate search
+IVF_MIN_VECTORS = 20_000
+PQ_MIN_VECTORS = 1_000_000
+
+# Default query-time search parameters
+DEFAULT_NPROBE = 16
+DEFAULT_EF_SEARCH = 64
+HNSW_M = 32
+
+# k-means wants roughly this many training points per centroid
+TRAINING_POINTS_PER_CENTROID = 39
+PQ_CENTROIDS = 256  # 8 bits per sub-quantizer
+
+# Store versions are never reused, so a cache keyed on one cannot match a different store
+_store_versions = itertools.count(1)
+
+
+def create_vector_store(embeddings: Any, index: faiss.Index, docstore: Docstore,
+                        index_to_docstore_id: Dict[int, str], store_class: Type[FAISS] = FAISS,
+                        lexical_index: Optional[LexicalIndex] = None, **kwargs: Any) -> FAISS:
+    """
+    Wraps a FAISS index in a LangChain vector store configured for its metric.
+
+    Inner-product indexes hold unit-length vectors, so their scores are cosine
+    similarities: the store normalizes every vector it adds (and every query it
+    embeds). L2 indexes from older versions are wrapped as they are.
+
+    ``lexical_index`` (covering the same chunks as ``docstore``) is attached to the
+    store as ``lexical_index``; embed_and_index and delete_chunks keep it in step
+    with the vectors. Every new store gets a fresh version (see store_version).
+    """
+    if index.metric_type == faiss.METRIC_INNER_PRODUCT:
+        kwargs.setdefault("normalize_L2", True)
+        kwargs.setdefault("distance_strategy", DistanceStrategy.MAX_INNER_PRODUCT)
+    with warnings.catch_warnings():
+        # LangChain warns that normalization is meant for L2; here it is what makes IP equal cosine
+        warnings.filterwarnings("ignore", message="Normalizing L2 is not applicable")
+        vector_store = store_class(embeddings, index, docstore, index_to_docstore_id, **kwargs)
+    vector_store.lexical_index = lexical_index
+    mark_changed(vector_store)
+    return vector_store
+
+
+def mark_changed(vector_store: FAISS) -> int:
+    """Gives a vector store a new version after it was modified, and returns it."""
+    vector_store.version = next(_store_versions)
+    return vector_store.version
+
+
+def store_version(vector_store: FAISS) -> int:
+    """
+    Version of a vector store's contents, for caches of search results.
+
+    Versions increase monotonically across all stores of the process; each store
+    gets a new one when it is created and whenever IncrementalIndexManager modifies
+    it. Stores created elsewhere get one the first time they are asked.
+    """
+    version = getattr(vector_store, "version", None)
+    return version if version is not None else mark_changed(vector_store)
+
+
+def _nlist_for(n_vectors: int) -> int:
+    """Number of IVF cells for a corpus, following the usual ~4*sqrt(n) rule of thumb."""
+    nlist = int(4 * math.sqrt(n_vectors))
+    return max(1, min(nlist, n_vectors // TRAINING_POINTS_PER_CENTROID))
+
+
+def _pq_subquantizers(dim: int) -> int:
+    """Largest number of PQ sub-quantizers (at most 64, >= 4 dims each) that divides ``dim``."""
+    for m in range(min(64, dim // 4), 0, -1):
+        if dim % m == 0:
+            return m
+    return 1
+
+
+def resolve_index_type(index_type: str, n_vectors: int) -> str:
+    """
+    Picks the concrete index type to build for a corpus.
+
+    "auto" chooses flat, IVF-Flat or IVF-PQ by corpus size. Explicit IVF types fall
+    back to flat when there are too few vectors to train the quantizers reliably.
+    """
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type '{index_type}'. Expected one of {INDEX_TYPES}")
+
+    if index_type == "auto":
+        if n_vectors >= PQ_MIN_VECTORS:
+            return "ivf_pq"
+        if n_vectors >= IVF_MIN_VECTORS:
+            return "ivf_flat"
+        return "flat"
+
+    min_vectors = {"ivf_flat": 4 * TRAINING_POINTS_PER_CENTROID,
+                   "ivf_pq": PQ_CENTROIDS * TRAINING_POINTS_PER_CENTROID}.get(index_type, 0)
+    if n_vectors < min_vectors:
+        logger.info(f"Only {n_vectors} vectors; using a flat index instead of {index_type}")
+        return "flat"
+    return index_type
+
+
+def build_index(vectors: np.ndarray, index_type: str, metric: int = faiss.METRIC_L2) -> faiss.Index:
+    """
+    Builds, trains (if needed) and fills a FAISS index of the given type.
+
+    Args:
+        vectors: float32 array of shape (n, dim)
+        index_type: One of INDEX_TYPES other than "auto"
+        metric: faiss.METRIC_L2 or faiss.METRIC_INNER_PRODUCT
+
+    Returns:
+        Populated FAISS index whose positions match the rows of ``vectors``
+    """
+    n_vectors, dim = vectors.shape
+
+    if index_type == "flat":
+        index = faiss.IndexFlat(dim, metric)
+    elif index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, HNSW_M, metric)
+        index.hnsw.efSearch = DEFAULT_EF_SEARCH
+    elif index_type in ("ivf_flat", "ivf_pq"):
+        nlist = _nlist_for(n_vectors)
+        quantizer = faiss.IndexFlat(dim, metric)
+        if index_type == "ivf_flat":
+            index = faiss.IndexIVFFlat(quantizer, dim, nlist, metric)
+        else:
+            index = faiss.IndexIVFPQ(quantizer, dim, nlist, _pq_subquantizers(dim), 8, metric)
+        # Keep the quantizer alive as long as the index
+        index.own_fields = True
+        quantizer.this.disown()
+
+        # Train on a random sample; more points than this do not improve the clustering
+        max_training = max(nlist, PQ_CENTROIDS) * 256
+        if n_vectors > max_training:
+            sample = np.random.default_rng(0).choice(n_vectors, max_training, replace=False)
+            training = vectors[np.sort(sample)]
+        else:
+            training = vectors
+        logger.info(f"Training {index_type} index with {nlist} lists on {len(training)} vectors")
+        index.train(training)
+        index.nprobe = min(DEFAULT_NPROBE, nlist)
+    else:
+        raise ValueError(f"Cannot build index of type '{index_type}'")
+
+    index.add(vectors)
+    if isinstance(index, faiss.IndexIVF):
+        # Needed to reconstruct stored vectors (e.g. for MMR or re-building the index)
+        index.make_direct_map()
+    return index
+
+
+def index_type_of(index: faiss.Index) -> str:
+    """Returns the INDEX_TYPES name of an existing FAISS index."""
+    if isinstance(index, faiss.IndexIVFPQ):
+        return "ivf_pq"
+    if isinstance(index, faiss.IndexIVFFlat):
+        return "ivf_flat"
+    if isinstance(index, faiss.IndexHNSW):
+        return "hnsw"
+    return "flat"
+
+
+def optimize_index(vector_store: FAISS, index_type: str = "auto") -> str:
+    """
+    Converts a vector store's flat index into an approximate one once the corpus is large enough.
+
+    Vectors are read back from the flat index and re-added in the same order, so the
+    store's index_to_docstore_id mapping stays valid.
+
+    Args:
+        vector_store: FAISS vector store built with a flat index
+        index_type: Target index type (see INDEX_TYPES)
+
+    Returns:
+        The index type now in use
+    """
+    index = vector_store.index
+    current = index_type_of(index)
+    target = resolve_index_type(index_type, index.ntotal)
+    if current != "flat" or target == "flat":
+        return current
+
+    vectors = index.reconstruct_n(0, index.ntotal)
+    vector_store.index = build_index(vectors, target, index.metric_type)
+    logger.info(f"Converted flat index with {index.ntotal} vectors to {target}")
+    return target
+
+
+def search_params(index: faiss.Index, nprobe: Optional[int] = None,
+                  ef_search: Optional[int] = None) -> Optional[faiss.SearchParameters]:
+    """
+    Per-query accuracy/speed knobs for index.search(..., params=...).
+
+    The index's own nprobe/efSearch (the defaults for every query) are left
+    untouched, so an override affects only the call it is passed to and concurrent
+    searches do not interfere. Parameters that do not apply to the index are ignored.
+    """
+    if nprobe is not None and isinstance(index, faiss.IndexIVF):
+        return faiss.SearchParametersIVF(nprobe=nprobe)
+    if ef_search is not None and isinstance(index, faiss.IndexHNSW):
+        return faiss.SearchParametersHNSW(efSearch=ef_search)
+    return None
+
+
+def _remove_positions(index: faiss.Index, positions: np.ndarray) -> faiss.Index:
+    """
+    Removes vectors at the given positions and renumbers the rest to 0..n-1.
+
+    Flat indexes already compact on removal. IVF indexes keep their stored labels,
+    so the inverted lists are relabelled in place. HNSW graphs do not support removal
+    and are rebuilt from the remaining vectors.
+    """
+    if isinstance(index, faiss.IndexIVF):
+        index.make_direct_map(False)
+        index.remove_ids(positions)
+        invlists = index.invlists
+        list_ids = [faiss.rev_swig_ptr(invlists.get_ids(i), invlists.list_size(i)).copy()
+                    for i in range(index.nlist)]
+        remaining = np.sort(np.concatenate(list_ids)) if list_ids else np.array([], dtype=np.int64)
+        for i, ids in enumerate(list_ids):
+            if len(ids):
+                new_ids = np.searchsorted(remaining, ids).astype(np.int64)
+                invlists.update_entries(i, 0, len(ids), faiss.swig_ptr(new_ids), invlists.get_codes(i))
+        index.make_direct_map()
+        return index
+
+    if isinstance(index, faiss.IndexHNSW):
+        keep = np.setdiff1d(np.arange(index.ntotal), positions)
+        vectors = np.vstack([index.reconstruct(int(i)) for i in keep]) if len(keep) else \
+            np.empty((0, index.d), dtype=np.float32)
+        rebuilt = faiss.IndexHNSWFlat(index.d, HNSW_M, index.metric_type)
+        rebuilt.hnsw.efSearch = index.hnsw.efSearch
+        rebuilt.add(vectors)
+        return rebuilt
+
+    index.remove_ids(positions)
+    return index
+
+
+def delete_chunks(vector_store: FAISS, ids: List[str]) -> None:
+    """
+    Deletes chunks by docstore ID from a vector store with any supported index type.
+
+    Equivalent to FAISS.delete, which assumes the index renumbers positions on removal
+    (only true for flat indexes).
+    """
+    reversed_index = {id_: i for i, id_ in vector_store.index_to_docstore_id.items()}
+    missing = [id_ for id_ in ids if id_ not in reversed_index]
+    if missing:
+        raise ValueError(f"Some specified ids do not exist in the current store: {missing}")
+
+    to_delete = {reversed_index[id_] for id_ in ids}
+    vector_store.index = _remove_positions(vector_store.index, np.fromiter(to_delete, dtype=np.int64))
+    vector_store.docstore.delete(ids)
+    lexical_index = lexical_index_of(vector_store)
+    if lexical_index is not None:
+        lexical_index.delete(ids)
+
+    remaining = [id_ for i, id_ in sorted(vector_store.index_to_docstore_id.items()) if i not in to_delete]
+    vector_store.index_to_docstore_id = dict(enumerate(remaining))
@@ -0,0 +1,91 @@
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+from lxml import etree
+
+# Size of the pieces fed to the incremental parser
+FEED_CHUNK_SIZE = 16 * 1024
+
+
+@dataclass(frozen=True)
+class ExtractionRule:
+    """
+    Where a site keeps its main content and which elements to take text from.
+
+    The first ``container_tag`` element (with id ``container_id``, if given) is the
+    container; the text of every ``text_tags`` element inside it is returned in
+    document order, up to ``limit`` elements.
+    """
+    container_tag: str
+    container_id: Optional[str] = None
+    text_tags: Tuple[str, ...] = ("p",)
+    limit: Optional[int] = None
+
+    def is_container(self, element) -> bool:
+        return element.tag == self.container_tag and (
+            self.container_id is None or element.get("id") == self.container_id)
+
+
+def _element_text(element) -> str:
+    # Collapse the whitespace of all nested text; inline tags keep their word boundaries
+    return " ".join("".join(element.itertext()).split())
+
+
+def extract_text(html: str, rule: ExtractionRule) -> Optional[List[str]]:
+    """
+    Extracts the text of the elements selected by ``rule`` with lxml's incremental parser.
+
+    The page is fed to the parser in chunks and parsing stops as soon as the
+    container element closes (or ``limit`` elements are complete), so the rest of
+    the page (sidebars, footers, scripts) is never parsed.
+
+    Args:
+        html: Page source
+        rule: Extraction rule of the page's site
+
+    Returns:
+        Texts in document order (empty ones skipped), or None if the container is not found
+    """
+    parser = etree.HTMLPullParser(events=("start", "end"))
+    container = None
+    # Selected elements in document (start-tag) order -> text, filled in when each closes
+    texts = {}
+    open_count = 0
+    finished = False
+
+    def handle_events() -> bool:
+        nonlocal container, open_count
+        for event, element in parser.read_events():
+            if container is None:
+                if event == "start" and rule.is_container(element):
+                    container = element
+                continue
+            if event == "end" and element is container:
+                return True
+            if element.tag not in rule.text_tags:
+                continue
+            if event == "start":
+                if rule.limit is None or len(texts) < rule.limit:
+                    texts[element] = None
+                    open_count += 1
+            elif element in texts and texts[element] is None:
+                texts[element] = _element_text(element)
+                open_count -= 1
+                if rule.limit is not None and len(texts) >= rule.limit and open_count == 0:
+                    return True
+        return False
+
+    for offset in range(0, len(html), FEED_CHUNK_SIZE):
+        parser.feed(html[offset:offset + FEED_CHUNK_SIZE])
+        if handle_events():
+            finished = True
+            break
+    if not finished:
+        try:
+            parser.close()
+        except etree.XMLSyntaxError:
+            pass  # Empty or truncated document; keep whatever was parsed
+        handle_events()
+
+    if container is None:
+        return None
+    return [text for text in texts.values() if text]
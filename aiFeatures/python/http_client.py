@@ -0,0 +1,206 @@
+import json
+import random
+import asyncio
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, Mapping, Optional, Tuple
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import aiohttp
+except ImportError:  # The async client falls back to the sync one in a worker thread
+    aiohttp = None
+
+logger = logging.getLogger(__name__)
+
+CONNECT_TIMEOUT = 5  # Seconds to establish a connection
+READ_TIMEOUT = 10  # Seconds to wait between bytes of the response
+MAX_CONNECTIONS_PER_HOST = 8
+MAX_RESPONSE_BYTES = 5 * 1024 * 1024  # Larger bodies are refused rather than buffered
+RETRIES = 2
+BACKOFF_FACTOR = 0.5  # Retries wait 0.5s, 1s, 2s, ... (plus jitter for the async client)
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+USER_AGENT = "Mozilla/5.0 (compatible; KIRA-AI-Tutor/1.0)"
+
+
+class ResponseTooLarge(Exception):
+    """Raised when a response body exceeds the configured size cap."""
+
+
+def create_session(max_connections_per_host: int = MAX_CONNECTIONS_PER_HOST,
+                   retries: int = RETRIES, backoff_factor: float = BACKOFF_FACTOR) -> requests.Session:
+    """
+    Creates a requests session with keep-alive connection pools and retries.
+
+    Each host gets a pool of at most ``max_connections_per_host`` connections;
+    callers beyond that wait for a free connection instead of opening more.
+    Idempotent requests that fail to connect or get a 429/5xx reply are retried
+    with exponential backoff, honouring Retry-After.
+    """
+    retry = Retry(total=retries, backoff_factor=backoff_factor, status_forcelist=RETRY_STATUSES,
+                  allowed_methods=frozenset(["GET", "HEAD"]), respect_retry_after_header=True,
+                  raise_on_status=False)
+    adapter = HTTPAdapter(pool_connections=32, pool_maxsize=max_connections_per_host,
+                          pool_block=True, max_retries=retry)
+    session = requests.Session()
+    session.headers["User-Agent"] = USER_AGENT
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """Returns the process-wide pooled session, creating it on first use."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = create_session()
+    return _session
+
+
+def get(url: str, params: Optional[Dict[str, Any]] = None, headers: Optional[Dict[str, str]] = None,
+        timeout: Tuple[float, float] = (CONNECT_TIMEOUT, READ_TIMEOUT),
+        max_bytes: int = MAX_RESPONSE_BYTES) -> requests.Response:
+    """
+    GET a URL with the shared session, enforcing timeouts and a response-size cap.
+
+    Args:
+        url: URL to fetch
+        params: Query string parameters
+        headers: Extra request headers
+        timeout: (connect, read) timeouts in seconds
+        max_bytes: Largest response body accepted
+
+    Returns:
+        requests.Response with its body already read
+
+    Raises:
+        ResponseTooLarge: If the body is larger than ``max_bytes``
+        requests.RequestException: On connection errors and timeouts (after retries)
+    """
+    response = get_session().get(url, params=params, headers=headers, timeout=timeout, stream=True)
+    try:
+        declared = response.headers.get("Content-Length")
+        if declared and declared.isdigit() and int(declared) > max_bytes:
+            raise ResponseTooLarge(f"{url} is {declared} bytes (limit {max_bytes})")
+        body = bytearray()
+        for chunk in response.iter_content(chunk_size=64 * 1024):
+            body += chunk
+            if len(body) > max_bytes:
+                raise ResponseTooLarge(f"{url} exceeds {max_bytes} bytes")
+        response._content = bytes(body)  # Lets response.text / .json() work on the capped body
+    finally:
+        response.close()  # Returns the connection to the pool
+    return response
+
+
+def get_json(url: str, params: Optional[Dict[str, Any]] = None, **kwargs: Any) -> Any:
+    """GET a URL and decode its JSON body."""
+    return get(url, params=params, **kwargs).json()
+
+
+@dataclass
+class AsyncResponse:
+    """Fully read response returned by AsyncHTTPClient."""
+    url: str
+    status_code: int
+    headers: Mapping[str, str]  # Case-insensitive
+    content: bytes = field(repr=False)
+    encoding: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding or "utf-8", errors="replace")
+
+    def json(self) -> Any:
+        return json.loads(self.content)
+
+
+class AsyncHTTPClient:
+    """
+    asyncio counterpart of get(): pooled keep-alive connections with a per-host
+    limit, timeouts, retries with backoff and a response-size cap.
+
+    Uses aiohttp when it is installed; otherwise each request runs through the
+    sync client in a worker thread. Create it inside the running event loop.
+    """
+
+    def __init__(self, max_connections_per_host: int = MAX_CONNECTIONS_PER_HOST,
+                 retries: int = RETRIES, backoff_factor: float = BACKOFF_FACTOR):
+        self.max_connections_per_host = max_connections_per_host
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self._session = None
+
+    def _client_session(self):
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=0, limit_per_host=self.max_connections_per_host,
+                                             keepalive_timeout=30)
+            self._session = aiohttp.ClientSession(connector=connector, headers={"User-Agent": USER_AGENT})
+        return self._session
+
+    async def get(self, url: str, params: Optional[Dict[str, Any]] = None,
+                  headers: Optional[Dict[str, str]] = None,
+                  timeout: Tuple[float, float] = (CONNECT_TIMEOUT, READ_TIMEOUT),
+                  max_bytes: int = MAX_RESPONSE_BYTES) -> AsyncResponse:
+        """Async GET; see get() for the arguments and errors."""
+        if aiohttp is None:
+            response = await asyncio.to_thread(get, url, params=params, headers=headers,
+                                               timeout=timeout, max_bytes=max_bytes)
+            return AsyncResponse(response.url, response.status_code, response.headers,
+                                 response.content, response.encoding)
+
+        client_timeout = aiohttp.ClientTimeout(sock_connect=timeout[0], sock_read=timeout[1])
+        for attempt in range(self.retries + 1):
+            try:
+                async with self._client_session().get(url, params=params, headers=headers,
+                                                      timeout=client_timeout) as response:
+                    if response.status in RETRY_STATUSES and attempt < self.retries:
+                        await self._backoff(attempt, response.headers.get("Retry-After"))
+                        continue
+                    if response.content_length is not None and response.content_length > max_bytes:
+                        raise ResponseTooLarge(f"{url} is {response.content_length} bytes (limit {max_bytes})")
+                    body = bytearray()
+                    async for chunk in response.content.iter_chunked(64 * 1024):
+                        body += chunk
+                        if len(body) > max_bytes:
+                            raise ResponseTooLarge(f"{url} exceeds {max_bytes} bytes")
+                    return AsyncResponse(str(response.url), response.status, response.headers.copy(),
+                                         bytes(body), response.charset)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                if attempt >= self.retries:
+                    raise
+                logger.debug(f"Retrying {url} after {e!r}")
+                await self._backoff(attempt, None)
+
+    async def get_json(self, url: str, params: Optional[Dict[str, Any]] = None, **kwargs: Any) -> Any:
+        return (await self.get(url, params=params, **kwargs)).json()
+
+    async def _backoff(self, attempt: int, retry_after: Optional[str]) -> None:
+        delay = self.backoff_factor * (2 ** attempt)
+        if retry_after and retry_after.isdigit():
+            delay = max(delay, min(float(retry_after), READ_TIMEOUT))
+        await asyncio.sleep(delay + random.uniform(0, delay / 2))
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self) -> "AsyncHTTPClient":
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        await self.close()
@@ -0,0 +1,338 @@
+import os
+import copy
+import json
+import time
+import hashlib
+import logging
+import dataclasses
+from dataclasses import dataclass, field, asdict
+from typing import Callable, Dict, List, Optional, Tuple, Union
+import faiss
+from langchain_core.embeddings import Embeddings
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+from .embedding_cache import EMBEDDING_CACHE_PATH
+from .faiss_indexes import optimize_index, delete_chunks, create_vector_store, mark_changed
+from .chunking import check_chunk_params
+from .columnar_docstore import ColumnarDocstore
+from .lexical_index import lexical_index_of
+from .index_store import current_index_dir
+from .rag_pipeline import (
+    collect_pdf_files,
+    extract_texts_parallel,
+    create_embeddings,
+    create_empty_faiss_index,
+    add_texts_to_index,
+    save_index,
+    load_index,
+)
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "manifest.json"
+# IndexedFile.source of files added through add_extracted (uploads)
+UPLOAD_SOURCE = "upload"
+
+
+def file_sha256(path: str) -> str:
+    """Return the sha256 digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+@dataclass
+class IndexedFile:
+    key: str  # Source identifier (the path, or the upload's file name)
+    path: str
+    mtime: float
+    size: int
+    sha256: str
+    chunk_ids: List[str] = field(default_factory=list)
+    # What added the file: the synced folder (or file) path, UPLOAD_SOURCE, or "" for add_files calls;
+    # sync only prunes files of its own source
+    source: str = ""
+
+
+@dataclass
+class ExtractedFile:
+    """A file read and extracted outside the manager, e.g. an upload parsed in memory."""
+    key: str
+    size: int
+    sha256: str
+    texts: Callable[[], List[Tuple[str, Dict]]] = field(repr=False)  # Returns the extracted pages
+
+
+@dataclass
+class SyncResult:
+    added: List[str] = field(default_factory=list)
+    updated: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    unchanged: List[str] = field(default_factory=list)
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.added or self.updated or self.removed)
+
+
+class IncrementalIndexManager:
+    """
+    Keeps a FAISS vector store in step with a set of PDF files.
+
+    Every indexed file is recorded with its mtime, size and content hash together
+    with the docstore IDs of its chunks. Syncing only embeds new or changed files
+    and deletes the vectors of files that disappeared, instead of rebuilding the
+    whole index.
+    """
+
+    def __init__(self, chunk_size: int = 1000, chunk_overlap: int = 200,
+                 model: str = "mxbai-embed-large:latest",
+                 cache_path: Optional[str] = EMBEDDING_CACHE_PATH,
+                 batch_size: int = 64, max_workers: int = 4,
+                 embeddings: Optional[Embeddings] = None,
+                 processes: Optional[int] = None,
+                 index_type: str = "auto"):
+        check_chunk_params(chunk_size, chunk_overlap)  # Fail on a bad config, not on the first sync
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.model = model
+        self.cache_path = cache_path
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.embeddings = embeddings
+        self.processes = processes
+        self.index_type = index_type
+        self.vector_store: Optional[FAISS] = None
+        self.files: Dict[str, IndexedFile] = {}
+
+    def _changed_digest(self, key: str, path: str, stat: os.stat_result) -> Optional[str]:
+        """Return the content hash of ``path`` if it differs from the record for ``key``, else None."""
+        record = self.files.get(key)
+        if record and record.mtime == stat.st_mtime and record.size == stat.st_size:
+            return None
+        digest = file_sha256(path)
+        if record and record.sha256 == digest:
+            # Touched but not modified: refresh the stat info only
+            record.path, record.mtime, record.size = path, stat.st_mtime, stat.st_size
+            return None
+        return digest
+
+    def add_files(self, pdf_paths: List[str], keys: Optional[List[str]] = None,
+                  on_pages: Optional[Callable[[int], None]] = None,
+                  on_chunks: Optional[Callable[[int], None]] = None,
+                  source: str = "") -> SyncResult:
+        """
+        Adds new PDFs to the index and re-indexes ones whose contents changed.
+
+        Args:
+            pdf_paths: Paths of the PDF files to add
+            keys: Optional source identifiers for the files (defaults to their absolute paths);
+                  uploads pass their original file names so re-uploads are recognised
+            on_pages: Progress callback, called with the number of pages extracted
+            on_chunks: Progress callback, called with the number of chunks embedded
+            source: Recorded as the IndexedFile.source of added and updated files (and of
+                    unchanged ones that have none yet)
+
+        Returns:
+            SyncResult describing what was added, updated or left unchanged
+        """
+        keys = keys or [os.path.abspath(path) for path in pdf_paths]
+        result = SyncResult()
+        pending = []
+
+        for key, path in zip(keys, pdf_paths):
+            stat = os.stat(path)
+            digest = self._changed_digest(key, path, stat)
+            if digest is None:
+                # Unchanged files stay with the folder they were synced from; only files
+                # added without one (e.g. from a list of paths) are taken over
+                if not self.files[key].source:
+                    self.files[key].source = source
+                result.unchanged.append(key)
+                continue
+            if key in self.files:
+                self._delete_chunks(self.files[key])
+                result.updated.append(key)
+            else:
+                result.added.append(key)
+            pending.append(IndexedFile(key, path, stat.st_mtime, stat.st_size, digest, source=source))
+
+        if pending:
+            if self.vector_store is None:
+                self.vector_store = create_empty_faiss_index(self.model, self.cache_path, self.embeddings)
+
+            texts_by_path: Dict[str, list] = {record.path: [] for record in pending}
+            for text, metadata in extract_texts_parallel(list(texts_by_path), self.processes,
+                                                         on_pages=on_pages):
+                texts_by_path[metadata["file_path"]].append((text, metadata))
+
+            for record in pending:
+                # Chunks must be attributable to their file, so add one file at a time
+                record.chunk_ids = add_texts_to_index(self.vector_store, texts_by_path[record.path],
+                                                      self.chunk_size, self.chunk_overlap,
+                                                      self.batch_size, self.max_workers, on_chunks)
+                self.files[record.key] = record
+
+            # Switch to an approximate index once the corpus has grown large enough
+            optimize_index(self.vector_store, self.index_type)
+            mark_changed(self.vector_store)
+
+        logger.info(f"Index sync: {len(result.added)} added, {len(result.updated)} updated, "
+                    f"{len(result.unchanged)} unchanged")
+        return result
+
+    def add_extracted(self, files: List[ExtractedFile],
+                      on_pages: Optional[Callable[[int], None]] = None,
+                      on_chunks: Optional[Callable[[int], None]] = None) -> SyncResult:
+        """
+        Adds files whose text has already been extracted (see ExtractedFile).
+
+        Files whose content hash matches their record are skipped without calling
+        ``texts``; the others are embedded one at a time, in order.
+
+        Returns:
+            SyncResult describing what was added, updated or left unchanged
+        """
+        result = SyncResult()
+        for file in files:
+            record = self.files.get(file.key)
+            if record and record.sha256 == file.sha256:
+                result.unchanged.append(file.key)
+                continue
+
+            texts_with_metadata = file.texts()
+            if on_pages:
+                on_pages(len(texts_with_metadata))
+            if self.vector_store is None:
+                self.vector_store = create_empty_faiss_index(self.model, self.cache_path, self.embeddings)
+            if record:
+                self._delete_chunks(record)
+                result.updated.append(file.key)
+            else:
+                result.added.append(file.key)
+
+            # There is no file on disk, so the key stands in for the path
+            indexed = IndexedFile(file.key, file.key, time.time(), file.size, file.sha256,
+                                  source=UPLOAD_SOURCE)
+            indexed.chunk_ids = add_texts_to_index(self.vector_store, texts_with_metadata,
+                                                   self.chunk_size, self.chunk_overlap,
+                                                   self.batch_size, self.max_workers, on_chunks)
+            self.files[file.key] = indexed
+
+        if result.changed:
+            optimize_index(self.vector_store, self.index_type)
+            mark_changed(self.vector_store)
+        logger.info(f"Index sync: {len(result.added)} added, {len(result.updated)} updated, "
+                    f"{len(result.unchanged)} unchanged")
+        return result
+
+    def remove_files(self, keys: List[str]) -> List[str]:
+        """Deletes the vectors of the given files from the index and returns the removed keys."""
+        removed = []
+        for key in keys:
+            record = self.files.pop(key, None)
+            if record:
+                self._delete_chunks(record)
+                removed.append(key)
+        if removed:
+            if self.vector_store is not None:
+                mark_changed(self.vector_store)
+            logger.info(f"Removed {len(removed)} files from the index")
+        return removed
+
+    def sync(self, pdf_inputs: Union[str, List[str]],
+             on_pages: Optional[Callable[[int], None]] = None,
+             on_chunks: Optional[Callable[[int], None]] = None) -> SyncResult:
+        """
+        Brings the index up to date with a folder, a single PDF or a list of PDFs.
+
+        Files that are new or changed are embedded. For a folder (or single file),
+        files previously synced from that same path that are no longer in it are
+        removed; files from other folders and uploads are left alone. A list of
+        paths only adds files. Files are keyed by absolute path, so "docs" and
+        "./docs" are the same folder. The progress callbacks are passed on to
+        add_files.
+
+        Raises:
+            ValueError: If a folder or file path does not exist (nothing is removed)
+        """
+        removed = []
+        if isinstance(pdf_inputs, str):
+            if not (os.path.isdir(pdf_inputs) or
+                    (os.path.isfile(pdf_inputs) and pdf_inputs.lower().endswith(".pdf"))):
+                raise ValueError(f"{pdf_inputs} is not a folder or PDF file")
+            source = os.path.abspath(pdf_inputs)
+            pdf_files = [os.path.abspath(path) for path in collect_pdf_files(pdf_inputs)]
+            current = set(pdf_files)
+            stale = [key for key, record in self.files.items()
+                     if record.source == source and key not in current]
+            removed = self.remove_files(stale)
+        else:
+            source = ""
+            pdf_files = [os.path.abspath(path) for path in collect_pdf_files(pdf_inputs)]
+        result = self.add_files(pdf_files, on_pages=on_pages, on_chunks=on_chunks, source=source)
+        result.removed = removed
+        return result
+
+    def _delete_chunks(self, record: IndexedFile) -> None:
+        if self.vector_store is not None and record.chunk_ids:
+            delete_chunks(self.vector_store, record.chunk_ids)
+
+    def copy(self) -> "IncrementalIndexManager":
+        """
+        Returns an independent copy of the manager and its index.
+
+        The copy can be synced while this manager keeps serving queries from the
+        unchanged index, and then swapped in for it.
+        """
+        clone = copy.copy(self)
+        clone.files = {key: dataclasses.replace(record, chunk_ids=list(record.chunk_ids))
+                       for key, record in self.files.items()}
+        store = self.vector_store
+        if store is not None:
+            if isinstance(store.docstore, ColumnarDocstore):
+                docstore = store.docstore.copy()
+            else:
+                docstore = InMemoryDocstore(dict(store.docstore._dict))
+            lexical_index = lexical_index_of(store)
+            clone.vector_store = create_vector_store(store.embedding_function, faiss.clone_index(store.index),
+                                                     docstore, dict(store.index_to_docstore_id),
+                                                     lexical_index=lexical_index.copy() if lexical_index else None)
+        return clone
+
+    def clear(self) -> None:
+        """Forget every indexed file and drop the vector store."""
+        self.vector_store = None
+        self.files = {}
+
+    def memory_usage(self) -> int:
+        """Rough in-memory size of the index in bytes (vectors, chunk text and lexical index)."""
+        if self.vector_store is None:
+            return 0
+        index = self.vector_store.index
+        docstore = self.vector_store.docstore
+        lexical_index = lexical_index_of(self.vector_store)
+        size = lexical_index.memory_usage() if lexical_index is not None else 0
+        if isinstance(docstore, ColumnarDocstore):
+            return size + index.ntotal * index.d * 4 + docstore.memory_usage()
+        return size + index.ntotal * (index.d * 4 + self.chunk_size)
+
+    def save(self, path: str) -> None:
+        """Saves the vector store together with the file manifest, as one version of the index."""
+        if self.vector_store is None:
+            return
+        manifest = json.dumps([asdict(record) for record in self.files.values()])
+        save_index(self.vector_store, path, {MANIFEST_FILE: manifest})
+
+    def load(self, path: str) -> None:
+        """Loads a vector store and file manifest previously written by save()."""
+        # Resolve the version once so the index and manifest come from the same save
+        path = current_index_dir(path)
+        # The manager edits the index, so it needs an in-memory copy rather than a mapped one;
+        # later syncs embed through the same (cached) model as a freshly built index
+        embeddings = self.embeddings or create_embeddings(self.model, self.cache_path)
+        self.vector_store = load_index(path, self.model, mmap=False, embeddings=embeddings)
+        with open(os.path.join(path, MANIFEST_FILE), "r", encoding="utf-8") as f:
+            self.files = {record["key"]: IndexedFile(**record) for record in json.load(f)}
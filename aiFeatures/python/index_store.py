@@ -0,0 +1,257 @@
+import os
+import re
+import json
+import time
+import uuid
+import shutil
+import sqlite3
+import logging
+import threading
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, Optional, Tuple, Union
+import faiss
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_community.docstore.base import Docstore
+from langchain_community.vectorstores import FAISS
+from .faiss_indexes import create_vector_store
+from .columnar_docstore import ColumnarDocstore
+from .lexical_index import LexicalIndex, lexical_index_of
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE = "index.faiss"
+DOCSTORE_FILE = "docstore.sqlite"
+LEXICAL_FILE = "lexical.npz"
+# Names the version subdirectory holding the current files; replaced atomically on save
+CURRENT_FILE = "CURRENT"
+VERSION_PATTERN = re.compile(r"^v\d+-[0-9a-f]+$")
+# Superseded versions kept on disk, so processes still reading one can keep opening it
+KEEP_OLD_VERSIONS = 2
+
+
+class SQLiteDocstore(Docstore):
+    """
+    Read-only docstore that reads chunk text and metadata from SQLite on demand.
+
+    Only the chunks returned by a search are read, and the database pages live in
+    the OS page cache, so several worker processes serving the same index share
+    them instead of each holding a private copy of the corpus.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        # SQLite connections cannot be shared across threads; open one per thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+            self._local.conn = conn
+        return conn
+
+    def search(self, search: str) -> Union[str, Document]:
+        row = self._conn.execute("SELECT text, metadata FROM chunks WHERE doc_id = ?", (search,)).fetchone()
+        if row is None:
+            return f"ID {search} not found."
+        text, metadata = row
+        return Document(page_content=text, metadata=json.loads(metadata))
+
+    def delete(self, ids: list) -> None:
+        raise ValueError("Memory-mapped indexes are read-only; load with mmap=False to modify them")
+
+    def position_to_id(self, position: int) -> str:
+        row = self._conn.execute("SELECT doc_id FROM chunks WHERE position = ?", (position,)).fetchone()
+        if row is None:
+            raise KeyError(position)
+        return row[0]
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    def iter_ids(self) -> Iterator[str]:
+        for (doc_id,) in self._conn.execute("SELECT doc_id FROM chunks ORDER BY position"):
+            yield doc_id
+
+    def iter_texts(self) -> Iterator[Tuple[str, str]]:
+        """Yields (docstore ID, text) of every chunk in index order."""
+        yield from self._conn.execute("SELECT doc_id, text FROM chunks ORDER BY position")
+
+
+class PositionalIdMap(Mapping):
+    """Lazy index position -> docstore ID mapping backed by a SQLiteDocstore."""
+
+    def __init__(self, docstore: SQLiteDocstore):
+        self.docstore = docstore
+
+    def __getitem__(self, position: int) -> str:
+        return self.docstore.position_to_id(int(position))
+
+    def __len__(self) -> int:
+        return len(self.docstore)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(range(len(self)))
+
+    def values(self):
+        return list(self.docstore.iter_ids())
+
+
+class MappedFAISS(FAISS):
+    """
+    FAISS vector store over a memory-mapped index and an on-disk docstore.
+
+    Memory-mapped FAISS indexes cannot grow or shrink (FAISS aborts the process if
+    asked to), so every mutating method raises instead.
+    """
+
+    def _read_only(self, *args: Any, **kwargs: Any):
+        raise ValueError("Memory-mapped indexes are read-only; load with mmap=False to modify them")
+
+    add_texts = _read_only
+    add_embeddings = _read_only
+    add_documents = _read_only
+    delete = _read_only
+    merge_from = _read_only
+
+
+def current_index_dir(path: str) -> str:
+    """
+    Directory holding the files of an index's current version.
+
+    For indexes written by older versions, with the files directly in ``path``,
+    this is ``path`` itself.
+    """
+    try:
+        with open(os.path.join(path, CURRENT_FILE), "r", encoding="utf-8") as f:
+            return os.path.join(path, f.read().strip())
+    except FileNotFoundError:
+        return path
+
+
+def write_index_dir(vector_store: FAISS, path: str, extra_files: Optional[Dict[str, str]] = None) -> None:
+    """
+    Writes a vector store as a raw FAISS index file plus a SQLite docstore, and its
+    lexical index (if it has one) as a numpy archive.
+
+    Every save writes a new version subdirectory and then atomically replaces the
+    CURRENT pointer file, so a reader always gets the index, docstore and lexical
+    index of one version, never a mix of two saves. The newest superseded versions
+    are kept (see KEEP_OLD_VERSIONS) for readers that are still using them.
+
+    Args:
+        vector_store: Vector store to write
+        path: Index directory
+        extra_files: Further text files (name -> contents) belonging to this version,
+                     e.g. the index manager's file manifest
+    """
+    os.makedirs(path, exist_ok=True)
+    version = f"v{time.time_ns()}-{uuid.uuid4().hex[:8]}"
+    directory = os.path.join(path, version)
+    os.makedirs(directory)
+
+    faiss.write_index(vector_store.index, os.path.join(directory, INDEX_FILE))
+
+    conn = sqlite3.connect(os.path.join(directory, DOCSTORE_FILE))
+    conn.execute("CREATE TABLE chunks (position INTEGER PRIMARY KEY, doc_id TEXT NOT NULL, "
+                 "text TEXT NOT NULL, metadata TEXT NOT NULL)")
+
+    def rows():
+        for position, doc_id in sorted(vector_store.index_to_docstore_id.items()):
+            doc = vector_store.docstore.search(doc_id)
+            yield position, doc_id, doc.page_content, json.dumps(doc.metadata, separators=(",", ":"))
+
+    conn.executemany("INSERT INTO chunks VALUES (?, ?, ?, ?)", rows())
+    conn.execute("CREATE UNIQUE INDEX idx_chunks_doc_id ON chunks (doc_id)")
+    conn.commit()
+    conn.close()
+
+    lexical_index = lexical_index_of(vector_store)
+    if lexical_index is not None:
+        lexical_index.save(os.path.join(directory, LEXICAL_FILE))
+    for name, contents in (extra_files or {}).items():
+        with open(os.path.join(directory, name), "w", encoding="utf-8") as f:
+            f.write(contents)
+
+    pointer = os.path.join(path, CURRENT_FILE)
+    with open(pointer + ".tmp", "w", encoding="utf-8") as f:
+        f.write(version)
+    os.replace(pointer + ".tmp", pointer)
+    _remove_old_versions(path, version)
+
+
+def _remove_old_versions(path: str, current: str) -> None:
+    """Deletes all but the newest KEEP_OLD_VERSIONS superseded versions, and files of the old flat layout."""
+    # Version names start with a nanosecond timestamp, so they sort by age
+    old = sorted(name for name in os.listdir(path) if VERSION_PATTERN.match(name) and name != current)
+    for name in old[:max(0, len(old) - KEEP_OLD_VERSIONS)]:
+        shutil.rmtree(os.path.join(path, name), ignore_errors=True)
+    for name in (INDEX_FILE, DOCSTORE_FILE, LEXICAL_FILE):
+        if os.path.exists(os.path.join(path, name)):
+            os.remove(os.path.join(path, name))
+
+
+def _read_index_mmap(index_path: str) -> faiss.Index:
+    """Reads a FAISS index with its vectors memory-mapped, falling back to a normal read."""
+    flags = [getattr(faiss, "IO_FLAG_MMAP_IFC", None), faiss.IO_FLAG_MMAP]
+    for flag in flags:
+        if flag is None:
+            continue
+        try:
+            return faiss.read_index(index_path, flag | faiss.IO_FLAG_READ_ONLY)
+        except RuntimeError as e:
+            logger.debug(f"Memory-mapped read with flag {flag} failed: {e}")
+    logger.warning(f"Could not memory-map {index_path}; loading it into memory")
+    return faiss.read_index(index_path)
+
+
+def read_index_dir(path: str, embeddings: Embeddings, mmap: bool = True, **kwargs: Any) -> FAISS:
+    """
+    Loads a vector store written by write_index_dir.
+
+    Args:
+        path: Index directory (its current version is read)
+        embeddings: Embedding model used for queries
+        mmap: Memory-map the vectors and read chunks lazily (read-only store);
+              when False everything is loaded into memory and the store can be modified
+        **kwargs: Extra FAISS constructor arguments
+
+    Returns:
+        FAISS vector store
+    """
+    path = current_index_dir(path)
+    index_path = os.path.join(path, INDEX_FILE)
+    docstore = SQLiteDocstore(os.path.join(path, DOCSTORE_FILE))
+    lexical_index = _read_lexical_index(path, docstore)
+
+    if mmap:
+        index = _read_index_mmap(index_path)
+        return create_vector_store(embeddings, index, docstore, PositionalIdMap(docstore), MappedFAISS,
+                                   lexical_index=lexical_index, **kwargs)
+
+    index = faiss.read_index(index_path)
+    documents = ColumnarDocstore()
+    index_to_docstore_id = {}
+    rows = docstore._conn.execute("SELECT position, doc_id, text, metadata FROM chunks ORDER BY position")
+    for position, doc_id, text, metadata in rows:
+        documents.add({doc_id: Document(page_content=text, metadata=json.loads(metadata))})
+        index_to_docstore_id[position] = doc_id
+    return create_vector_store(embeddings, index, documents, index_to_docstore_id,
+                               lexical_index=lexical_index, **kwargs)
+
+
+def _read_lexical_index(path: str, docstore: SQLiteDocstore) -> LexicalIndex:
+    """Reads the saved lexical index, rebuilding it from the chunk texts for indexes saved without one."""
+    lexical_path = os.path.join(path, LEXICAL_FILE)
+    if os.path.exists(lexical_path):
+        return LexicalIndex.load(lexical_path)
+    logger.info(f"No lexical index in {path}; building one from the stored chunks")
+    return LexicalIndex.from_texts(docstore.iter_texts())
+
+
+def is_index_dir(path: str) -> bool:
+    """True if ``path`` holds an index written by write_index_dir."""
+    path = current_index_dir(path)
+    return os.path.exists(os.path.join(path, INDEX_FILE)) and os.path.exists(os.path.join(path, DOCSTORE_FILE))
@@ -0,0 +1,123 @@
+import time
+import uuid
+import queue
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field, asdict
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class JobQueueFull(Exception):
+    """Raised when too many indexing jobs are already waiting."""
+
+
+@dataclass
+class IndexingJob:
+    """State and progress of one background indexing job."""
+    job_id: str
+    session_id: str
+    status: str = "queued"  # queued, running, done or failed
+    pages_extracted: int = 0
+    chunks_embedded: int = 0
+    message: str = ""
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed")
+
+    # Progress callbacks; only the worker running the job calls them
+    def add_pages(self, count: int) -> None:
+        self.pages_extracted += count
+
+    def add_chunks(self, count: int) -> None:
+        self.chunks_embedded += count
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-serialisable status, without the owning session ID."""
+        data = asdict(self)
+        del data["session_id"]
+        return data
+
+
+class IndexingJobQueue:
+    """
+    Runs indexing jobs on a fixed pool of worker threads.
+
+    At most ``max_pending`` jobs wait in the queue; submitting more raises
+    JobQueueFull instead of letting the backlog grow without bound. Finished jobs
+    are kept (up to ``keep_finished`` of them) so clients can still read their
+    final status.
+    """
+
+    def __init__(self, workers: int = 2, max_pending: int = 16, keep_finished: int = 1000):
+        self.keep_finished = keep_finished
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_pending)
+        self._jobs: "OrderedDict[str, IndexingJob]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._workers = [threading.Thread(target=self._work, name=f"indexing-worker-{i}", daemon=True)
+                         for i in range(workers)]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, session_id: str, task: Callable[[IndexingJob], Optional[str]]) -> IndexingJob:
+        """
+        Queues ``task(job)`` to run on a worker.
+
+        The task reports progress through the job's callbacks; the string it returns
+        becomes the job's final message.
+
+        Raises:
+            JobQueueFull: If ``max_pending`` jobs are already waiting
+        """
+        job = IndexingJob(uuid.uuid4().hex, session_id)
+        with self._lock:
+            self._jobs[job.job_id] = job
+        try:
+            self._queue.put_nowait((job, task))
+        except queue.Full:
+            with self._lock:
+                del self._jobs[job.job_id]
+            raise JobQueueFull(f"{self._queue.maxsize} indexing jobs are already waiting; try again later") from None
+        self._trim()
+        return job
+
+    def get(self, job_id: str) -> Optional[IndexingJob]:
+        """Returns a job by ID, or None if it is unknown or has been forgotten."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    @property
+    def pending(self) -> int:
+        """Number of jobs waiting for a worker."""
+        return self._queue.qsize()
+
+    def _trim(self) -> None:
+        with self._lock:
+            finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+            for job_id in finished[:max(0, len(finished) - self.keep_finished)]:
+                del self._jobs[job_id]
+
+    def _work(self) -> None:
+        while True:
+            job, task = self._queue.get()
+            job.status = "running"
+            job.started_at = time.time()
+            try:
+                job.message = task(job) or ""
+                job.status = "done"
+            except Exception as e:
+                logger.exception(f"Indexing job {job.job_id} failed")
+                job.error = str(e)
+                job.status = "failed"
+            finally:
+                job.finished_at = time.time()
+                self._queue.task_done()
+            logger.info(f"Indexing job {job.job_id} {job.status} in {job.finished_at - job.started_at:.1f}s "
+                        f"({job.pages_extracted} pages, {job.chunks_embedded} chunks)")
@@ -0,0 +1,277 @@
+import re
+import sys
+import math
+from array import array
+from collections import Counter
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+import numpy as np
+
+# BM25 term-frequency saturation and document-length normalization (the usual defaults)
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Words, numbers and dotted/hyphenated names such as np.argmax, relu_backward or 3.14
+TOKEN_PATTERN = re.compile(r"\w+(?:[.\-]\w+)*")
+COMPOUND_SEPARATOR = re.compile(r"[._\-]+")
+# Too common to help ranking; leaving them out keeps the postings small
+STOPWORDS = frozenset((
+    "a", "about", "an", "and", "are", "as", "at", "be", "been", "but", "by", "can", "could", "define",
+    "describe", "do", "does", "explain", "for", "from", "has", "have", "how", "i", "if", "in", "into",
+    "is", "it", "its", "me", "of", "on", "or", "please", "so", "tell", "than", "that", "the", "their",
+    "then", "there", "these", "this", "to", "was", "we", "were", "what", "when", "where", "which",
+    "who", "why", "will", "with", "would", "you", "your",
+))
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lower-cased search terms of a text, without stopwords.
+
+    Compound names are kept whole and also split into their parts, so
+    ``relu_backward`` matches both a search for ``relu_backward`` and one for
+    ``relu``.
+    """
+    tokens = TOKEN_PATTERN.findall(text.lower())
+    terms = [token for token in tokens if token not in STOPWORDS]
+    for token in tokens:
+        if "_" in token or "." in token or "-" in token:
+            terms.extend(part for part in COMPOUND_SEPARATOR.split(token) if part and part not in STOPWORDS)
+    return terms
+
+
+class LexicalIndex:
+    """
+    In-memory inverted index over chunk texts, scored with BM25.
+
+    Each term maps to a postings list of (chunk number, term frequency) held in
+    two arrays; chunks are numbered in the order they were added and looked up by
+    their docstore ID. A search only touches the postings of the query's terms,
+    with the scoring done in numpy, so it needs no embedding call and answers in
+    well under a millisecond for typical course libraries.
+
+    The BM25 weights of a term's postings are computed on its first search and
+    kept until the index changes. Deleted chunks are skipped at search time and
+    dropped from the postings once they make up half the index.
+    """
+
+    def __init__(self):
+        self._doc_ids: List[str] = []
+        self._numbers: Dict[str, int] = {}  # Docstore ID -> chunk number
+        self._lengths = array("i")  # Number of terms per chunk
+        self._live = bytearray()  # 1 for chunks that have not been deleted
+        self._postings: Dict[str, Tuple[array, array]] = {}  # Term -> (chunk numbers, frequencies)
+        self._total_length = 0  # Terms in live chunks
+        self._deleted = 0
+        # Caches reset on every change: memory_usage(), per-chunk length normalization
+        # and the (live chunk numbers, BM25 term weights) of searched terms
+        self._size: Optional[int] = None
+        self._length_norm: Optional[np.ndarray] = None
+        self._term_weights: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+
+    def _changed(self) -> None:
+        self._size = None
+        self._length_norm = None
+        self._term_weights = {}
+
+    def add(self, ids: Iterable[str], texts: Iterable[str]) -> None:
+        """Indexes chunk texts under their docstore IDs; raises ValueError if an ID is already present."""
+        self._changed()
+        for doc_id, text in zip(ids, texts):
+            if doc_id in self._numbers:
+                raise ValueError(f"Tried to add an id that already exists: {doc_id}")
+            number = len(self._doc_ids)
+            counts = Counter(tokenize(text))
+            for term, frequency in counts.items():
+                postings = self._postings.get(term)
+                if postings is None:
+                    postings = self._postings[term] = (array("i"), array("H"))
+                postings[0].append(number)
+                postings[1].append(min(frequency, 0xFFFF))
+            length = sum(counts.values())
+            self._doc_ids.append(doc_id)
+            self._numbers[doc_id] = number
+            self._lengths.append(length)
+            self._live.append(1)
+            self._total_length += length
+
+    def delete(self, ids: Iterable[str]) -> None:
+        """Removes chunks by docstore ID; unknown IDs are ignored."""
+        self._changed()
+        for doc_id in ids:
+            number = self._numbers.pop(doc_id, None)
+            if number is not None:
+                self._live[number] = 0
+                self._total_length -= self._lengths[number]
+                self._deleted += 1
+        if self._deleted > len(self._doc_ids) // 2:
+            self._compact()
+
+    def _compact(self) -> None:
+        """Renumbers the live chunks and rewrites the postings without the deleted ones."""
+        live = np.array(self._live, dtype=bool)
+        renumbered = np.cumsum(live, dtype=np.int32) - 1
+        postings = {}
+        for term, (numbers, frequencies) in self._postings.items():
+            numbers = np.array(numbers, dtype=np.int32)
+            keep = live[numbers]
+            if keep.any():
+                postings[term] = (array("i", renumbered[numbers[keep]].tobytes()),
+                                  array("H", np.array(frequencies, dtype=np.uint16)[keep].tobytes()))
+        self._postings = postings
+        self._doc_ids = [doc_id for doc_id, alive in zip(self._doc_ids, self._live) if alive]
+        self._numbers = {doc_id: number for number, doc_id in enumerate(self._doc_ids)}
+        self._lengths = array("i", np.array(self._lengths, dtype=np.int32)[live].tobytes())
+        self._live = bytearray(b"\x01" * len(self._doc_ids))
+        self._deleted = 0
+
+    def search(self, query: str, k: int = 10, min_match: float = 0.0) -> List[Tuple[str, float]]:
+        """
+        Ranks chunks against a query with BM25.
+
+        Args:
+            query: The search query
+            k: Maximum number of chunks to return
+            min_match: Fraction of the query's term weight (summed IDF, counting terms
+                       that occur nowhere in the index) a chunk must contain to be returned
+
+        Returns:
+            (docstore ID, BM25 score) pairs, best first
+        """
+        terms = set(tokenize(query))
+        n_live = len(self)
+        if not terms or not n_live:
+            return []
+
+        scores = np.zeros(len(self._doc_ids), dtype=np.float32)
+        matched = np.zeros(len(self._doc_ids), dtype=np.float32)
+        query_weight = 0.0
+        for term in terms:
+            numbers, weights = self._weights(term)
+            idf = math.log(1 + (n_live - len(numbers) + 0.5) / (len(numbers) + 0.5))
+            query_weight += idf
+            if len(numbers):
+                # Chunk numbers are unique within a postings list, so fancy-index addition is exact
+                scores[numbers] += idf * weights
+                matched[numbers] += idf
+
+        candidates = np.flatnonzero((matched > 0) & (matched >= min_match * query_weight - 1e-6))
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [(self._doc_ids[number], float(scores[number])) for number in candidates]
+
+    def _weights(self, term: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Live chunk numbers containing ``term`` and the BM25 term-frequency weight of each."""
+        cached = self._term_weights.get(term)
+        if cached is not None:
+            return cached
+        postings = self._postings.get(term)
+        if postings is None:
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.float32)
+
+        if self._length_norm is None:
+            lengths = np.array(self._lengths, dtype=np.float32)
+            average = self._total_length / len(self) if len(self) else 1.0
+            self._length_norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths / (average or 1.0))
+        numbers = np.array(postings[0], dtype=np.intp)
+        frequencies = np.array(postings[1], dtype=np.float32)
+        if self._deleted:
+            keep = np.array(self._live, dtype=bool)[numbers]
+            numbers, frequencies = numbers[keep], frequencies[keep]
+        weights = frequencies * (BM25_K1 + 1) / (frequencies + self._length_norm[numbers])
+        self._term_weights[term] = numbers, weights
+        return numbers, weights
+
+    def copy(self) -> "LexicalIndex":
+        """Returns an independent copy of the index."""
+        clone = LexicalIndex()
+        clone._doc_ids = list(self._doc_ids)
+        clone._numbers = dict(self._numbers)
+        clone._lengths = array("i", self._lengths)
+        clone._live = bytearray(self._live)
+        clone._postings = {term: (array("i", numbers), array("H", frequencies))
+                           for term, (numbers, frequencies) in self._postings.items()}
+        clone._total_length = self._total_length
+        clone._deleted = self._deleted
+        clone._size = self._size
+        return clone
+
+    def memory_usage(self) -> int:
+        """Approximate bytes held by the index (postings, vocabulary and chunk IDs)."""
+        if self._size is not None:
+            return self._size
+        size = sys.getsizeof(self._postings) + sys.getsizeof(self._numbers) + len(self._live)
+        size += self._lengths.itemsize * len(self._lengths)
+        for term, (numbers, frequencies) in self._postings.items():
+            size += sys.getsizeof(term) + sys.getsizeof(numbers) + sys.getsizeof(frequencies)
+        self._size = size + sum(sys.getsizeof(doc_id) for doc_id in self._doc_ids)
+        return self._size
+
+    def save(self, path: str) -> None:
+        """Writes the live chunks' postings to ``path`` as numpy arrays (no pickling)."""
+        index = self
+        if self._deleted:
+            index = self.copy()
+            index._compact()
+        terms = list(index._postings)
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(index._postings[term][0]) for term in terms])
+        numbers = [np.array(index._postings[term][0], dtype=np.int32) for term in terms]
+        frequencies = [np.array(index._postings[term][1], dtype=np.uint16) for term in terms]
+        with open(path, "wb") as f:
+            np.savez(f,
+                     terms=_pack_strings(terms),
+                     doc_ids=_pack_strings(index._doc_ids),
+                     lengths=np.array(index._lengths, dtype=np.int32),
+                     offsets=offsets,
+                     numbers=np.concatenate(numbers) if numbers else np.empty(0, dtype=np.int32),
+                     frequencies=np.concatenate(frequencies) if frequencies else np.empty(0, dtype=np.uint16))
+
+    @classmethod
+    def load(cls, path: str) -> "LexicalIndex":
+        """Reads an index written by save()."""
+        with np.load(path, allow_pickle=False) as data:
+            index = cls()
+            index._doc_ids = _unpack_strings(data["doc_ids"])
+            index._numbers = {doc_id: number for number, doc_id in enumerate(index._doc_ids)}
+            index._lengths = array("i", data["lengths"].astype(np.int32).tobytes())
+            index._live = bytearray(b"\x01" * len(index._doc_ids))
+            index._total_length = int(data["lengths"].sum())
+            offsets, numbers, frequencies = data["offsets"], data["numbers"], data["frequencies"]
+            for i, term in enumerate(_unpack_strings(data["terms"])):
+                start, end = offsets[i], offsets[i + 1]
+                index._postings[term] = (array("i", numbers[start:end].tobytes()),
+                                         array("H", frequencies[start:end].tobytes()))
+        return index
+
+    @classmethod
+    def from_texts(cls, chunks: Iterable[Tuple[str, str]]) -> "LexicalIndex":
+        """Builds an index from (docstore ID, text) pairs, e.g. the chunks of a saved docstore."""
+        index = cls()
+        for doc_id, text in chunks:
+            index.add((doc_id,), (text,))
+        return index
+
+    def __len__(self) -> int:
+        return len(self._numbers)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._numbers
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._numbers)
+
+
+def _pack_strings(strings: List[str]) -> np.ndarray:
+    """Newline-joined UTF-8 bytes of ``strings`` (terms and IDs never contain newlines)."""
+    return np.frombuffer("\n".join(strings).encode("utf-8"), dtype=np.uint8)
+
+
+def _unpack_strings(packed: np.ndarray) -> List[str]:
+    text = packed.tobytes().decode("utf-8")
+    return text.split("\n") if text else []
+
+
+def lexical_index_of(vector_store: Any) -> Optional[LexicalIndex]:
+    """The lexical index kept alongside a vector store, or None (e.g. for indexes saved by older versions)."""
+    return getattr(vector_store, "lexical_index", None)
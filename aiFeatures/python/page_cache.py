@@ -0,0 +1,150 @@
+import os
+import json
+import time
+import hashlib
+import tempfile
+import threading
+import logging
+from dataclasses import dataclass, asdict
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Default on-disk location of the scraped-page cache (relative to the working directory)
+PAGE_CACHE_DIR = "data/cache/pages"
+
+
+@dataclass
+class CachedPage:
+    url: str
+    text: str
+    fetched_at: float
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """HTTP headers asking the server to reply 304 if the page is unchanged."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class PageCache:
+    """
+    On-disk cache of text extracted from scraped pages, one JSON file per URL.
+
+    Entries younger than ``ttl`` seconds are served without touching the network;
+    older ones are revalidated with the stored ETag/Last-Modified validators, so an
+    unchanged page costs a 304 instead of a download and re-parse. Files are named
+    by the SHA-256 of the URL and written to a temporary file first, then renamed
+    into place, so concurrent requests (or worker processes) never see a partial
+    entry. When the cache grows past ``max_bytes`` the least recently used files
+    are deleted.
+    """
+
+    def __init__(self, directory: str = PAGE_CACHE_DIR, ttl: float = 24 * 3600,
+                 max_bytes: int = 200 * 1024 * 1024):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._total_bytes: Optional[int] = None  # Measured lazily on the first write
+
+    def _path(self, url: str) -> str:
+        digest = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, digest[:2], f"{digest}.json")
+
+    def get(self, url: str) -> Optional[CachedPage]:
+        """Returns the cached entry for a URL (fresh or stale), or None."""
+        path = self._path(url)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                page = CachedPage(**json.load(f))
+        except (OSError, ValueError, TypeError):
+            return None
+        if page.url != url:
+            return None
+        try:
+            os.utime(path)  # The file's mtime records when it was last used, for eviction
+        except OSError:
+            pass
+        return page
+
+    def is_fresh(self, page: CachedPage) -> bool:
+        return time.time() - page.fetched_at <= self.ttl
+
+    def put(self, url: str, text: str, etag: Optional[str] = None,
+            last_modified: Optional[str] = None) -> CachedPage:
+        """Stores the extracted text of a page together with its HTTP validators."""
+        page = CachedPage(url=url, text=text, fetched_at=time.time(), etag=etag, last_modified=last_modified)
+        path = self._path(url)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        previous_size = os.path.getsize(path) if os.path.exists(path) else 0
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(asdict(page), f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = self._disk_usage()
+            else:
+                self._total_bytes += os.path.getsize(path) - previous_size
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+        return page
+
+    def refresh(self, url: str, page: CachedPage) -> CachedPage:
+        """Marks a stale entry as fresh again after the server confirmed it is unchanged."""
+        return self.put(url, page.text, page.etag, page.last_modified)
+
+    def _files(self):
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                if name.endswith(".json"):
+                    yield os.path.join(root, name)
+
+    def _disk_usage(self) -> int:
+        return sum(os.path.getsize(path) for path in self._files())
+
+    def _evict(self) -> None:
+        """Deletes least recently used entries until the cache is below 90% of its size bound."""
+        entries = []
+        for path in self._files():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in entries:
+            if total <= self.max_bytes * 0.9:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        self._total_bytes = total
+        logger.info(f"Evicted {removed} pages from the page cache ({total / 1e6:.1f} MB left)")
+
+    def clear(self) -> None:
+        """Removes every cached page."""
+        with self._lock:
+            for path in list(self._files()):
+                os.remove(path)
+            self._total_bytes = 0
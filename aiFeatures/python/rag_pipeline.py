@@ -1,41 +1,91 @@
 import os
+import asyncio
+import multiprocessing
 import faiss
+import numpy as np
+from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from langchain_community.vectorstores import FAISS
-from langchain_community.docstore.in_memory import InMemoryDocstore
-from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain_community.vectorstores.utils import maximal_marginal_relevance
+from langchain_core.documents import Document
 from langchain_ollama import OllamaEmbeddings
 from pypdf import PdfReader
-from typing import List, Dict, Tuple, Union, Optional
+from typing import BinaryIO, Callable, List, Dict, Iterable, Tuple, Union, Optional
 import logging
+from langchain_core.embeddings import Embeddings
+from .embedding_cache import CachedEmbeddings, EMBEDDING_CACHE_PATH, shared_embedding_cache
+from .embedding_pipeline import embed_and_index
+from .chunking import FileTable, check_chunk_params, chunk_pages
+from .columnar_docstore import ColumnarDocstore
+from .lexical_index import LexicalIndex, lexical_index_of
+from .faiss_indexes import optimize_index, search_params, create_vector_store
+from .index_store import write_index_dir, read_index_dir, is_index_dir
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-def extract_text_from_pdf(pdf_path: str) -> List[Tuple[str, Dict]]:
+# Chunks less similar to the query than this (cosine similarity) are not relevant
+MIN_SIMILARITY = float(os.getenv("RETRIEVAL_MIN_SIMILARITY", "0.5"))
+# MMR trade-off between relevance (1.0) and diversity (0.0) of the returned chunks
+MMR_LAMBDA = float(os.getenv("RETRIEVAL_MMR_LAMBDA", "0.7"))
+# Candidates fetched from the index per chunk returned, for thresholding and MMR
+FETCH_K_FACTOR = 4
+# Share of the query's term weight (IDF) a chunk must contain to be a lexical match
+LEXICAL_MIN_MATCH = float(os.getenv("RETRIEVAL_LEXICAL_MIN_MATCH", "0.5"))
+# Share a lexical match needs when no chunk passes MIN_SIMILARITY (or the query could not be
+# embedded), so keyword overlap alone does not make an off-topic question look answerable
+LEXICAL_ONLY_MIN_MATCH = float(os.getenv("RETRIEVAL_LEXICAL_ONLY_MIN_MATCH", "1.0"))
+# Seconds to wait for the query embedding before answering from the lexical index alone
+EMBED_TIMEOUT = float(os.getenv("RETRIEVAL_EMBED_TIMEOUT", "5"))
+# Reciprocal-rank fusion constant; larger values flatten the advantage of the top ranks
+RRF_K = 60
+
+# Embeds queries so a slow embedding service can be timed out
+query_embedding_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="query-embed")
+
+@dataclass
+class RetrievalHit:
+    """A retrieved chunk with its cosine similarity and/or BM25 score for the query."""
+    doc_id: str
+    content: str
+    metadata: Dict
+    similarity: Optional[float] = None  # None if only the lexical index matched it
+    bm25: Optional[float] = None  # None if only the vector search found it
+
+def extract_text_from_pdf(pdf_path: str, page_range: Optional[Tuple[int, int]] = None,
+                          stream: Optional[BinaryIO] = None) -> List[Tuple[str, Dict]]:
     """
     Extracts text from a given PDF file with metadata.
     
     Args:
         pdf_path: Path to the PDF file
+        page_range: Optional (start, stop) page indices to extract; defaults to all pages
+        stream: Binary stream with the PDF's contents (e.g. an upload held in memory);
+                ``pdf_path`` is then only recorded in the metadata
         
     Returns:
         List of tuples containing (text, metadata)
     """
-    logger.info(f"Extracting text from {os.path.basename(pdf_path)}")
+    if page_range:
+        logger.info(f"Extracting text from {os.path.basename(pdf_path)} pages {page_range[0] + 1}-{page_range[1]}")
+    else:
+        logger.info(f"Extracting text from {os.path.basename(pdf_path)}")
     
     try:
-        reader = PdfReader(pdf_path)
+        reader = PdfReader(stream if stream is not None else pdf_path)
+        total_pages = len(reader.pages)
+        start, stop = page_range if page_range else (0, total_pages)
         texts_with_metadata = []
         
-        for page_idx, page in enumerate(reader.pages):
-            text = page.extract_text()
+        for page_idx in range(start, min(stop, total_pages)):
+            text = reader.pages[page_idx].extract_text()
             if text and text.strip():  # Check if text is not empty or just whitespace
                 metadata = {
                     "file_name": os.path.basename(pdf_path),
                     "file_path": pdf_path,
                     "page_index": page_idx,
-                    "total_pages": len(reader.pages)
+                    "total_pages": total_pages
                 }
                 texts_with_metadata.append((text, metadata))
         
@@ -46,59 +96,155 @@ def extract_text_from_pdf(pdf_path: str) -> List[Tuple[str, Dict]]:
         logger.error(f"Error extracting text from {pdf_path}: {str(e)}")
         return []
 
-def index_pdfs(pdf_inputs: Union[str, List[str]], chunk_size: int = 1000, chunk_overlap: int = 200, 
-               model: str = "mxbai-embed-large:latest") -> Optional[FAISS]:
+def _count_pages(pdf_path: str) -> int:
+    """Returns the number of pages in a PDF, or 0 if it cannot be read."""
+    try:
+        return len(PdfReader(pdf_path).pages)
+    except Exception as e:
+        logger.error(f"Error reading {pdf_path}: {str(e)}")
+        return 0
+
+def _extract_task(task: Tuple[str, Optional[Tuple[int, int]]]) -> List[Tuple[str, Dict]]:
+    """Process pool entry point for a single (pdf_path, page_range) extraction task."""
+    pdf_path, page_range = task
+    return extract_text_from_pdf(pdf_path, page_range)
+
+def _collect_results(results: Iterable[List[Tuple[str, Dict]]],
+                     on_pages: Optional[Callable[[int], None]]) -> List[Tuple[str, Dict]]:
+    """Concatenates extraction task results, reporting the pages of each as it arrives."""
+    texts_with_metadata = []
+    for result in results:
+        texts_with_metadata.extend(result)
+        if on_pages:
+            on_pages(len(result))
+    return texts_with_metadata
+
+def extract_texts_parallel(pdf_paths: List[str], processes: Optional[int] = None,
+                           pages_per_task: int = 50,
+                           on_pages: Optional[Callable[[int], None]] = None) -> List[Tuple[str, Dict]]:
     """
-    Unified function to index PDFs from various input types (single PDF, list of PDFs, or folder)
+    Extracts text from several PDFs using a process pool.
+    
+    Each file becomes one task, and files with more than ``pages_per_task`` pages are
+    split into page ranges so a single huge textbook is also spread across cores.
+    Results are returned in input order (file order, then page order), exactly as if
+    extract_text_from_pdf had been called on each file in turn.
+    
+    Args:
+        pdf_paths: Paths of the PDF files to extract
+        processes: Number of worker processes (defaults to the CPU count, 1 disables the pool)
+        pages_per_task: Maximum number of pages handled by a single task
+        on_pages: Called with the number of pages with text each time a task finishes
+        
+    Returns:
+        List of tuples containing (text, metadata)
+    """
+    processes = processes or os.cpu_count() or 1
+    if processes == 1:
+        # Without a pool there is nothing to split, so skip opening every file twice
+        return _collect_results((_extract_task((pdf_path, None)) for pdf_path in pdf_paths), on_pages)
+    
+    tasks = []
+    for pdf_path in pdf_paths:
+        total_pages = _count_pages(pdf_path)
+        if total_pages > pages_per_task:
+            tasks.extend((pdf_path, (start, min(start + pages_per_task, total_pages)))
+                         for start in range(0, total_pages, pages_per_task))
+        elif total_pages:
+            tasks.append((pdf_path, None))
+    
+    # Not worth starting worker processes for a single task
+    if len(tasks) <= 1:
+        return _collect_results(map(_extract_task, tasks), on_pages)
+    
+    logger.info(f"Extracting {len(pdf_paths)} PDFs as {len(tasks)} tasks across {processes} processes")
+    # Workers are spawned rather than forked: the pool is started from indexing threads of a
+    # multithreaded server, and a forked child could inherit a lock another thread held
+    with ProcessPoolExecutor(max_workers=min(processes, len(tasks)),
+                             mp_context=multiprocessing.get_context("spawn")) as executor:
+        # executor.map yields results in task order, keeping the output deterministic
+        return _collect_results(executor.map(_extract_task, tasks), on_pages)
+
+def collect_pdf_files(pdf_inputs: Union[str, List[str]]) -> List[str]:
+    """
+    Resolves a single PDF path, a list of PDF paths, or a folder path into a list of PDF files.
     
     Args:
         pdf_inputs: Can be a single PDF path, a list of PDF paths, or a folder path
-        chunk_size: Size of text chunks for splitting
-        chunk_overlap: Overlap between chunks
-        model: Embedding model to use
         
     Returns:
-        FAISS vector store or None if indexing failed
+        List of PDF file paths (empty if the input was invalid)
     """
-    all_texts_with_metadata = []
+    pdf_files = []
     
     # Process different input types
     if isinstance(pdf_inputs, str):
         if os.path.isdir(pdf_inputs):
             # It's a folder path
             logger.info(f"Indexing all PDFs in folder: {pdf_inputs}")
-            pdf_files = [os.path.join(pdf_inputs, f) for f in os.listdir(pdf_inputs) 
+            pdf_files = [os.path.join(pdf_inputs, f) for f in sorted(os.listdir(pdf_inputs)) 
                          if f.lower().endswith(".pdf")]
             
             if not pdf_files:
                 logger.warning(f"No PDF files found in folder: {pdf_inputs}")
-                return None
-                
-            for pdf in pdf_files:
-                all_texts_with_metadata.extend(extract_text_from_pdf(pdf))
+                return []
         
         elif os.path.isfile(pdf_inputs) and pdf_inputs.lower().endswith(".pdf"):
             # It's a single PDF file
             logger.info(f"Indexing single PDF: {pdf_inputs}")
-            all_texts_with_metadata = extract_text_from_pdf(pdf_inputs)
+            pdf_files = [pdf_inputs]
         
         else:
             logger.error(f"Invalid input: {pdf_inputs} is not a PDF file or folder")
-            return None
+            return []
     
     elif isinstance(pdf_inputs, list):
         # It's a list of PDF paths
         logger.info(f"Indexing {len(pdf_inputs)} PDF files")
         for pdf in pdf_inputs:
             if os.path.isfile(pdf) and pdf.lower().endswith(".pdf"):
-                all_texts_with_metadata.extend(extract_text_from_pdf(pdf))
+                pdf_files.append(pdf)
             else:
                 logger.warning(f"Skipping invalid file: {pdf}")
     
     else:
         logger.error("Invalid input type. Expected a string path or list of paths")
+        return []
+    
+    return pdf_files
+
+def index_pdfs(pdf_inputs: Union[str, List[str]], chunk_size: int = 1000, chunk_overlap: int = 200, 
+               model: str = "mxbai-embed-large:latest",
+               cache_path: Optional[str] = EMBEDDING_CACHE_PATH,
+               batch_size: int = 64, max_workers: int = 4,
+               embeddings: Optional[Embeddings] = None,
+               processes: Optional[int] = None,
+               index_type: str = "auto") -> Optional[FAISS]:
+    """
+    Unified function to index PDFs from various input types (single PDF, list of PDFs, or folder)
+    
+    Args:
+        pdf_inputs: Can be a single PDF path, a list of PDF paths, or a folder path
+        chunk_size: Size of text chunks for splitting
+        chunk_overlap: Overlap between chunks
+        model: Embedding model to use
+        cache_path: Path of the on-disk embedding cache, or None to disable caching
+        batch_size: Number of chunks per embedding request
+        max_workers: Number of embedding requests in flight at once
+        embeddings: Embedding model instance to use instead of Ollama (e.g. StubEmbeddings)
+        processes: Number of processes used for PDF text extraction (defaults to the CPU count)
+        index_type: FAISS index type ("auto", "flat", "ivf_flat", "ivf_pq" or "hnsw")
+        
+    Returns:
+        FAISS vector store or None if indexing failed
+    """
+    pdf_files = collect_pdf_files(pdf_inputs)
+    if not pdf_files:
         return None
     
+    # Extract text from all PDFs, spreading the work across processes
+    all_texts_with_metadata = extract_texts_parallel(pdf_files, processes)
+    
     # Check if we have any texts to index
     if not all_texts_with_metadata:
         logger.warning("No text content extracted from any PDFs")
@@ -106,104 +252,367 @@ def index_pdfs(pdf_inputs: Union[str, List[str]], chunk_size: int = 1000, chunk_
     
     # Create the index
     logger.info(f"Creating FAISS index with {len(all_texts_with_metadata)} text segments")
-    return create_faiss_index(all_texts_with_metadata, chunk_size, chunk_overlap, model)
+    return create_faiss_index(all_texts_with_metadata, chunk_size, chunk_overlap, model, cache_path,
+                              batch_size, max_workers, embeddings, index_type)
+
+def create_embeddings(model: str = "mxbai-embed-large:latest",
+                      cache_path: Optional[str] = EMBEDDING_CACHE_PATH) -> Embeddings:
+    """
+    Creates the Ollama embedding model, wrapped in the on-disk embedding cache.
+    
+    Args:
+        model: Embedding model to use
+        cache_path: Path of the on-disk embedding cache, or None to disable caching
+        
+    Returns:
+        Embeddings instance
+    """
+    embeddings = OllamaEmbeddings(model=model)
+    if cache_path:
+        # Serve previously embedded chunks from the on-disk cache (one connection per path)
+        embeddings = CachedEmbeddings(embeddings, model, shared_embedding_cache(cache_path))
+    return embeddings
+
+def create_empty_faiss_index(model: str = "mxbai-embed-large:latest",
+                             cache_path: Optional[str] = EMBEDDING_CACHE_PATH,
+                             embeddings: Optional[Embeddings] = None) -> FAISS:
+    """
+    Creates an empty FAISS vector store ready for chunks to be added.
+    
+    Args:
+        model: Embedding model to use
+        cache_path: Path of the on-disk embedding cache, or None to disable caching
+        embeddings: Embedding model instance to use instead of Ollama (e.g. StubEmbeddings)
+        
+    Returns:
+        Empty FAISS vector store
+    """
+    # Initialize embedding model
+    try:
+        if embeddings is None:
+            embeddings = create_embeddings(model, cache_path)
+        # Test the embedding function
+        embedding_dim = len(embeddings.embed_query("test"))
+        logger.info(f"Using embedding model {model} with dimension {embedding_dim}")
+    except Exception as e:
+        logger.error(f"Error initializing embedding model: {str(e)}")
+        raise
+    
+    # Inner product over normalized vectors, so search scores are cosine similarities
+    index = faiss.IndexFlatIP(embedding_dim)
+    return create_vector_store(embeddings, index, ColumnarDocstore(), {}, lexical_index=LexicalIndex())
+
+def add_texts_to_index(vector_store: FAISS,
+                       texts_with_metadata: List[Tuple[str, Dict]],
+                       chunk_size: int = 1000,
+                       chunk_overlap: int = 200,
+                       batch_size: int = 64,
+                       max_workers: int = 4,
+                       on_chunks: Optional[Callable[[int], None]] = None) -> List[str]:
+    """
+    Splits extracted text into chunks and appends them to an existing FAISS vector store.
+    
+    Each document is chunked as a whole, so chunks can span page breaks (see
+    chunking.chunk_pages). Chunks are produced lazily and embedded in concurrent
+    batches that are appended to the index as they complete (see
+    embedding_pipeline.embed_and_index).
+    
+    Args:
+        vector_store: FAISS vector store to add to
+        texts_with_metadata: List of tuples containing (text, metadata)
+        chunk_size: Size of text chunks for splitting
+        chunk_overlap: Overlap between chunks
+        batch_size: Number of chunks per embedding request
+        max_workers: Number of embedding requests in flight at once
+        on_chunks: Called with the number of chunks in each batch added to the index
+        
+    Returns:
+        Docstore IDs of the added chunks
+    """
+    check_chunk_params(chunk_size, chunk_overlap)
+    # Chunks of a file share its interned name and path strings
+    file_table = FileTable()
+    
+    # Lazily split documents into chunks with metadata
+    def iter_chunks():
+        for chunk in chunk_pages(texts_with_metadata, chunk_size, chunk_overlap, file_table):
+            yield chunk.text, file_table.metadata(chunk)
+    
+    # Embed chunks in batches and add them to the vector store
+    return embed_and_index(vector_store, iter_chunks(), batch_size, max_workers, on_chunks)
 
 def create_faiss_index(texts_with_metadata: List[Tuple[str, Dict]], 
                       chunk_size: int = 1000, 
                       chunk_overlap: int = 200,
-                      model: str = "mxbai-embed-large:latest") -> FAISS:
+                      model: str = "mxbai-embed-large:latest",
+                      cache_path: Optional[str] = EMBEDDING_CACHE_PATH,
+                      batch_size: int = 64,
+                      max_workers: int = 4,
+                      embeddings: Optional[Embeddings] = None,
+                      index_type: str = "auto") -> FAISS:
     """
     Creates a FAISS index from extracted text using embeddings and stores metadata.
     
+    Vectors are first collected in a flat index; when the corpus is large enough (or an
+    approximate index type is requested) it is then trained into an IVF/HNSW index.
+    
     Args:
         texts_with_metadata: List of tuples containing (text, metadata)
         chunk_size: Size of text chunks for splitting
         chunk_overlap: Overlap between chunks
         model: Embedding model to use
+        cache_path: Path of the on-disk embedding cache, or None to disable caching
+        batch_size: Number of chunks per embedding request
+        max_workers: Number of embedding requests in flight at once
+        embeddings: Embedding model instance to use instead of Ollama (e.g. StubEmbeddings)
+        index_type: FAISS index type ("auto", "flat", "ivf_flat", "ivf_pq" or "hnsw")
         
     Returns:
         FAISS vector store
     """
-    # Initialize text splitter
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=chunk_size, 
-        chunk_overlap=chunk_overlap
-    )
+    vector_store = create_empty_faiss_index(model, cache_path, embeddings)
+    chunk_ids = add_texts_to_index(vector_store, texts_with_metadata, chunk_size, chunk_overlap,
+                                   batch_size, max_workers)
+    index_type = optimize_index(vector_store, index_type)
+    logger.info(f"Successfully indexed {len(chunk_ids)} text chunks ({index_type} index)")
     
-    # Process text chunks with metadata
-    documents = []
-    metadata_list = []
-    
-    for text, metadata in texts_with_metadata:
-        chunks = text_splitter.split_text(text)
-        documents.extend(chunks)
-        metadata_list.extend([metadata] * len(chunks))
-    
-    logger.info(f"Created {len(documents)} text chunks after splitting")
+    return vector_store
+
+def embed_query_with_timeout(query: str, vector_store: FAISS,
+                             timeout: Optional[float] = None) -> Optional[List[float]]:
+    """
+    Embeds a query for vector search, giving up after ``timeout`` seconds (defaults to EMBED_TIMEOUT).
     
-    # Initialize embedding model
+    Returns:
+        The query embedding, or None if the embedding service failed or was too slow
+    """
+    timeout = EMBED_TIMEOUT if timeout is None else timeout
+    future = query_embedding_pool.submit(vector_store.embedding_function.embed_query, query)
     try:
-        embeddings = OllamaEmbeddings(model=model)
-        # Test the embedding function
-        embedding_dim = len(embeddings.embed_query("test"))
-        logger.info(f"Using embedding model {model} with dimension {embedding_dim}")
+        return future.result(timeout=timeout)
+    except FutureTimeoutError:
+        logger.warning(f"Query embedding took longer than {timeout}s; searching the lexical index only")
     except Exception as e:
-        logger.error(f"Error initializing embedding model: {str(e)}")
-        raise
+        logger.warning(f"Query embedding failed ({str(e)}); searching the lexical index only")
+    return None
+
+async def aembed_query_with_timeout(query: str, vector_store: FAISS,
+                                    timeout: Optional[float] = None) -> Optional[List[float]]:
+    """Async variant of embed_query_with_timeout."""
+    timeout = EMBED_TIMEOUT if timeout is None else timeout
+    try:
+        return await asyncio.wait_for(vector_store.embedding_function.aembed_query(query), timeout)
+    except asyncio.TimeoutError:
+        logger.warning(f"Query embedding took longer than {timeout}s; searching the lexical index only")
+    except Exception as e:
+        logger.warning(f"Query embedding failed ({str(e)}); searching the lexical index only")
+    return None
+
+def _stored_vectors(index: faiss.Index, positions: List[int]) -> Optional[np.ndarray]:
+    """Unit-length copies of the indexed vectors at ``positions``, or None if they cannot be read back."""
+    try:
+        vectors = np.vstack([index.reconstruct(position) for position in positions]).astype(np.float32)
+    except RuntimeError:
+        return None  # e.g. an IVF index saved without its direct map
+    faiss.normalize_L2(vectors)
+    return vectors
+
+def _vector_search(vector_store: FAISS, embedding: List[float], k: int, min_similarity: float,
+                   mmr_lambda: float, fetch_k: int,
+                   params: Optional[faiss.SearchParameters] = None) -> List[Tuple[str, float]]:
+    """
+    Relevant (docstore ID, cosine similarity) pairs from the vector index: the ``k``
+    picked by MMR first, then the remaining relevant candidates by similarity.
+    """
+    index = vector_store.index
+    query_vector = np.array([embedding], dtype=np.float32)
+    faiss.normalize_L2(query_vector)
     
-    # Create FAISS index
-    index = faiss.IndexFlatL2(embedding_dim)
-    vector_store = FAISS(
-        embedding_function=embeddings,
-        index=index,
-        docstore=InMemoryDocstore(),
-        index_to_docstore_id={},
-    )
+    scores, found = index.search(query_vector, min(fetch_k, index.ntotal), params=params)
+    positions = [int(position) for position in found[0] if position != -1]
+    if not positions:
+        return []
+    vectors = _stored_vectors(index, positions)
+    if index.metric_type == faiss.METRIC_INNER_PRODUCT:
+        similarities = scores[0][:len(positions)]
+    elif vectors is not None:
+        # Index built before cosine scoring (L2 over unnormalized vectors)
+        similarities = vectors @ query_vector[0]
+    else:
+        # Squared L2 distance between unit vectors is 2 - 2 * cosine
+        similarities = 1 - scores[0][:len(positions)] / 2
     
-    # Add documents to vector store
-    vector_store.add_texts(documents, metadatas=metadata_list)
-    logger.info(f"Successfully indexed {len(documents)} text chunks")
+    relevant = [i for i, similarity in enumerate(similarities) if similarity >= min_similarity]
+    if mmr_lambda < 1 and vectors is not None and len(relevant) > k:
+        picked = maximal_marginal_relevance(query_vector[0], [vectors[i] for i in relevant],
+                                            lambda_mult=mmr_lambda, k=k)
+        selected = [relevant[i] for i in picked]
+        relevant = selected + sorted(set(relevant) - set(selected))
+    return [(vector_store.index_to_docstore_id[positions[i]], float(similarities[i])) for i in relevant]
+
+def reciprocal_rank_fusion(rankings: List[List[str]], rrf_k: int = RRF_K) -> List[str]:
+    """
+    Merges rankings of docstore IDs by reciprocal-rank fusion.
     
-    return vector_store
+    Each ID scores the sum of 1 / (rrf_k + rank) over the rankings it appears in,
+    so a chunk both searches rank highly comes first, and no score calibration
+    between the two searches is needed. Ties keep first-seen order.
+    """
+    fused: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (rrf_k + rank)
+    return sorted(fused, key=fused.get, reverse=True)
 
-def retrieve_answer(query: str, vector_store: FAISS, k: int = 3) -> str:
+def retrieve_hits(query: str, vector_store: FAISS, k: int = 3,
+                  min_similarity: Optional[float] = None, mmr_lambda: Optional[float] = None,
+                  fetch_k: Optional[int] = None,
+                  nprobe: Optional[int] = None, ef_search: Optional[int] = None,
+                  embedding: Optional[List[float]] = None,
+                  min_match: Optional[float] = None, dense: bool = True) -> List[RetrievalHit]:
     """
-    Retrieves the most relevant documents based on the query, with metadata.
+    Retrieves the chunks relevant to a query with hybrid lexical and vector search.
+    
+    The store's lexical index (see lexical_index.LexicalIndex) ranks chunks
+    containing at least ``min_match`` of the query's terms (weighted by IDF) with
+    BM25; it answers in well under a millisecond and catches exact terms such as
+    function names or formula labels. The vector search reads ``fetch_k``
+    candidates, drops those below ``min_similarity`` and orders the rest with
+    maximal marginal relevance so near-duplicate chunks (e.g. the overlap between
+    neighbours) do not crowd out other passages. Both rankings are merged with
+    reciprocal-rank fusion.
+    
+    Lexical matches on their own are held to a stricter rule: when no chunk
+    passes ``min_similarity``, only chunks containing at least
+    LEXICAL_ONLY_MIN_MATCH of the query's term weight (by default all of its
+    terms) are returned, so a question the course material does not cover is
+    not treated as relevant because it shares a few keywords with it.
+    
+    The lexical search runs first. If the query cannot be embedded within
+    EMBED_TIMEOUT (embedding service slow or down), its results are returned on
+    their own, under the same stricter rule. Stores saved without a lexical
+    index use vector search only.
     
     Args:
         query: The search query
         vector_store: FAISS vector store to search in
-        k: Number of results to return
+        k: Maximum number of hits to return
+        min_similarity: Relevance threshold (defaults to MIN_SIMILARITY)
+        mmr_lambda: Relevance/diversity trade-off, 1.0 disables MMR (defaults to MMR_LAMBDA)
+        fetch_k: Number of candidates to consider from each search (defaults to k * FETCH_K_FACTOR)
+        nprobe: Number of IVF lists to visit (IVF indexes only; higher is slower but more accurate)
+        ef_search: HNSW search breadth (HNSW indexes only; higher is slower but more accurate)
+        embedding: Precomputed query embedding, to avoid embedding the query again
+        min_match: Share of the query's term weight a lexical match needs (defaults to LEXICAL_MIN_MATCH)
+        dense: False skips the vector search (e.g. when the embedding service is known to be down)
         
     Returns:
-        Formatted string with search results
+        Hits in order of fused rank; empty if nothing is relevant
     """
+    min_similarity = MIN_SIMILARITY if min_similarity is None else min_similarity
+    mmr_lambda = MMR_LAMBDA if mmr_lambda is None else mmr_lambda
+    min_match = LEXICAL_MIN_MATCH if min_match is None else min_match
+    fetch_k = fetch_k or k * FETCH_K_FACTOR
+    index = vector_store.index
+    if index.ntotal == 0:
+        return []
+    
     logger.info(f"Searching for: '{query}'")
-    docs = vector_store.similarity_search_with_score(query, k=k)
+    lexical_index = lexical_index_of(vector_store)
+    lexical = lexical_index.search(query, fetch_k, min_match) if lexical_index is not None else []
     
-    if not docs:
-        return "No relevant information found."
+    vector = []
+    if dense and embedding is None:
+        embedding = embed_query_with_timeout(query, vector_store)
+    if dense and embedding is not None:
+        vector = _vector_search(vector_store, embedding, k, min_similarity, mmr_lambda, fetch_k,
+                                search_params(index, nprobe, ef_search))
+    if lexical and not vector and min_match < LEXICAL_ONLY_MIN_MATCH:
+        lexical = lexical_index.search(query, fetch_k, LEXICAL_ONLY_MIN_MATCH)
     
+    similarities = dict(vector)
+    bm25_scores = dict(lexical)
+    hits = []
+    for doc_id in reciprocal_rank_fusion([[doc_id for doc_id, _ in vector], [doc_id for doc_id, _ in lexical]]):
+        if len(hits) == k:
+            break
+        doc = vector_store.docstore.search(doc_id)
+        if isinstance(doc, Document):
+            hits.append(RetrievalHit(doc_id, doc.page_content, doc.metadata,
+                                     similarities.get(doc_id), bm25_scores.get(doc_id)))
+    logger.info(f"{len(hits)} hits from {len(vector)} relevant vector and {len(lexical)} lexical candidates")
+    return hits
+
+def format_hits(hits: List[RetrievalHit]) -> str:
+    """Formats retrieval hits as the context block given to the LLM ("" if there are none)."""
     results = []
-    for i, (doc, score) in enumerate(docs):
-        metadata = doc.metadata
+    for i, hit in enumerate(hits):
+        metadata = hit.metadata
+        first_page = metadata['page_index'] + 1
+        last_page = metadata.get('page_end', metadata['page_index']) + 1
+        pages = f"Page: {first_page}" if first_page == last_page else f"Pages: {first_page}-{last_page}"
+        scores = []
+        if hit.similarity is not None:
+            scores.append(f"Similarity: {hit.similarity:.4f}")
+        if hit.bm25 is not None:
+            scores.append(f"BM25: {hit.bm25:.2f}")
         results.append(
-            f"Result {i+1} (Similarity: {1 - score:.4f}):\n"
-            f"File: {metadata['file_name']}, Page: {metadata['page_index'] + 1}/{metadata['total_pages']}\n"
-            f"Content: {doc.page_content.strip()}\n"
+            f"Result {i+1} ({', '.join(scores)}):\n"
+            f"File: {metadata['file_name']}, {pages}/{metadata['total_pages']}\n"
+            f"Content: {hit.content.strip()}\n"
         )
-    
     return "\n".join(results)
 
-def save_index(vector_store: FAISS, path: str) -> None:
-    """Save the FAISS index to disk"""
-    vector_store.save_local(path)
+def retrieve_answer(query: str, vector_store: FAISS, k: int = 3, **kwargs) -> str:
+    """
+    Retrieves the relevant documents for a query, with metadata.
+    
+    Args:
+        query: The search query
+        vector_store: FAISS vector store to search in
+        k: Maximum number of results to return
+        **kwargs: Threshold, MMR, lexical matching and index search options (see retrieve_hits)
+        
+    Returns:
+        Formatted string with search results, or "" if nothing is relevant
+    """
+    return format_hits(retrieve_hits(query, vector_store, k, **kwargs))
+
+def save_index(vector_store: FAISS, path: str, extra_files: Optional[Dict[str, str]] = None) -> None:
+    """
+    Save the FAISS index to disk.
+    
+    Vectors are written as a raw FAISS index and chunk text/metadata to a SQLite
+    docstore, so the index can later be memory-mapped by load_index; the lexical
+    index is saved next to them. Each save is published atomically as a new
+    version of the directory (see index_store.write_index_dir), together with
+    any ``extra_files``.
+    """
+    write_index_dir(vector_store, path, extra_files)
     logger.info(f"Index saved to {path}")
 
-def load_index(path: str, model: str = "mxbai-embed-large:latest") -> FAISS:
-    """Load a FAISS index from disk"""
-    embeddings = OllamaEmbeddings(model=model)
-    vector_store = FAISS.load_local(path, embeddings)
+def load_index(path: str, model: str = "mxbai-embed-large:latest", mmap: bool = True,
+               embeddings: Optional[Embeddings] = None) -> FAISS:
+    """
+    Load a FAISS index from disk.
+    
+    Args:
+        path: Directory the index was saved to
+        model: Embedding model used for queries
+        mmap: Memory-map the vectors and read chunks lazily. Mapped stores are read-only
+              and share pages between processes; pass False to load a modifiable copy.
+        embeddings: Embedding model instance to use instead of an uncached Ollama model
+        
+    Returns:
+        FAISS vector store
+    """
+    if embeddings is None:
+        embeddings = OllamaEmbeddings(model=model)
+    if is_index_dir(path):
+        vector_store = read_index_dir(path, embeddings, mmap=mmap)
+    else:
+        # Index saved with FAISS.save_local by an older version
+        vector_store = FAISS.load_local(path, embeddings, allow_dangerous_deserialization=True)
     logger.info(f"Index loaded from {path}")
     return vector_store
 
@@ -223,7 +632,9 @@ def main():
                 break
                 
             answer = retrieve_answer(query, vector_store)
-            print("\nRelevant information:\n", answer)
+            print("\nRelevant information:\n", answer or "No relevant information found.")
 
+# This module uses package-relative imports; run the example from the repository root with
+#     python -m aiFeatures.python.rag_pipeline
 if __name__ == "__main__":
     main()
\ No newline at end of file
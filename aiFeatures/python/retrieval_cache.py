@@ -0,0 +1,135 @@
+import logging
+import threading
+import numpy as np
+from typing import Any, Optional, Tuple
+from langchain_community.vectorstores import FAISS
+from .caching import TTLCache, normalize_query
+from .faiss_indexes import store_version
+from .rag_pipeline import retrieve_answer, embed_query_with_timeout, aembed_query_with_timeout
+
+logger = logging.getLogger(__name__)
+
+
+class RetrievalCache:
+    """
+    Cache in front of retrieve_answer.
+
+    The exact tier is an LRU/TTL cache keyed on the normalized query text. The
+    optional semantic tier keeps the embeddings of recently answered queries and
+    reuses a cached result when a new query's embedding has cosine similarity of at
+    least ``semantic_threshold`` with one of them, so rephrasings of the same
+    question skip the FAISS search.
+
+    Both tiers are tied to one version of one vector store (see
+    faiss_indexes.store_version): results are dropped automatically when a
+    different store, or one IncrementalIndexManager has modified since, is
+    queried. Callers that modify a store in place by other means should call
+    invalidate().
+    """
+
+    def __init__(self, max_entries: int = 512, ttl: Optional[float] = 3600,
+                 semantic_threshold: Optional[float] = 0.95):
+        self.semantic_threshold = semantic_threshold
+        self._results = TTLCache(max_entries, ttl)
+        self._lock = threading.Lock()
+        self._store_version: Optional[int] = None
+        # Semantic tier: unit-norm query embeddings and the exact-tier keys they map to
+        self._embeddings = np.empty((0, 0), dtype=np.float32)
+        self._embedding_keys: list = []
+        self.semantic_hits = 0
+
+    def invalidate(self) -> None:
+        """Drops every cached result."""
+        with self._lock:
+            self._results.clear()
+            self._embeddings = np.empty((0, 0), dtype=np.float32)
+            self._embedding_keys = []
+            self._store_version = None
+
+    def _check_store(self, vector_store: FAISS) -> None:
+        version = store_version(vector_store)
+        if version != self._store_version:
+            if self._store_version is not None:
+                logger.info("Vector store changed; invalidating retrieval cache")
+            self.invalidate()
+            self._store_version = version
+
+    def _semantic_lookup(self, embedding: np.ndarray, params: Tuple) -> Optional[Any]:
+        with self._lock:
+            if not len(self._embedding_keys):
+                return None
+            similarities = self._embeddings @ embedding
+            # Only reuse results retrieved with the same k and search parameters
+            for i, cached_key in enumerate(self._embedding_keys):
+                if cached_key[1:] != params:
+                    similarities[i] = -np.inf
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.semantic_threshold:
+                return None
+            key = self._embedding_keys[best]
+        return self._results.get(key)
+
+    def _remember_embedding(self, key: Tuple, embedding: np.ndarray) -> None:
+        with self._lock:
+            if self._embeddings.size == 0:
+                self._embeddings = embedding[None, :]
+            else:
+                self._embeddings = np.vstack([self._embeddings, embedding[None, :]])
+            self._embedding_keys.append(key)
+            # Forget embeddings whose results have been evicted from the exact tier
+            if len(self._embedding_keys) > self._results.max_entries:
+                live = [i for i, k in enumerate(self._embedding_keys) if k in self._results]
+                self._embeddings = self._embeddings[live]
+                self._embedding_keys = [self._embedding_keys[i] for i in live]
+
+    def _lookup_exact(self, query: str, vector_store: FAISS, k: int, search_kwargs: dict) -> Tuple[Tuple, Optional[str]]:
+        self._check_store(vector_store)
+        key = (normalize_query(query), k, tuple(sorted(search_kwargs.items())))
+        result = self._results.get(key)
+        if result is not None:
+            logger.info(f"Retrieval cache hit for '{query}'")
+        return key, result
+
+    def _retrieve_with_embedding(self, query: str, vector_store: FAISS, k: int, search_kwargs: dict,
+                                 key: Tuple, embedding: Optional[list]) -> str:
+        if embedding is None:
+            # Embedding service down or slow: answer from the lexical index, but do not
+            # cache the result, which lacks the vector hits
+            return retrieve_answer(query, vector_store, k, dense=False, **search_kwargs)
+
+        unit = np.asarray(embedding, dtype=np.float32)
+        unit /= np.linalg.norm(unit) or 1.0
+
+        if self.semantic_threshold is not None:
+            result = self._semantic_lookup(unit, key[1:])
+            if result is not None:
+                self.semantic_hits += 1
+                logger.info(f"Retrieval cache semantic hit for '{query}'")
+                self._results.set(key, result)
+                return result
+
+        result = retrieve_answer(query, vector_store, k, embedding=embedding, **search_kwargs)
+        self._results.set(key, result)
+        if self.semantic_threshold is not None:
+            self._remember_embedding(key, unit)
+        return result
+
+    def retrieve(self, query: str, vector_store: FAISS, k: int = 3, **search_kwargs: Any) -> str:
+        """
+        Cached equivalent of retrieve_answer(query, vector_store, k, **search_kwargs).
+
+        If the query cannot be embedded in time, the lexical-only answer is returned uncached.
+        """
+        key, result = self._lookup_exact(query, vector_store, k, search_kwargs)
+        if result is not None:
+            return result
+        embedding = embed_query_with_timeout(query, vector_store)
+        return self._retrieve_with_embedding(query, vector_store, k, search_kwargs, key, embedding)
+
+    async def aretrieve(self, query: str, vector_store: FAISS, k: int = 3, **search_kwargs: Any) -> str:
+        """Async variant of retrieve(); the query embedding request is awaited."""
+        key, result = self._lookup_exact(query, vector_store, k, search_kwargs)
+        if result is not None:
+            return result
+        embedding = await aembed_query_with_timeout(query, vector_store)
+        return self._retrieve_with_embedding(query, vector_store, k, search_kwargs, key, embedding)
@@ -0,0 +1,146 @@
+import os
+import time
+import random
+import sqlite3
+import threading
+import logging
+from abc import ABC, abstractmethod
+from typing import List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Messages are stored as compact (role, content, timestamp) tuples
+MessageRecord = Tuple[str, str, float]
+
+
+class SessionBackend(ABC):
+    """
+    Storage for chat histories behind ChatSessionManager.
+
+    Histories are append-only: every turn is written with append(), so saving a
+    message costs one small write regardless of how long the conversation is.
+    Backends with ``shared = True`` can be written by several worker processes,
+    and ChatSessionManager reloads a session's history from them on every access.
+    """
+
+    shared = False
+
+    @abstractmethod
+    def load(self, session_id: str, limit: int) -> List[MessageRecord]:
+        """Returns the most recent ``limit`` messages of a session, oldest first."""
+
+    @abstractmethod
+    def append(self, session_id: str, record: MessageRecord) -> None:
+        """Appends one message to a session's history."""
+
+    @abstractmethod
+    def delete(self, session_id: str) -> None:
+        """Deletes a session's history."""
+
+    def release(self, session_id: str) -> None:
+        """Called when a worker evicts the session from memory."""
+
+
+class InMemorySessionBackend(SessionBackend):
+    """
+    Per-process backend that stores nothing of its own.
+
+    The live ChatSession already holds the history, and it is dropped together
+    with the session on eviction, so a second copy here would only be memory
+    that ChatSessionManager's size limit does not see. New sessions start empty.
+    """
+
+    def load(self, session_id: str, limit: int) -> List[MessageRecord]:
+        return []
+
+    def append(self, session_id: str, record: MessageRecord) -> None:
+        pass
+
+    def delete(self, session_id: str) -> None:
+        pass
+
+
+class SQLiteSessionBackend(SessionBackend):
+    """
+    Backend shared by all workers on one machine through a SQLite file in WAL mode.
+
+    Each message is one row, so a turn is a single INSERT. Sessions are trimmed to
+    their last ``max_messages`` rows about once every ``max_messages`` appends, and
+    sessions with no messages for ``idle_ttl`` seconds are purged periodically.
+    """
+
+    shared = True
+    PURGE_EVERY = 1000  # appends between purges of idle sessions
+
+    def __init__(self, path: str, max_messages: int = 200, idle_ttl: float = 7 * 24 * 3600):
+        self.path = path
+        self.max_messages = max_messages
+        self.idle_ttl = idle_ttl
+        self._appends = 0
+        self._local = threading.local()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        conn = self._conn
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("CREATE TABLE IF NOT EXISTS messages ("
+                     " id INTEGER PRIMARY KEY AUTOINCREMENT, session_id TEXT NOT NULL,"
+                     " role TEXT NOT NULL, content TEXT NOT NULL, timestamp REAL NOT NULL)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_messages_session ON messages (session_id, id)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_messages_timestamp ON messages (timestamp)")
+        conn.commit()
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        # One connection per thread; WAL lets readers proceed while another worker writes
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def load(self, session_id: str, limit: int) -> List[MessageRecord]:
+        rows = self._conn.execute(
+            "SELECT role, content, timestamp FROM messages WHERE session_id = ? ORDER BY id DESC LIMIT ?",
+            (session_id, limit),
+        ).fetchall()
+        rows.reverse()
+        return rows
+
+    def append(self, session_id: str, record: MessageRecord) -> None:
+        conn = self._conn
+        conn.execute("INSERT INTO messages (session_id, role, content, timestamp) VALUES (?, ?, ?, ?)",
+                     (session_id, *record))
+        self._appends += 1
+        # Trimming reads max_messages index entries; doing it with probability
+        # 1/max_messages keeps every session bounded at O(1) amortized cost per append
+        if random.random() < 1 / self.max_messages:
+            self._trim(session_id)
+        if self._appends % self.PURGE_EVERY == 0:
+            self.purge_idle()
+        conn.commit()
+
+    def _trim(self, session_id: str) -> None:
+        """Deletes all but the newest ``max_messages`` rows of a session."""
+        self._conn.execute(
+            "DELETE FROM messages WHERE session_id = ? AND id <= "
+            "(SELECT id FROM messages WHERE session_id = ? ORDER BY id DESC LIMIT 1 OFFSET ?)",
+            (session_id, session_id, self.max_messages),
+        )
+
+    def purge_idle(self) -> int:
+        """Deletes every session whose newest message is older than ``idle_ttl``."""
+        cursor = self._conn.execute(
+            "DELETE FROM messages WHERE session_id IN "
+            "(SELECT session_id FROM messages GROUP BY session_id HAVING MAX(timestamp) < ?)",
+            (time.time() - self.idle_ttl,),
+        )
+        self._conn.commit()
+        if cursor.rowcount:
+            logger.info(f"Purged {cursor.rowcount} messages from idle sessions")
+        return cursor.rowcount
+
+    def delete(self, session_id: str) -> None:
+        self._conn.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+        self._conn.commit()
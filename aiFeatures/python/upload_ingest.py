@@ -0,0 +1,213 @@
+import io
+import os
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple
+from werkzeug.sansio.multipart import MultipartDecoder, Data, Epilogue, Field, File, NeedData
+from .index_manager import ExtractedFile
+from .rag_pipeline import extract_text_from_pdf
+
+logger = logging.getLogger(__name__)
+
+READ_CHUNK_SIZE = 64 * 1024
+# Largest single PDF accepted in an upload
+MAX_FILE_BYTES = int(os.getenv("MAX_UPLOAD_MB", 50)) * 1024 * 1024
+# Largest plain (non-file) form field
+MAX_FIELD_BYTES = 64 * 1024
+# Total size of uploaded PDFs held in memory by requests being received and indexing jobs not yet finished
+MAX_PENDING_UPLOAD_BYTES = int(os.getenv("MAX_PENDING_UPLOAD_MB", 400)) * 1024 * 1024
+
+# Extracts uploaded PDFs while the rest of the request body is still arriving
+extraction_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="upload-extract")
+
+
+class UploadTooLarge(Exception):
+    """Raised when an uploaded file or form field exceeds its size limit."""
+
+
+class UploadBudgetExceeded(Exception):
+    """Raised when accepting an upload would exceed the memory budget for pending uploads."""
+
+
+class UploadBudget:
+    """
+    Limits the bytes of uploaded PDFs held in memory across all requests.
+
+    Uploads stay in memory from the moment they arrive until the indexing job that
+    uses them finishes, so without a shared limit a full job queue of maximum-size
+    requests could hold gigabytes. Each request takes a reservation, which grows as
+    file data is received and fails as soon as the budget is used up; the bytes
+    are returned when the reservation is released.
+    """
+
+    def __init__(self, max_bytes: int = MAX_PENDING_UPLOAD_BYTES):
+        self.max_bytes = max_bytes
+        self._used = 0
+        self._lock = threading.Lock()
+
+    @property
+    def used(self) -> int:
+        """Bytes currently reserved."""
+        return self._used
+
+    def reserve(self) -> "UploadReservation":
+        """Starts an empty reservation for one request's uploads."""
+        return UploadReservation(self)
+
+    def _acquire(self, size: int) -> bool:
+        with self._lock:
+            if self._used + size > self.max_bytes:
+                return False
+            self._used += size
+            return True
+
+    def _release(self, size: int) -> None:
+        with self._lock:
+            self._used -= size
+
+
+class UploadReservation:
+    """Bytes of an UploadBudget held by one request; release() may be called more than once."""
+
+    def __init__(self, budget: UploadBudget):
+        self.budget = budget
+        self.size = 0
+
+    def add(self, size: int) -> None:
+        """
+        Reserves ``size`` more bytes.
+
+        Raises:
+            UploadBudgetExceeded: If the budget has less than ``size`` bytes left
+        """
+        if not self.budget._acquire(size):
+            raise UploadBudgetExceeded("The server is busy indexing other uploads; try again later")
+        self.size += size
+
+    def release(self) -> None:
+        """Returns every byte reserved so far to the budget."""
+        size, self.size = self.size, 0
+        if size:
+            self.budget._release(size)
+
+
+# Shared by every upload request of the process
+upload_budget = UploadBudget()
+
+
+@dataclass
+class UploadPart:
+    """One part of a multipart/form-data body; ``filename`` is None for plain fields."""
+    name: str
+    filename: Optional[str]
+    data: bytes = field(repr=False)
+
+
+def iter_multipart(stream: BinaryIO, boundary: bytes, max_file_bytes: int = MAX_FILE_BYTES,
+                   max_field_bytes: int = MAX_FIELD_BYTES,
+                   on_file_data: Optional[Callable[[int], None]] = None) -> Iterator[UploadPart]:
+    """
+    Parses a multipart/form-data body incrementally from a stream.
+
+    Each part is yielded as soon as its last byte has been read, so callers can
+    start on the first file while later ones are still being received. Nothing is
+    written to disk.
+
+    Args:
+        stream: Request body stream
+        boundary: Multipart boundary from the Content-Type header
+        max_file_bytes: Size limit of each file part
+        max_field_bytes: Size limit of each plain field
+        on_file_data: Called with the size of each piece of file data before it is buffered;
+                      an exception it raises stops the parse
+
+    Raises:
+        UploadTooLarge: As soon as a part exceeds its limit (the rest is not buffered)
+        ValueError: If the body is malformed or ends early
+    """
+    decoder = MultipartDecoder(boundary)
+    part = None
+    buffer = bytearray()
+    while True:
+        event = decoder.next_event()
+        if isinstance(event, NeedData):
+            if decoder.complete:
+                raise ValueError("Unexpected end of multipart body")
+            decoder.receive_data(stream.read(READ_CHUNK_SIZE) or None)
+        elif isinstance(event, (Field, File)):
+            part = event
+            buffer = bytearray()
+        elif isinstance(event, Data):
+            if on_file_data is not None and isinstance(part, File):
+                on_file_data(len(event.data))
+            buffer += event.data
+            limit = max_file_bytes if isinstance(part, File) else max_field_bytes
+            if len(buffer) > limit:
+                name = part.filename if isinstance(part, File) else part.name
+                raise UploadTooLarge(f"'{name}' exceeds the upload limit of {limit} bytes")
+            if not event.more_data:
+                yield UploadPart(part.name, getattr(part, "filename", None), bytes(buffer))
+                buffer = bytearray()
+        elif isinstance(event, Epilogue):
+            return
+
+
+def _extract_upload(data: bytes, file_name: str) -> List[Tuple[str, Dict]]:
+    return extract_text_from_pdf(file_name, stream=io.BytesIO(data))
+
+
+def ingest_pdf_uploads(stream: BinaryIO, boundary: bytes, file_field: str = "files",
+                       known_digests: Optional[Dict[str, str]] = None,
+                       max_file_bytes: int = MAX_FILE_BYTES,
+                       reservation: Optional[UploadReservation] = None) -> Tuple[Dict[str, str], List[ExtractedFile]]:
+    """
+    Reads PDF uploads from a multipart body straight into memory and extracts them.
+
+    Every PDF in ``file_field`` is hashed as soon as it has been received and, unless
+    its digest matches ``known_digests`` (already indexed, unchanged), handed to
+    extraction_pool right away. Extraction of the first files therefore overlaps
+    with receiving the rest of the request.
+
+    With a ``reservation``, file data is counted against its UploadBudget as it
+    arrives. The caller releases the reservation once the uploads are no longer
+    needed (their indexing job has finished, or was never queued).
+
+    Args:
+        stream: Request body stream
+        boundary: Multipart boundary from the Content-Type header
+        file_field: Form field holding the PDF files
+        known_digests: sha256 of already indexed files, by file name
+        max_file_bytes: Size limit of each uploaded file
+        reservation: Share of the upload budget to count the received files against
+
+    Returns:
+        (plain form fields, uploaded PDFs in upload order)
+
+    Raises:
+        UploadBudgetExceeded: If the files do not fit in the reservation's budget
+    """
+    known_digests = known_digests or {}
+    fields: Dict[str, str] = {}
+    uploads: List[ExtractedFile] = []
+
+    on_file_data = reservation.add if reservation is not None else None
+    for part in iter_multipart(stream, boundary, max_file_bytes, on_file_data=on_file_data):
+        if part.filename is None:
+            fields[part.name] = part.data.decode("utf-8", errors="replace")
+            continue
+        if part.name != file_field or not part.filename.endswith(".pdf"):
+            continue
+
+        digest = hashlib.sha256(part.data).hexdigest()
+        if known_digests.get(part.filename) == digest:
+            # Unchanged re-upload: the index manager skips it without extracting
+            texts = lambda data=part.data, name=part.filename: _extract_upload(data, name)
+        else:
+            texts = extraction_pool.submit(_extract_upload, part.data, part.filename).result
+        uploads.append(ExtractedFile(part.filename, len(part.data), digest, texts))
+        logger.info(f"Received {part.filename} ({len(part.data) / 1024:.0f} KB)")
+
+    return fields, uploads
@@ -1,92 +1,128 @@
+import os
+import logging
 from langchain.tools import Tool
-import requests
-from bs4 import BeautifulSoup
+from . import http_client
+from .html_extract import ExtractionRule, extract_text
+from .page_cache import PageCache, PAGE_CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+# Extracted page text is cached per URL and revalidated with ETag/Last-Modified.
+# Replace with set_page_cache() (None disables caching).
+page_cache = PageCache(os.getenv("PAGE_CACHE_DIR", PAGE_CACHE_DIR))
+
+def set_page_cache(cache):
+    """Replace the scraped-page cache (a PageCache, or None to disable caching)."""
+    global page_cache
+    page_cache = cache
+
+# Where each supported site keeps its main content, matched against the URL in order
+SITE_RULES = [
+    ("w3schools.com", ExtractionRule("div", "main", ("p", "li"))),
+    ("tutorialspoint.com", ExtractionRule("div", "mainContent")),
+    ("freecodecamp.org", ExtractionRule("article")),
+    ("programiz.com", ExtractionRule("article")),
+    ("wikipedia.org", ExtractionRule("div", "bodyContent", limit=10)),
+]
+
+def site_rule(url):
+    """Returns the extraction rule for a URL, or None for unsupported sites."""
+    for site, rule in SITE_RULES:
+        if site in url:
+            return rule
+    return None
+
+def parse_page(html, rule):
+    """Extracts the main content of a page as newline-separated text."""
+    texts = extract_text(html, rule)
+    if texts is None:
+        return "Content not found."
+    return "\n".join(texts)
+
+def fetch_page(url, headers=None):
+    """Downloads a page with the shared pooled HTTP client."""
+    return http_client.get(url, headers=headers)
+
+def _cached_page(url):
+    """Returns the cache entry for a URL (or None) and its text if the entry is still fresh."""
+    cache = page_cache
+    cached = cache.get(url) if cache is not None else None
+    if cached is not None and cache.is_fresh(cached):
+        cache.hits += 1
+        return cached, cached.text
+    return cached, None
+
+def _page_text(url, rule, cached, response):
+    """Turns a (possibly 304) response into page text, updating the cache."""
+    cache = page_cache
+    if cached is not None and response.status_code == 304:
+        cache.hits += 1
+        cache.refresh(url, cached)
+        logger.info(f"Page cache revalidated {url}")
+        return cached.text
+
+    text = parse_page(response.text, rule)
+    if cache is not None:
+        cache.misses += 1
+        if response.ok and text != "Content not found.":
+            cache.put(url, text, response.headers.get("ETag"), response.headers.get("Last-Modified"))
+    return text
+
+def scrape_page(url, rule):
+    """
+    Returns the main content of a page extracted with ``rule``, using the page cache.
+
+    Fresh cache entries are returned directly. Stale ones are revalidated with a
+    conditional request, and only re-downloaded and re-parsed if the server says the
+    page changed.
+    """
+    cached, text = _cached_page(url)
+    if text is not None:
+        return text
+    response = fetch_page(url, cached.conditional_headers() if cached is not None else None)
+    return _page_text(url, rule, cached, response)
+
+async def ascrape_page(url, rule, client):
+    """Async counterpart of scrape_page, downloading with an http_client.AsyncHTTPClient."""
+    cached, text = _cached_page(url)
+    if text is not None:
+        return text
+    response = await client.get(url, headers=cached.conditional_headers() if cached is not None else None)
+    return _page_text(url, rule, cached, response)
 
 def scrape_w3schools(url):
     """Scrapes main content from W3Schools"""
-    response = requests.get(url)
-    soup = BeautifulSoup(response.text, "html.parser")
-    
-    main_content = soup.find("div", id="main")
-    if not main_content:
-        return "Content not found."
-
-    text = []
-    for tag in main_content.find_all(["p"]):
-        text.append(tag.get_text(strip=True))
-
-    for tag in main_content.find_all("li"):
-        text.append(tag.get_text(strip=True))
-    
-    return "\n".join(text)
+    return scrape_page(url, site_rule("w3schools.com"))
 
 def scrape_tutorialspoint(url):
     """Scrapes main content from TutorialsPoint."""
-    response = requests.get(url)
-    soup = BeautifulSoup(response.text, "html.parser")
-
-    main_content = soup.find("div", id="mainContent")
-    if not main_content:
-        return "Content not found."
-
-    # Extract text from all <p> tags
-    text = [p.get_text(strip=True) for p in main_content.find_all("p")]
-    
-    return "\n".join(text)
+    return scrape_page(url, site_rule("tutorialspoint.com"))
 
 def scrape_freecodecamp(url):
     """Scrapes main content from FreeCodeCamp"""
-    response = requests.get(url)
-    soup = BeautifulSoup(response.text, "html.parser")
-
-    article = soup.find("article")
-    if not article:
-        return "Content not found."
-
-    text = [p.get_text(strip=True) for p in article.find_all("p")]
-    return "\n".join(text)
+    return scrape_page(url, site_rule("freecodecamp.org"))
 
 def scrape_programiz(url):
     """Scrapes main content from Programiz"""
-    response = requests.get(url)
-    soup = BeautifulSoup(response.text, "html.parser")
-
-    article = soup.find("article")
-    if not article:
-        return "Content not found."
-
-    text = [p.get_text(strip=True) for p in article.find_all("p")]
-    return "\n".join(text)
+    return scrape_page(url, site_rule("programiz.com"))
 
 def scrape_wikipedia(url):
     """Scrapes main content from Wikipedia"""
-    response = requests.get(url)
-    soup = BeautifulSoup(response.text, "html.parser")
-
-    content_div = soup.find("div", id="bodyContent")
-    if not content_div:
-        return "Content not found."
-
-    text = []
-    for p in content_div.find_all("p", limit=10):  
-        text.append(p.get_text(strip=True))
-
-    return "\n".join(text)
+    return scrape_page(url, site_rule("wikipedia.org"))
 
 def scrape_url(url):
     """Chooses the appropriate scraper based on URL"""
-    if "w3schools.com" in url:
-        return scrape_w3schools(url)
-    elif "tutorialspoint.com" in url:
-        return scrape_tutorialspoint(url)
-    elif "freecodecamp.org" in url:
-        return scrape_freecodecamp(url)
-    elif "programiz.com" in url:
-        return scrape_programiz(url)
-    elif "wikipedia.org" in url:
-        return scrape_wikipedia(url)
-    else:
+    rule = site_rule(url)
+    if rule is None:
+        return "Unsupported site."
+    return scrape_page(url, rule)
+
+async def ascrape_url(url, client):
+    """Async counterpart of scrape_url."""
+    rule = site_rule(url)
+    if rule is None:
         return "Unsupported site."
+    return await ascrape_page(url, rule, client)
 
 # Wrap the function in a LangChain Tool
 web_scraper_tool = Tool(
@@ -1,16 +1,21 @@
 import os
 import sys
+import asyncio
 import webbrowser
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
 from difflib import SequenceMatcher
-from serpapi import GoogleSearch
 from dotenv import load_dotenv
 
 # Add aiFeatures/python to sys.path for module imports
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "aiFeatures/python")))
-from .web_scraper_tool import scrape_url
+from . import http_client
+from .web_scraper_tool import scrape_url, ascrape_url
+from .caching import SQLiteCache, SingleFlight, normalize_query
 
 load_dotenv()
 serp_api_key=os.getenv("SERP_API_KEY")
+SERPAPI_URL = "https://serpapi.com/search.json"
+SERPAPI_TIMEOUT = (5, 30)  # SerpAPI can take several seconds to run a fresh search
 
 # List of allowed websites
 ALLOWED_SITES = [
@@ -22,29 +27,73 @@ ALLOWED_SITES = [
     "programiz.com"
 ]
 
+# Fan-out: scrape the top FANOUT_LINKS allowed results concurrently and stop
+# waiting once MIN_SCRAPED_CHARS of content is in or SCRAPE_DEADLINE has passed
+FANOUT_LINKS = int(os.getenv("WEB_FANOUT", 3))
+MIN_SCRAPED_CHARS = 4000
+SCRAPE_DEADLINE = 15  # Seconds
+
+# Search results are cached on disk per normalized query, and concurrent
+# identical searches share one SerpAPI request
+SEARCH_CACHE_PATH = os.getenv("SEARCH_CACHE_PATH", "data/cache/search.sqlite")
+SEARCH_CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", 24 * 3600))
+search_cache = SQLiteCache(SEARCH_CACHE_PATH, max_entries=20_000, ttl=SEARCH_CACHE_TTL)
+search_flight = SingleFlight()
+
+# Replies from scrape_url that carry no page content
+NO_CONTENT = ("Content not found.", "Unsupported site.")
+
+# Shared by all requests so the number of concurrent page fetches stays bounded
+scrape_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="scrape")
+
 def similar(a, b):
     """Return a similarity ratio between two strings."""
     return SequenceMatcher(None, a.lower(), b.lower()).ratio()
 
-def search_best_link(query, api_key):
+def google_search(query, api_key):
+    """
+    Return the organic Google results for a query restricted to allowed websites.
+
+    Results are served from the search cache when the normalized query was seen
+    within SEARCH_CACHE_TTL. Otherwise one SerpAPI request is made, shared by every
+    thread asking for the same query at the same time.
+    """
+    key = f"{normalize_query(query)}|{' '.join(ALLOWED_SITES)}"
+    organic_results = search_cache.get(key)
+    if organic_results is not None:
+        print("Search cache hit for:", query)
+        return organic_results
+
+    def lookup():
+        # Another thread may have stored the results since the check above
+        cached = search_cache.get(key)
+        if cached is not None:
+            return cached
+        # Construct a site filter string using Google operator "site:"
+        site_filter = " OR ".join([f"site:{site}" for site in ALLOWED_SITES])
+        params = {
+            "engine": "google",
+            "q": f"{query} {site_filter}",
+            "num": 20,  # Fetch more results to have a larger pool
+            "api_key": api_key
+        }
+        # Called directly rather than through the serpapi package so the request
+        # goes over the shared pooled HTTP client with its retries and timeouts
+        results = http_client.get_json(SERPAPI_URL, params=params, timeout=SERPAPI_TIMEOUT)
+        organic_results = results.get("organic_results", [])
+        if "error" not in results:  # Don't cache failed or rate-limited searches
+            search_cache.set(key, organic_results)
+        return organic_results
+
+    return search_flight.do(key, lookup)
+
+def search_allowed_results(query, api_key, limit=3):
     """
     Use SerpAPI to search Google with a query restricted to allowed websites.
-    From the organic results, take the first three allowed results (in order)
-    and select the one with the highest title similarity to the query.
+    From the organic results, take the first ``limit`` allowed results (in order)
+    and return them sorted by title similarity to the query, best first.
     """
-    # Construct a site filter string using Google operator "site:"
-    site_filter = " OR ".join([f"site:{site}" for site in ALLOWED_SITES])
-    params = {
-        "engine": "google",
-        "q": f"{query} {site_filter}",
-        "num": 20,  # Fetch more results to have a larger pool
-        "api_key": api_key
-    }
-    search = GoogleSearch(params)
-    results = search.get_dict()
-    organic_results = results.get("organic_results", [])
-    if not organic_results:
-        return None
+    organic_results = google_search(query, api_key)
 
     # Filter results to only those from allowed sites (in their given order)
     allowed_results = []
@@ -52,53 +101,139 @@ def search_best_link(query, api_key):
         link = result.get("link", "")
         if any(site in link for site in ALLOWED_SITES):
             allowed_results.append(result)
-        if len(allowed_results) >= 3:
+        if len(allowed_results) >= limit:
             break
 
+    # Rank by title similarity; the sort is stable, so ties keep Google's order
+    return sorted(allowed_results, key=lambda result: similar(query, result.get("title", "")), reverse=True)
+
+def search_best_link(query, api_key):
+    """
+    Use SerpAPI to search Google with a query restricted to allowed websites.
+    From the organic results, take the first three allowed results (in order)
+    and select the one with the highest title similarity to the query.
+    """
+    allowed_results = search_allowed_results(query, api_key, limit=3)
     if not allowed_results:
         return None
+    return allowed_results[0].get("link")
 
-    # Compare the first three allowed results using title similarity
-    best_link = None
-    best_score = 0
-    for result in allowed_results:
-        link = result.get("link", "")
-        title = result.get("title", "")
-        score = similar(query, title)
-        if score > best_score:
-            best_score = score
-            best_link = link
+def scrape_links(links, min_chars=MIN_SCRAPED_CHARS, deadline=SCRAPE_DEADLINE):
+    """
+    Scrape several links concurrently and combine their content in link order.
+
+    Stops waiting as soon as ``min_chars`` of content has been gathered or the
+    deadline passes. Pages that have not started downloading are cancelled; pages
+    already in flight finish within the request timeout and are discarded.
+    """
+    futures = {scrape_pool.submit(scrape_url, link): i for i, link in enumerate(links)}
+    contents = {}
+    gathered = 0
+    try:
+        for future in as_completed(futures, timeout=deadline):
+            link = links[futures[future]]
+            try:
+                content = future.result()
+            except Exception as e:
+                print(f"Failed to scrape {link}: {e}")
+                continue
+            if content and content not in NO_CONTENT:
+                contents[futures[future]] = content
+                gathered += len(content)
+                if gathered >= min_chars:
+                    break
+    except FuturesTimeoutError:
+        print(f"Scraping deadline of {deadline}s reached; using {len(contents)} of {len(links)} pages")
+    finally:
+        for future in futures:
+            future.cancel()
+
+    return "\n\n".join(f"Source: {links[i]}\n{contents[i]}" for i in sorted(contents))
 
-    return best_link
+def web_response(query, fan_out=FANOUT_LINKS):
+    """
+    Search the allowed sites for a query and scrape the results.
 
-def web_response(query):
+    With ``fan_out`` > 1 the top ``fan_out`` results are scraped concurrently
+    (see scrape_links); otherwise only the best matching page is scraped.
+    """
     api_key = serp_api_key
     query = query.strip()
     
-    best_link = search_best_link(query, api_key)
-    if best_link:
-        print("Best link found:", best_link)
-        webbrowser.open(best_link)
-        
-        # Scrape the content from the best link
-        content = scrape_url(best_link)
-        
-        # Ensure the output folder exists
-        output_folder = "data/scrapings"
-        os.makedirs(output_folder, exist_ok=True)
-
-        # Save the scraped content to a file
-        output_file = os.path.join(output_folder, "scraped_content.txt")
-        with open(output_file, "w", encoding="utf-8") as f:
-            f.write(content)
-        print(f"Scraped content has been stored in '{output_file}'")
-                # Read and print the contents of the scraped file
-        with open(output_file, "r", encoding="utf-8") as f:
-            scraped_contents = f.read()
+    allowed_results = search_allowed_results(query, api_key, limit=max(fan_out, 3))
+    if not allowed_results:
+        print("No suitable link found for your query.")
+        return ""
 
+    best_link = allowed_results[0].get("link")
+    print("Best link found:", best_link)
+    webbrowser.open(best_link)
+    
+    # Scrape the content from the best link, or from the top links in parallel
+    if fan_out > 1:
+        content = scrape_links([result.get("link") for result in allowed_results[:fan_out]])
     else:
+        content = scrape_url(best_link)
+    
+    return content
+
+async def ascrape_links(links, client, min_chars=MIN_SCRAPED_CHARS, deadline=SCRAPE_DEADLINE):
+    """
+    Async counterpart of scrape_links. Downloads still in flight when enough content
+    has been gathered (or the deadline passes) are cancelled outright.
+    """
+    tasks = {asyncio.ensure_future(ascrape_url(link, client)): i for i, link in enumerate(links)}
+    pending = set(tasks)
+    contents = {}
+    gathered = 0
+    loop = asyncio.get_running_loop()
+    stop_at = loop.time() + deadline
+    try:
+        while pending and gathered < min_chars:
+            done, pending = await asyncio.wait(pending, timeout=max(stop_at - loop.time(), 0),
+                                               return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                print(f"Scraping deadline of {deadline}s reached; using {len(contents)} of {len(links)} pages")
+                break
+            for task in done:
+                link = links[tasks[task]]
+                try:
+                    content = task.result()
+                except Exception as e:
+                    print(f"Failed to scrape {link}: {e}")
+                    continue
+                if content and content not in NO_CONTENT:
+                    contents[tasks[task]] = content
+                    gathered += len(content)
+    finally:
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    return "\n\n".join(f"Source: {links[i]}\n{contents[i]}" for i in sorted(contents))
+
+async def aweb_response(query, fan_out=FANOUT_LINKS, open_browser=True):
+    """
+    Async counterpart of web_response. The (cached) search runs in a worker thread;
+    pages are downloaded on the event loop with an AsyncHTTPClient.
+
+    ``open_browser=False`` skips opening the best link, for searches started
+    speculatively whose result may never be shown.
+    """
+    query = query.strip()
+    allowed_results = await asyncio.to_thread(search_allowed_results, query, serp_api_key, max(fan_out, 3))
+    if not allowed_results:
         print("No suitable link found for your query.")
-    return scraped_contents
+        return ""
+
+    best_link = allowed_results[0].get("link")
+    print("Best link found:", best_link)
+    if open_browser:
+        webbrowser.open(best_link)
+
+    links = [result.get("link") for result in allowed_results[:max(fan_out, 1)]]
+    async with http_client.AsyncHTTPClient() as client:
+        return await ascrape_links(links, client)
 
 def main():
     query = input("Enter your search query: ")
@@ -107,5 +242,7 @@ def main():
     print(scraped_text)
     print("\n--- Scraped Content End ---\n")
     # You can add more processing or analysis of the scraped_text here    
+# This module uses package-relative imports; run the example from the repository root with
+#     python -m aiFeatures.python.web_scraping
 if __name__ == "__main__":
     main()
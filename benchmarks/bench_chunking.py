@@ -0,0 +1,125 @@
+"""
+Benchmark for chunking extracted PDF text: RecursiveCharacterTextSplitter run page
+by page (the previous add_texts_to_index) versus the whole-document chunker in
+chunking.chunk_pages.
+
+The input is a set of synthetic textbooks shaped like pypdf output: wrapped lines,
+paragraph breaks and paragraphs running across page breaks. Reported per engine:
+time, throughput, number of chunks, chunks spanning pages, peak memory allocated
+while chunking, and the bytes of metadata each chunk carries once stored (the
+docstore keeps a copy of the metadata dict per chunk; the chunker's chunks hold a
+file ID and a page range, with the file details interned in a FileTable).
+
+Usage (from the repository root):
+    python benchmarks/bench_chunking.py --books 3 --pages 1500
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tracemalloc
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(ROOT)
+
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from aiFeatures.python.chunking import FileTable, chunk_pages
+
+WORDS = ("gradient descent tensor layer activation softmax convolution kernel stride padding "
+         "backpropagation loss function optimizer momentum regularization dropout batch "
+         "normalization embedding attention transformer encoder decoder sequence token "
+         "the of and to in is a that for with as by on are this be").split()
+
+
+def make_textbook(book, pages, rng):
+    """(text, metadata) pages of one synthetic textbook, like extract_text_from_pdf returns."""
+    file_name = f"textbook-{book}.pdf"
+    words = iter(lambda: rng.choice(WORDS), None)
+    result = []
+    for page_index in range(pages):
+        lines = []
+        while sum(len(line) + 1 for line in lines) < 3000:
+            line = []
+            while sum(len(word) + 1 for word in line) < 80:
+                line.append(next(words))
+            lines.append(" ".join(line))
+            if rng.random() < 0.12:
+                lines.append("")  # Paragraph break
+        metadata = {"file_name": file_name, "file_path": f"/library/{file_name}",
+                    "page_index": page_index, "total_pages": pages}
+        result.append(("\n".join(lines), metadata))
+    return result
+
+
+def splitter_baseline(texts_with_metadata, chunk_size, chunk_overlap):
+    """What add_texts_to_index did before: split every page on its own."""
+    splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    return [(chunk, metadata) for text, metadata in texts_with_metadata
+            for chunk in splitter.split_text(text)]
+
+
+def document_chunker(texts_with_metadata, chunk_size, chunk_overlap):
+    file_table = FileTable()
+    return list(chunk_pages(texts_with_metadata, chunk_size, chunk_overlap, file_table)), file_table
+
+
+def metadata_bytes(objects, shared):
+    """Size of ``objects`` plus the not yet counted objects in ``shared`` (each counted once)."""
+    seen = set()
+    total = sum(sys.getsizeof(obj) for obj in objects)
+    for obj in shared:
+        if id(obj) not in seen:
+            seen.add(id(obj))
+            total += sys.getsizeof(obj)
+    return total
+
+
+def measure(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    tracemalloc.start()
+    result = fn()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak, retained, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--books", type=int, default=3)
+    parser.add_argument("--pages", type=int, default=1500, help="Pages per textbook")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--chunk-overlap", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    pages = [page for book in range(args.books) for page in make_textbook(book, args.pages, rng)]
+    size_mb = sum(len(text) for text, _ in pages) / 1e6
+    print(f"{args.books} textbooks, {len(pages)} pages, {size_mb:.1f} MB of text\n")
+
+    old_time, old_peak, old_retained, old_chunks = measure(
+        lambda: splitter_baseline(pages, args.chunk_size, args.chunk_overlap), args.repeat)
+    new_time, new_peak, new_retained, (new_chunks, file_table) = measure(
+        lambda: document_chunker(pages, args.chunk_size, args.chunk_overlap), args.repeat)
+    spanning = sum(chunk.page_start != chunk.page_end for chunk in new_chunks)
+    # Stored per chunk: a metadata dict copy (old) or the chunk tuple minus its text (new)
+    old_meta = metadata_bytes((dict(metadata) for _, metadata in old_chunks),
+                              (value for _, metadata in old_chunks for value in metadata.values()))
+    new_meta = metadata_bytes(new_chunks, (value for chunk in new_chunks for value in chunk[1:]))
+    new_meta += metadata_bytes(file_table.files, (value for record in file_table.files for value in record))
+
+    print(f"{'engine':<26}{'time':>8}{'MB/s':>8}{'chunks':>8}{'spanning':>10}{'peak MB':>9}{'meta B/chunk':>14}")
+    print(f"{'per-page splitter':<26}{old_time:>7.2f}s{size_mb / old_time:>8.1f}{len(old_chunks):>8}{0:>10}"
+          f"{old_peak / 1e6:>9.1f}{old_meta / len(old_chunks):>14.0f}")
+    print(f"{'whole-document chunker':<26}{new_time:>7.2f}s{size_mb / new_time:>8.1f}{len(new_chunks):>8}{spanning:>10}"
+          f"{new_peak / 1e6:>9.1f}{new_meta / len(new_chunks):>14.0f}")
+    print(f"\nspeedup {old_time / new_time:.1f}x, metadata {old_meta / new_meta:.1f}x smaller")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Benchmark for the chunk docstore: LangChain's InMemoryDocstore (a Document and a
+metadata dict per chunk) versus ColumnarDocstore (one text buffer, integer
+columns and a file table), with and without per-chunk compression.
+
+The chunks come from synthetic textbooks run through the real chunker and are
+added in embedding-sized batches, the way embed_and_index fills the store.
+Reported per store: time to add every chunk, memory retained by the store (chunk
+IDs excluded, since the vector store holds those anyway) and lookup latency.
+
+Usage (from the repository root):
+    python benchmarks/bench_docstore.py --books 10 --pages 500
+"""
+import os
+import sys
+import time
+import uuid
+import random
+import argparse
+import tracemalloc
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(ROOT)
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from langchain_core.documents import Document
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from bench_chunking import make_textbook
+from aiFeatures.python.chunking import FileTable, chunk_pages
+from aiFeatures.python.columnar_docstore import ColumnarDocstore
+
+
+def fill(store, ids, chunks, batch_size):
+    """
+    Adds the chunks in batches; Documents are created per batch as FAISS.add_embeddings
+    does. Texts are decoded here so that each store owns (and is charged for) its strings.
+    """
+    for start in range(0, len(chunks), batch_size):
+        store.add({doc_id: Document(page_content=text.decode("utf-8"), metadata=dict(metadata))
+                   for doc_id, (text, metadata) in zip(ids[start:start + batch_size],
+                                                       chunks[start:start + batch_size])})
+    return store
+
+
+def measure(make_store, ids, chunks, batch_size, lookups):
+    tracemalloc.start()
+    started = time.perf_counter()
+    store = fill(make_store(), ids, chunks, batch_size)
+    build = time.perf_counter() - started
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    started = time.perf_counter()
+    for doc_id in lookups:
+        store.search(doc_id)
+    lookup = (time.perf_counter() - started) / len(lookups)
+    return store, build, retained, lookup
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--books", type=int, default=10)
+    parser.add_argument("--pages", type=int, default=500, help="Pages per textbook")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--lookups", type=int, default=10_000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    file_table = FileTable()
+    chunks = [(chunk.text.encode("utf-8"), file_table.metadata(chunk))
+              for book in range(args.books)
+              for chunk in chunk_pages(make_textbook(book, args.pages, rng), file_table=file_table)]
+    ids = [str(uuid.uuid4()) for _ in chunks]
+    lookups = [rng.choice(ids) for _ in range(args.lookups)]
+    text_mb = sum(len(text) for text, _ in chunks) / 1e6
+    print(f"{len(chunks)} chunks from {args.books} textbooks, {text_mb:.1f} MB of chunk text\n")
+
+    old, old_build, old_mem, old_lookup = measure(InMemoryDocstore, ids, chunks, args.batch_size, lookups)
+    plain, plain_build, plain_mem, plain_lookup = measure(lambda: ColumnarDocstore(compress=False), ids,
+                                                          chunks, args.batch_size, lookups)
+    new, new_build, new_mem, new_lookup = measure(ColumnarDocstore, ids, chunks, args.batch_size, lookups)
+    assert all(old.search(doc_id) == plain.search(doc_id) == new.search(doc_id) for doc_id in lookups[:1000])
+
+    print(f"{'docstore':<34}{'build':>8}{'memory MB':>11}{'B/chunk':>9}{'lookup':>10}")
+    for name, build, memory, lookup in (("InMemoryDocstore", old_build, old_mem, old_lookup),
+                                        ("ColumnarDocstore(compress=False)", plain_build, plain_mem, plain_lookup),
+                                        ("ColumnarDocstore", new_build, new_mem, new_lookup)):
+        print(f"{name:<34}{build:>7.2f}s{memory / 1e6:>11.1f}{memory / len(chunks):>9.0f}{lookup * 1e6:>8.1f}us")
+    print(f"\nmemory {old_mem / plain_mem:.1f}x lower uncompressed, {old_mem / new_mem:.1f}x lower compressed")
+
+
+if __name__ == "__main__":
+    main()
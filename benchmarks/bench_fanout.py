@@ -0,0 +1,58 @@
+"""
+Benchmark for the web-search fan-out: scraping the top N results one after another
+versus concurrently with scrape_links(), against the local fixture server.
+
+One of the simulated sites is much slower than the rest, which shows the effect of
+stopping early once enough content has been gathered.
+
+Usage (from the repository root):
+    python benchmarks/bench_fanout.py --links 5 --delay 0.3 --slow-delay 3
+"""
+import os
+import sys
+import time
+import argparse
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(ROOT)
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fixture_server import FixtureServer, CONTAINERS
+from aiFeatures.python.web_scraper_tool import scrape_url, set_page_cache
+from aiFeatures.python.web_scraping import scrape_links
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--links", type=int, default=5)
+    parser.add_argument("--delay", type=float, default=0.3, help="Response time of a typical site (s)")
+    parser.add_argument("--slow-delay", type=float, default=3.0, help="Response time of the slow site (s)")
+    parser.add_argument("--min-chars", type=int, default=4000)
+    args = parser.parse_args()
+
+    set_page_cache(None)  # Every run below must download the pages
+    sites = list(CONTAINERS)
+    with FixtureServer() as server:
+        links = [server.url(sites[i % len(sites)], f"topic-{i}",
+                            delay=args.slow_delay if i == 1 else args.delay)
+                 for i in range(args.links)]
+
+        started = time.perf_counter()
+        single = scrape_url(links[0])
+        print(f"{'best link only':<28} {time.perf_counter() - started:6.2f}s  {len(single):7d} chars")
+
+        started = time.perf_counter()
+        serial = "\n\n".join(scrape_url(link) for link in links)
+        print(f"{f'serial, {args.links} links':<28} {time.perf_counter() - started:6.2f}s  {len(serial):7d} chars")
+
+        started = time.perf_counter()
+        full = scrape_links(links, min_chars=float("inf"))
+        print(f"{f'fan-out, all {args.links} links':<28} {time.perf_counter() - started:6.2f}s  {len(full):7d} chars")
+
+        started = time.perf_counter()
+        early = scrape_links(links, min_chars=args.min_chars)
+        print(f"{f'fan-out, stop at {args.min_chars} chars':<28} {time.perf_counter() - started:6.2f}s  {len(early):7d} chars")
+
+
+if __name__ == "__main__":
+    main()
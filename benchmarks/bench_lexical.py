@@ -0,0 +1,104 @@
+"""
+Benchmark for the lexical (BM25) index used by hybrid retrieval.
+
+The corpus is a set of synthetic textbooks whose words follow a Zipf distribution
+over a large vocabulary, with some snake_case identifiers mixed in, run through
+the real chunker. Reported: time to index every chunk, memory held by the index,
+and search latency for typical queries (a few content words and identifiers) and
+for worst-case queries made only of the most frequent words, whose postings
+cover most chunks. The first search of a term computes and caches its weights,
+so latencies are given for cold and warm terms.
+
+Usage (from the repository root):
+    python benchmarks/bench_lexical.py --books 10 --pages 500
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(ROOT)
+
+from aiFeatures.python.chunking import chunk_pages
+from aiFeatures.python.lexical_index import LexicalIndex, STOPWORDS
+
+LETTERS = "abcdefghijklmnopqrstuvwxyz"
+
+
+def make_vocabulary(size):
+    """Distinct pseudo-words; every tenth one is a snake_case identifier."""
+    words = []
+    for i in range(size):
+        word, n = "", i + 26 * 26
+        while n:
+            n, letter = divmod(n, 26)
+            word += LETTERS[letter]
+        words.append(f"{word}_{LETTERS[i % 26]}" if i % 10 == 9 else word)
+    return words
+
+
+def make_textbooks(books, pages, vocabulary, rng):
+    """(text, metadata) pages of Zipf-distributed words, like extract_text_from_pdf returns."""
+    probabilities = 1.0 / np.arange(1, len(vocabulary) + 1) ** 1.1
+    probabilities /= probabilities.sum()
+    result = []
+    for book in range(books):
+        file_name = f"textbook-{book}.pdf"
+        for page_index in range(pages):
+            words = [vocabulary[i] for i in rng.choice(len(vocabulary), 450, p=probabilities)]
+            lines = [" ".join(words[start:start + 12]) for start in range(0, len(words), 12)]
+            metadata = {"file_name": file_name, "file_path": f"/library/{file_name}",
+                        "page_index": page_index, "total_pages": pages}
+            result.append(("\n".join(lines), metadata))
+    return result
+
+
+def time_queries(index, queries):
+    latencies = []
+    for query in queries:
+        started = time.perf_counter()
+        index.search(query, 12, 0.5)
+        latencies.append(time.perf_counter() - started)
+    return np.percentile(np.array(latencies) * 1e6, [50, 95, 99])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--books", type=int, default=10)
+    parser.add_argument("--pages", type=int, default=500, help="Pages per textbook")
+    parser.add_argument("--vocabulary", type=int, default=50_000)
+    parser.add_argument("--queries", type=int, default=2_000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    vocabulary = [word for word in make_vocabulary(args.vocabulary + len(STOPWORDS)) if word not in STOPWORDS]
+    vocabulary = vocabulary[:args.vocabulary]
+    chunks = [chunk.text for chunk in chunk_pages(make_textbooks(args.books, args.pages, vocabulary, rng))]
+    print(f"{len(chunks)} chunks from {args.books} textbooks, {sum(map(len, chunks)) / 1e6:.1f} MB of chunk text")
+
+    index = LexicalIndex()
+    started = time.perf_counter()
+    index.add((str(i) for i in range(len(chunks))), chunks)
+    build = time.perf_counter() - started
+    print(f"indexed in {build:.2f}s ({len(chunks) / build:.0f} chunks/s), "
+          f"{index.memory_usage() / 1e6:.1f} MB, {index.memory_usage() / len(chunks):.0f} B/chunk\n")
+
+    # Typical queries: 1-4 content words (skipping the 200 most frequent) and identifiers
+    picker = random.Random(0)
+    typical = [" ".join(picker.choice(vocabulary[200:5000]) for _ in range(picker.randint(1, 4)))
+               for _ in range(args.queries)]
+    common = [" ".join(picker.sample(vocabulary[:20], 3)) for _ in range(args.queries)]
+
+    print(f"{'queries':<30}{'p50 us':>9}{'p95 us':>9}{'p99 us':>9}")
+    for name, queries in (("typical, cold", typical), ("typical, warm", typical),
+                          ("3 most frequent words, warm", common)):
+        p50, p95, p99 = time_queries(index, queries)
+        print(f"{name:<30}{p50:>9.0f}{p95:>9.0f}{p99:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
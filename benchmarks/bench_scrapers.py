@@ -0,0 +1,76 @@
+"""
+Benchmark for page text extraction: the original BeautifulSoup/html.parser scrapers
+versus the table-driven lxml engine (html_extract.extract_text).
+
+Runs over the saved pages in benchmarks/fixtures/, one per supported site. They
+are synthetic replicas with the same content containers as the real sites and
+about 100 KB of surrounding chrome each; regenerate them with --regenerate.
+
+Usage (from the repository root):
+    python benchmarks/bench_scrapers.py --repeat 20
+"""
+import os
+import sys
+import time
+import argparse
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(ROOT)
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from bs4 import BeautifulSoup
+from fixture_server import render_page, CONTAINERS
+from aiFeatures.python.web_scraper_tool import parse_page, site_rule
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def soup_baseline(html, site):
+    """The extraction each site scraper did before the lxml engine."""
+    soup = BeautifulSoup(html, "html.parser")
+    rule = site_rule(site)
+    attrs = {"id": rule.container_id} if rule.container_id else {}
+    container = soup.find(rule.container_tag, **attrs)
+    if not container:
+        return "Content not found."
+    text = []
+    for tag in rule.text_tags:  # One find_all pass per tag, as scrape_w3schools did
+        text.extend(t.get_text(strip=True) for t in container.find_all(tag, limit=rule.limit))
+    return "\n".join(text)
+
+
+def timed(fn, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - started) / repeat, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--regenerate", action="store_true", help="Rewrite the fixture pages first")
+    args = parser.parse_args()
+
+    if args.regenerate:
+        os.makedirs(FIXTURE_DIR, exist_ok=True)
+        for site in CONTAINERS:
+            with open(os.path.join(FIXTURE_DIR, f"{site}.html"), "w", encoding="utf-8") as f:
+                f.write(render_page(site, "python-loops", paragraphs=60, chrome=400))
+
+    print(f"{'site':<22}{'size':>8}{'bs4 html.parser':>18}{'lxml engine':>14}{'speedup':>10}{'paragraphs':>12}")
+    total_old = total_new = 0.0
+    for site in CONTAINERS:
+        with open(os.path.join(FIXTURE_DIR, f"{site}.html"), "r", encoding="utf-8") as f:
+            html = f.read()
+        old, old_text = timed(lambda: soup_baseline(html, site), args.repeat)
+        new, new_text = timed(lambda: parse_page(html, site_rule(site)), args.repeat)
+        total_old += old
+        total_new += new
+        print(f"{site:<22}{len(html) // 1024:>6}KB{old * 1000:>15.2f}ms{new * 1000:>12.2f}ms"
+              f"{old / new:>9.1f}x{len(new_text.splitlines()):>6} / {len(old_text.splitlines())}")
+    print(f"{'total':<22}{'':>8}{total_old * 1000:>15.2f}ms{total_new * 1000:>12.2f}ms{total_old / total_new:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
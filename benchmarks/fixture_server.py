@@ -0,0 +1,139 @@
+"""
+Local HTTP server that stands in for the tutorial sites KIRA scrapes.
+
+Pages are served under paths that contain the site's domain, e.g.
+    http://127.0.0.1:<port>/w3schools.com/python/intro?delay=0.5&paragraphs=20
+so scrape_url() dispatches them to the matching site-specific scraper. ``delay``
+(seconds) simulates a slow site and ``paragraphs`` controls the page size; a
+``status`` parameter returns an error response instead. Pages carry an ETag and
+conditional requests for an unchanged page get a 304.
+
+Usage:
+    with FixtureServer() as server:
+        scrape_url(server.url("programiz.com", delay=0.2))
+
+Run directly to serve fixtures until interrupted:
+    python benchmarks/fixture_server.py --port 8765
+"""
+import time
+import hashlib
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlencode, urlsplit, parse_qs
+
+# Opening and closing markup of the content container each scraper looks for
+CONTAINERS = {
+    "w3schools.com": ('<div id="main">', "</div>"),
+    "tutorialspoint.com": ('<div id="mainContent">', "</div>"),
+    "freecodecamp.org": ("<article>", "</article>"),
+    "programiz.com": ("<article>", "</article>"),
+    "en.wikipedia.org": ('<div id="bodyContent">', "</div>"),
+}
+
+PARAGRAPH = ("Paragraph {i} of the {site} tutorial on {topic}: a variable names a value, "
+             "a function groups statements, and a loop repeats them until a condition is met.")
+
+
+def render_page(site, topic, paragraphs, chrome=50):
+    """
+    Renders a tutorial page with the site's content container surrounded by page
+    chrome (scripts, navigation, sidebar and footer); ``chrome`` scales its size.
+    """
+    opening, closing = CONTAINERS[site]
+    body = "\n".join(f"<p>{PARAGRAPH.format(i=i, site=site, topic=topic)} <code>x = {i}</code> "
+                     f"<a href='/{topic}/{i}'>more</a></p>" for i in range(paragraphs))
+    items = "\n".join(f"<li>Key point {i} about <b>{topic}</b></li>" for i in range(paragraphs // 4))
+    links = "".join(f"<li><a href='/lesson-{i}' class='nav-link'>Lesson {i}</a></li>" for i in range(chrome))
+    script = "".join(f"window.cfg{i}={{id:{i},enabled:true}};" for i in range(chrome))
+    return (f"<!DOCTYPE html><html><head><title>{topic} - {site}</title>"
+            f"<style>.nav-link{{color:#04aa6d}}</style><script>{script}</script></head><body>"
+            f"<header><nav><ul>{links}</ul></nav></header>"
+            f"{opening}<h1>{topic}</h1>{body}<ul>{items}</ul>{closing}"
+            f"<aside><ul>{links}</ul></aside>"
+            f"<footer><p>Copyright {site}</p><ul>{links}</ul></footer></body></html>")
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, so pooled connections are actually reused
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        params = parse_qs(parts.query)
+        site, _, topic = parts.path.lstrip("/").partition("/")
+
+        time.sleep(float(params.get("delay", ["0"])[0]))
+        status = int(params.get("status", ["200"])[0])
+        if site not in CONTAINERS or status != 200:
+            self.send_error(404 if site not in CONTAINERS else status)
+            return
+
+        body = render_page(site, topic or "index", int(params.get("paragraphs", ["20"])[0])).encode("utf-8")
+        etag = f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Keep benchmark output readable
+
+
+class QuietHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        pass  # Clients hanging up early (cancelled or size-capped downloads) are expected
+
+
+class FixtureServer:
+    """Runs the fixture server on a background thread (port 0 picks a free port)."""
+
+    def __init__(self, host="127.0.0.1", port=0):
+        self.httpd = QuietHTTPServer((host, port), FixtureHandler)
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def url(self, site, topic="python-intro", **params):
+        query = f"?{urlencode(params)}" if params else ""
+        return f"{self.base_url}/{site}/{topic}{query}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve tutorial-site fixtures on localhost")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    with FixtureServer(port=args.port) as server:
+        print(f"Serving fixtures at {server.base_url}/<site>/<topic>?delay=&paragraphs=&status=")
+        for site in CONTAINERS:
+            print(" ", server.url(site))
+        try:
+            server.thread.join()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
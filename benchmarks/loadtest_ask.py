@@ -0,0 +1,119 @@
+"""
+Load test for /ask against local stubs: compares the threaded WSGI app with the ASGI entry point.
+
+Web search/scraping and the LLM call are replaced with stubs that sleep for a
+configurable latency, so the numbers reflect how many requests a single process
+can keep in flight rather than the speed of external services.
+
+Usage (from the repository root):
+    python benchmarks/loadtest_ask.py --requests 200 --concurrency 100 --threads 8
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, "testFrontend", "FlaskApp"))
+
+import app as kira
+import asgi
+from aiFeatures.python import ask_pipeline
+
+
+def install_stubs(search_latency, llm_latency):
+    """Replace the external I/O stages of the /ask pipeline with sleeping stubs."""
+    async def fake_web_response(query):
+        await asyncio.sleep(search_latency)
+        return f"Scraped content about {query}"
+
+    async def fake_generate(session_id, prompt, scraped_content, session_manager):
+        await asyncio.sleep(llm_latency)
+        return f"<p>Answer to {prompt}</p>"
+
+    ask_pipeline.aweb_response = fake_web_response
+    ask_pipeline.agenerate_response_without_retrieval = fake_generate
+    kira.say = lambda text: None
+
+
+def session_cookie(i, learners):
+    """Signed Flask session cookie for simulated learner ``i % learners``."""
+    serializer = kira.app.session_interface.get_signing_serializer(kira.app)
+    value = serializer.dumps({"sid": f"learner-{i % learners}"})
+    return f"{kira.app.config['SESSION_COOKIE_NAME']}={value}".encode()
+
+
+def summarize(name, latencies, elapsed):
+    latencies = sorted(latencies)
+    p95 = latencies[int(0.95 * (len(latencies) - 1))]
+    print(f"{name:<28} {len(latencies) / elapsed:8.1f} req/s   "
+          f"p50 {statistics.median(latencies) * 1000:7.0f} ms   p95 {p95 * 1000:7.0f} ms")
+
+
+def run_wsgi(n_requests, threads, learners):
+    """Threaded WSGI server model: each request occupies one of ``threads`` workers."""
+    client = kira.app.test_client(use_cookies=False)
+
+    def one(i):
+        started = time.perf_counter()
+        response = client.post("/ask", json={"query": f"question {i}"},
+                               headers={"Cookie": session_cookie(i, learners).decode()})
+        assert response.status_code == 200, response.data
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        latencies = list(pool.map(one, range(n_requests)))
+    summarize(f"WSGI ({threads} threads)", latencies, time.perf_counter() - started)
+
+
+async def run_asgi(n_requests, concurrency, learners):
+    """ASGI model: all requests share one event loop, up to ``concurrency`` at a time."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        body = json.dumps({"query": f"question {i}"}).encode()
+        scope = {"type": "http", "method": "POST", "path": "/ask",
+                 "headers": [(b"cookie", session_cookie(i, learners))]}
+        sent = []
+
+        async def receive():
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        async def send(message):
+            sent.append(message)
+
+        async with semaphore:
+            started = time.perf_counter()
+            await asgi.app(scope, receive, send)
+            assert sent[0]["status"] == 200, sent
+            return time.perf_counter() - started
+
+    started = time.perf_counter()
+    latencies = await asyncio.gather(*(one(i) for i in range(n_requests)))
+    summarize(f"ASGI (concurrency {concurrency})", latencies, time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--threads", type=int, default=8, help="WSGI worker threads")
+    parser.add_argument("--learners", type=int, default=50, help="Distinct sessions to spread requests over")
+    parser.add_argument("--search-latency", type=float, default=0.5)
+    parser.add_argument("--llm-latency", type=float, default=1.0)
+    args = parser.parse_args()
+
+    install_stubs(args.search_latency, args.llm_latency)
+    print(f"{args.requests} requests, stub latency {args.search_latency + args.llm_latency:.1f}s per request\n")
+    run_wsgi(args.requests, args.threads, args.learners)
+    asyncio.run(run_asgi(args.requests, args.concurrency, args.learners))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,30 +1,117 @@
 import os
 import re
 import sys
-from flask import Flask, request, jsonify, render_template, session
+import json
+import uuid
+from flask import Flask, request, jsonify, render_template, session, Response, stream_with_context
 from flask_cors import CORS
+from werkzeug.exceptions import RequestEntityTooLarge
 import threading
-import tempfile
 
 # Add aiFeatures/python to sys.path for module imports
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
 
-from aiFeatures.python.ai_response import generate_response_without_retrieval, generate_response_with_retrieval, ChatSessionManager
+from aiFeatures.python.ai_response import ChatSessionManager
+from aiFeatures.python.ai_response import stream_response_without_retrieval, stream_response_with_retrieval, format_response
 from aiFeatures.python.speech_to_text import speech_to_text
 from aiFeatures.python.text_to_speech import say, stop_speech
-from aiFeatures.python.web_scraping import web_response
-from aiFeatures.python.rag_pipeline import index_pdfs, retrieve_answer
+from aiFeatures.python.index_manager import IncrementalIndexManager
+from aiFeatures.python.rag_pipeline import create_embeddings
+from aiFeatures.python.session_store import SQLiteSessionBackend
+from aiFeatures.python.retrieval_cache import RetrievalCache
+from aiFeatures.python.ask_pipeline import answer_query, gather_context
+from aiFeatures.python import background_loop
+from aiFeatures.python.indexing_jobs import IndexingJobQueue, JobQueueFull
+from aiFeatures.python.upload_ingest import ingest_pdf_uploads, upload_budget, UploadBudgetExceeded, UploadTooLarge
 
 app = Flask(__name__)
-app.secret_key = os.urandom(24)  # Add a secret key for sessions
+# Secret key for the session cookie; set FLASK_SECRET_KEY so cookies stay valid across restarts and workers
+app.secret_key = os.getenv("FLASK_SECRET_KEY") or os.urandom(24)
+# Limit on a whole request body; single uploaded PDFs are limited by MAX_UPLOAD_MB (see upload_ingest)
+app.config["MAX_CONTENT_LENGTH"] = int(os.getenv("MAX_UPLOAD_TOTAL_MB", 200)) * 1024 * 1024
 CORS(app)  # Enable CORS for frontend requests
 
-# Global variables
-vector_store = None
-session_manager = ChatSessionManager()
-default_session_id = "user_session_001"  # Default session ID
+# Embedding model (and on-disk embedding cache) shared by every session's index
+embeddings = create_embeddings()
 
-import re
+def session_size(chat_session):
+    """Approximate memory held by a session: chat history plus its vector index."""
+    size = chat_session.history_size()
+    index_manager = chat_session.metadata.get("index_manager")
+    if index_manager is not None:
+        size += index_manager.memory_usage()
+    return size
+
+# Each browser gets its own chat history, index and retrieval cache; idle and
+# least recently used sessions are evicted to keep memory bounded. Set
+# SESSION_DB_PATH when running several workers so they share chat histories.
+session_manager = ChatSessionManager(
+    max_sessions=int(os.getenv("MAX_SESSIONS", 10_000)),
+    idle_ttl=float(os.getenv("SESSION_IDLE_TTL", 2 * 3600)),
+    max_memory_bytes=int(os.getenv("SESSION_MEMORY_MB", 512)) * 1024 * 1024,
+    size_of=session_size,
+    backend=SQLiteSessionBackend(os.getenv("SESSION_DB_PATH")) if os.getenv("SESSION_DB_PATH") else None,
+)
+
+# PDFs are indexed by background workers
+indexing_jobs = IndexingJobQueue(
+    workers=int(os.getenv("INDEXING_WORKERS", 2)),
+    max_pending=int(os.getenv("INDEXING_QUEUE_SIZE", 16)),
+)
+
+def current_session_id():
+    """Returns the caller's session ID, issuing a new one in the session cookie if needed."""
+    if "sid" not in session:
+        session["sid"] = uuid.uuid4().hex
+    return session["sid"]
+
+def session_state(session_id):
+    """
+    Returns the chat session, index manager and retrieval cache of a session,
+    creating them on first use.
+    """
+    chat_session = session_manager.get_or_create_session(session_id)
+    state = chat_session.metadata
+    if "index_manager" not in state:
+        state["index_manager"] = IncrementalIndexManager(embeddings=embeddings)  # Only embeds new or changed PDFs
+        state["retrieval_cache"] = RetrievalCache(max_entries=64)  # Reuses results for repeated queries
+        state["index_lock"] = threading.Lock()  # One indexing job per session at a time
+    return chat_session, state["index_manager"], state["retrieval_cache"]
+
+class SessionEnded(Exception):
+    """Raised by an indexing job whose session was cleared or evicted before it finished."""
+
+def submit_indexing(session_id, update, on_finished=None):
+    """
+    Queues an index update for a session as a background job.
+    
+    ``update(index_manager, job)`` is applied to a copy of the session's index
+    manager, which replaces the live one once it finishes; until then queries are
+    answered from the old index. The job belongs to the session as it is now: if
+    that session is cleared or evicted before the job finishes, the job is
+    abandoned rather than creating a new session or writing to the old one.
+    ``on_finished()`` is called when the job ends, whether it succeeded or not.
+    """
+    chat_session, _, retrieval_cache = session_state(session_id)
+    state = chat_session.metadata
+    
+    def run(job):
+        try:
+            with state["index_lock"]:
+                if not session_manager.is_live(chat_session):
+                    raise SessionEnded("Session was cleared or expired; indexing abandoned")
+                staged = state["index_manager"].copy()
+                result = update(staged, job)
+                if not session_manager.set_metadata(chat_session, index_manager=staged):
+                    raise SessionEnded("Session was cleared or expired; indexing abandoned")
+                retrieval_cache.invalidate()
+        finally:
+            if on_finished is not None:
+                on_finished()
+        return (f"{len(result.added)} added, {len(result.updated)} updated, "
+                f"{len(result.removed)} removed, {len(result.unchanged)} unchanged")
+    
+    return indexing_jobs.submit(session_id, run)
 
 
 def chunk_text(text, max_length=150):
@@ -54,14 +141,9 @@ def home():
 @app.route("/clear-session", methods=["POST"])
 def clear_session():
     """Clears the current RAG session and resets the vector store."""
-    global vector_store, session_manager
-    
     try:
-        # Reset the vector store
-        vector_store = None
-        
-        # Clear the session for this user
-        session_manager.delete_session(default_session_id)
+        # Drop this user's history, index and retrieval cache
+        session_manager.delete_session(current_session_id())
         
         return jsonify({"success": True, "message": "Session cleared successfully"})
     
@@ -71,43 +153,73 @@ def clear_session():
 
 @app.route("/initialize-rag", methods=["POST"])
 def initialize_rag():
-    """Handles indexing PDFs from uploaded files or a folder path."""
-    global vector_store
+    """
+    Queues indexing of uploaded PDFs or a folder path.
     
+    Responds immediately with a job ID; poll /index-jobs/<job_id> for progress.
+    Uploaded PDFs count against the process-wide upload budget until their job
+    finishes; while it is used up, uploads are refused with 503.
+    """
+    reservation = upload_budget.reserve()
     try:
-        if 'files' in request.files:
-            files = request.files.getlist('files')
-            
-            with tempfile.TemporaryDirectory() as temp_dir:
-                file_paths = []
-                for file in files:
-                    if file.filename.endswith('.pdf'):
-                        file_path = os.path.join(temp_dir, file.filename)
-                        file.save(file_path)
-                        file_paths.append(file_path)
-
-                if len(file_paths) == 1:
-                    vector_store = index_pdfs(file_paths[0])  # Using unified index_pdfs function
-                else:
-                    vector_store = index_pdfs(file_paths)  # Using unified index_pdfs function
+        session_id = current_session_id()
+        _, index_manager, _ = session_state(session_id)
+        
+        boundary = request.mimetype_params.get("boundary")
+        if request.mimetype == "multipart/form-data" and boundary:
+            # Read PDFs from the request stream into memory; each is extracted as soon
+            # as it has arrived, while later files are still uploading
+            known_digests = {key: record.sha256 for key, record in index_manager.files.items()}
+            fields, uploads = ingest_pdf_uploads(request.stream, boundary.encode("latin-1"),
+                                                 known_digests=known_digests, reservation=reservation)
+        else:
+            fields, uploads = request.form.to_dict(), []
+        
+        if uploads:
+            # Add new uploads to the index; re-uploads of unchanged files are skipped
+            job = submit_indexing(session_id, lambda manager, job: manager.add_extracted(
+                uploads, on_pages=job.add_pages, on_chunks=job.add_chunks), on_finished=reservation.release)
+            reservation = None  # Released by the job once the uploads have been indexed
         
-        elif 'folder' in request.form:
-            folder_path = request.form.get('folder')
-            vector_store = index_pdfs(folder_path)  # Using unified index_pdfs function
+        elif 'folder' in fields:
+            folder_path = fields['folder']
+            if not os.path.isdir(folder_path) and not os.path.isfile(folder_path):
+                return jsonify({"success": False, "message": f"{folder_path} is not a folder or file"}), 400
+            # Only embeds new or changed files in the folder
+            job = submit_indexing(session_id, lambda manager, job: manager.sync(
+                folder_path, on_pages=job.add_pages, on_chunks=job.add_chunks))
         
         else:
             return jsonify({"success": False, "message": "No files or folder provided"}), 400
         
-        return jsonify({"success": True, "message": "RAG initialized successfully"})
+        return jsonify({"success": True, "jobId": job.job_id, "status": job.status,
+                        "message": "Indexing started"}), 202
+    
+    except (UploadTooLarge, RequestEntityTooLarge) as e:
+        return jsonify({"success": False, "message": str(e)}), 413
+    
+    except (JobQueueFull, UploadBudgetExceeded) as e:
+        return jsonify({"success": False, "message": str(e)}), 503
     
     except Exception as e:
         print(f"RAG initialization error: {e}")
         return jsonify({"success": False, "message": str(e)}), 500
+    
+    finally:
+        if reservation is not None:
+            reservation.release()
+
+@app.route("/index-jobs/<job_id>", methods=["GET"])
+def index_job_status(job_id):
+    """Reports the status and progress (pages extracted, chunks embedded) of an indexing job."""
+    job = indexing_jobs.get(job_id)
+    if job is None or job.session_id != current_session_id():
+        return jsonify({"error": "Unknown indexing job"}), 404
+    return jsonify(job.to_dict())
 
 @app.route("/ask", methods=["POST"])
 def ask():
     """Handles text input and returns AI response with chat history management."""
-    global vector_store, session_manager, default_session_id
     data = request.json
     user_query = data.get("query")
 
@@ -115,45 +227,71 @@ def ask():
         return jsonify({"error": "No input provided"}), 400
 
     try:
-        # Get retrieved information if vector store exists
-        retrieved_info = retrieve_answer(user_query, vector_store) if vector_store else ""
-        
-        # Generate response based on whether retrieval was performed
-        if retrieved_info:
-            response = generate_response_with_retrieval(
-                default_session_id, 
-                user_query,
-                retrieved_info, 
-                session_manager
-            )
-            
-            say(response)  # Convert response to speech
-
-            return jsonify({
-                "response": response,
-                "retrieved": retrieved_info,
-                "hasRetrieval": bool(retrieved_info)
-            })
-            
-        else:
-            scraped_text = web_response(user_query)  # Call web scraping function
-            response = generate_response_without_retrieval(
-                default_session_id, 
-                user_query, 
-                scraped_text,
-                session_manager
-            )
-            say(response)  # Convert response to speech
-
-            return jsonify({
-                "response": response,
-                "scraped": scraped_text,
-                "hasScraping": bool(scraped_text)
-            })
+        session_id = current_session_id()
+        _, index_manager, retrieval_cache = session_state(session_id)
+        # Retrieval or web scraping, then the matching LLM chain (see ask_pipeline), on the
+        # long-lived pipeline loop whose async clients outlive this request
+        result = background_loop.run(answer_query(user_query, index_manager.vector_store, session_id,
+                                                  session_manager, retrieval_cache))
+        say(result["response"])  # Convert response to speech
+        return jsonify(result)
     
     except Exception as e:
         print(f"Error processing query: {e}")
         return jsonify({"error": f"Failed to process query: {str(e)}"}), 500
+
+def sse_event(event, data):
+    """Formats a server-sent event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.route("/ask-stream", methods=["POST"])
+def ask_stream():
+    """
+    Streaming variant of /ask using server-sent events.
+    
+    Emits a "context" event with the retrieved or scraped information, one "token"
+    event per chunk of Markdown from the final LLM stage, and a "done" event with the
+    complete response rendered to HTML.
+    """
+    data = request.json
+    user_query = data.get("query")
+
+    if not user_query:
+        return jsonify({"error": "No input provided"}), 400
+
+    # Resolve the session before streaming starts so the cookie goes out with the headers
+    session_id = current_session_id()
+    _, index_manager, retrieval_cache = session_state(session_id)
+    vector_store = index_manager.vector_store
+
+    def generate():
+        try:
+            # Retrieval and web search run concurrently (see ask_pipeline.gather_context)
+            retrieved_info, scraped_text = background_loop.run(gather_context(user_query, vector_store,
+                                                                              retrieval_cache))
+            
+            if retrieved_info:
+                yield sse_event("context", {"retrieved": retrieved_info, "hasRetrieval": True})
+                tokens = stream_response_with_retrieval(session_id, user_query, retrieved_info, session_manager)
+            else:
+                yield sse_event("context", {"scraped": scraped_text, "hasScraping": bool(scraped_text)})
+                tokens = stream_response_without_retrieval(session_id, user_query, scraped_text, session_manager)
+            
+            parts = []
+            for token in tokens:
+                parts.append(token)
+                yield sse_event("token", {"text": token})
+            
+            response = format_response("".join(parts))
+            yield sse_event("done", {"response": response})
+            say(response)  # Convert response to speech
+        
+        except Exception as e:
+            print(f"Error processing query: {e}")
+            yield sse_event("error", {"error": f"Failed to process query: {str(e)}"})
+
+    return Response(stream_with_context(generate()), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
     
 @app.route("/speech-to-text", methods=["POST"])
 def process_voice():
@@ -0,0 +1,113 @@
+"""
+ASGI entry point for serving KIRA from an event loop.
+
+/ask is handled natively as a coroutine, so one process can keep many student
+questions in flight while they wait on SerpAPI, scraping, Ollama and Gemini.
+The coroutine runs on the same long-lived pipeline loop (see background_loop)
+that the Flask routes use, so the async Ollama and Gemini clients are only ever
+used from one loop. Every other route is served by the Flask app through
+asgiref's WSGI adapter and shares its state (per-session indexes, chat
+histories, caches). The session is read from Flask's signed session cookie;
+requests without one are handed to Flask so it can issue the cookie.
+
+Run from this directory with:
+    uvicorn asgi:app --host 0.0.0.0 --port 5500
+"""
+import json
+from http.cookies import SimpleCookie
+from asgiref.wsgi import WsgiToAsgi
+from itsdangerous import BadSignature
+
+import app as kira
+from aiFeatures.python.ask_pipeline import answer_query
+from aiFeatures.python import background_loop
+
+flask_asgi = WsgiToAsgi(kira.app)
+
+
+async def read_body(receive):
+    """Reads the full HTTP request body from an ASGI receive channel."""
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            return body
+
+
+async def send_json(send, status, payload):
+    body = json.dumps(payload).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+def session_id_from_cookie(scope):
+    """Returns the session ID stored in Flask's signed session cookie, or None."""
+    cookies = SimpleCookie()
+    for name, value in scope.get("headers", []):
+        if name == b"cookie":
+            cookies.load(value.decode("latin-1"))
+    morsel = cookies.get(kira.app.config["SESSION_COOKIE_NAME"])
+    serializer = kira.app.session_interface.get_signing_serializer(kira.app)
+    if morsel is None or serializer is None:
+        return None
+    try:
+        data = serializer.loads(morsel.value, max_age=int(kira.app.permanent_session_lifetime.total_seconds()))
+    except BadSignature:
+        return None
+    return data.get("sid")
+
+
+async def ask(scope, receive, send):
+    """Native async equivalent of the Flask /ask route."""
+    body = await read_body(receive)
+    session_id = session_id_from_cookie(scope)
+    if session_id is None:
+        # Let Flask create the session and set the cookie, replaying the body we consumed
+        async def replay():
+            return {"type": "http.request", "body": body, "more_body": False}
+        await flask_asgi(scope, replay, send)
+        return
+
+    try:
+        data = json.loads(body or b"{}")
+    except ValueError:
+        data = {}
+    user_query = data.get("query") if isinstance(data, dict) else None
+
+    if not user_query:
+        await send_json(send, 400, {"error": "No input provided"})
+        return
+
+    try:
+        _, index_manager, retrieval_cache = kira.session_state(session_id)
+        result = await background_loop.arun(answer_query(user_query, index_manager.vector_store, session_id,
+                                                         kira.session_manager, retrieval_cache))
+        kira.say(result["response"])  # Convert response to speech
+        await send_json(send, 200, result)
+    except Exception as e:
+        print(f"Error processing query: {e}")
+        await send_json(send, 500, {"error": f"Failed to process query: {str(e)}"})
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        await lifespan(receive, send)
+    elif scope["type"] == "http" and scope["path"] == "/ask" and scope["method"] == "POST":
+        await ask(scope, receive, send)
+    else:
+        await flask_asgi(scope, receive, send)
@@ -41,6 +41,29 @@ function displayFileNames(files) {
     chatBox.scrollTop = chatBox.scrollHeight;
 }
 
+// Poll an indexing job until it finishes, showing its progress in the given message
+function waitForIndexing(jobId, progressMessage) {
+    return new Promise((resolve, reject) => {
+        function poll() {
+            fetch(`/index-jobs/${jobId}`)
+            .then(response => response.json())
+            .then(job => {
+                if (job.error && !job.status) {
+                    reject(new Error(job.error));
+                } else if (job.status === "done" || job.status === "failed") {
+                    resolve({ success: job.status === "done", message: job.error || job.message });
+                } else {
+                    const state = job.status === "queued" ? "Waiting to index documents..." : "Indexing documents...";
+                    progressMessage.innerHTML = `<strong>KIRA:</strong> ${state} ${job.pages_extracted} pages extracted, ${job.chunks_embedded} chunks embedded`;
+                    setTimeout(poll, 1000);
+                }
+            })
+            .catch(reject);
+        }
+        poll();
+    });
+}
+
 function handleFileUpload(files) {
     if (!files || files.length === 0) return;
 
@@ -68,6 +91,8 @@ function handleFileUpload(files) {
         body: formData
     })
     .then(response => response.json())
+    // Indexing runs in the background; wait for the job to finish
+    .then(data => data.success ? waitForIndexing(data.jobId, initializingMessage) : data)
     .then(data => {
         // Hide loading indicator
         document.getElementById("loading-indicator").classList.add("hidden");
@@ -137,6 +162,8 @@ function handleFolderUpload(files) {
         body: formData
     })
     .then(response => response.json())
+    // Indexing runs in the background; wait for the job to finish
+    .then(data => data.success ? waitForIndexing(data.jobId, initializingMessage) : data)
     .then(data => {
         // Hide loading indicator
         document.getElementById("loading-indicator").classList.add("hidden");
@@ -234,48 +261,83 @@ function sendMessage() {
     
     chatBox.scrollTop = chatBox.scrollHeight; // Auto-scroll to bottom
 
-    // Send request to backend
-    fetch("/ask", {
+    // Send request to backend and stream the answer as it is generated
+    let aiMessage = null;
+    let content = null;
+    let markdown = "";
+    let renderPending = false;
+
+    // Re-render the accumulated Markdown at most once per animation frame
+    function scheduleRender() {
+        if (renderPending) return;
+        renderPending = true;
+        requestAnimationFrame(() => {
+            renderPending = false;
+            content.innerHTML = renderMarkdown(markdown);
+            chatBox.scrollTop = chatBox.scrollHeight;
+        });
+    }
+
+    fetch("/ask-stream", {
         method: "POST",
         body: JSON.stringify({ query: userInput }),
         headers: { "Content-Type": "application/json" }
     })
-    .then(response => response.json())
-    .then(data => {
-        // Remove thinking message
-        chatBox.removeChild(thinkingMessage);
-        
-        // Display AI response (Left-aligned)
-        let aiMessage = document.createElement("div");
-        aiMessage.className = "ai-message";
-        aiMessage.innerHTML = `<strong>KIRA:</strong> ${data.response}`;
-        chatBox.appendChild(aiMessage);
-
-        if (data.hasScraping && data.scraped) {
-            let scrapedInfo = document.createElement("div");
-            scrapedInfo.className = "scraped-info";
-            scrapedInfo.innerHTML = `<details>
-                <summary>📚 View scraped information</summary>
-                <div class="scraped-content">${data.scraped}</div>
-            </details>`;
-            chatBox.appendChild(scrapedInfo);
-        }
-        // If there was retrieval info and we want to show it
-        if (data.hasRetrieval && data.retrieved) {
-            let retrievalInfo = document.createElement("div");
-            retrievalInfo.className = "retrieval-info";
-            retrievalInfo.innerHTML = `<details>
-                <summary>📚 View retrieved information</summary>
-                <div class="retrieved-content">${data.retrieved}</div>
-            </details>`;
-            chatBox.appendChild(retrievalInfo);
+    .then(response => {
+        if (!response.ok || !response.body) {
+            throw new Error(`Request failed with status ${response.status}`);
         }
-        
-        chatBox.scrollTop = chatBox.scrollHeight; // Auto-scroll to bottom
+        return readEventStream(response, (event, data) => {
+            if (event === "context") {
+                if (data.hasScraping && data.scraped) {
+                    let scrapedInfo = document.createElement("div");
+                    scrapedInfo.className = "scraped-info";
+                    scrapedInfo.innerHTML = `<details>
+                        <summary>📚 View scraped information</summary>
+                        <div class="scraped-content">${data.scraped}</div>
+                    </details>`;
+                    chatBox.insertBefore(scrapedInfo, thinkingMessage.nextSibling);
+                }
+                // If there was retrieval info and we want to show it
+                if (data.hasRetrieval && data.retrieved) {
+                    let retrievalInfo = document.createElement("div");
+                    retrievalInfo.className = "retrieval-info";
+                    retrievalInfo.innerHTML = `<details>
+                        <summary>📚 View retrieved information</summary>
+                        <div class="retrieved-content">${data.retrieved}</div>
+                    </details>`;
+                    chatBox.insertBefore(retrievalInfo, thinkingMessage.nextSibling);
+                }
+            } else if (event === "token") {
+                // Replace the thinking message with the AI response on the first token
+                if (!aiMessage) {
+                    aiMessage = document.createElement("div");
+                    aiMessage.className = "ai-message";
+                    aiMessage.innerHTML = `<strong>KIRA:</strong> `;
+                    content = document.createElement("span");
+                    aiMessage.appendChild(content);
+                    chatBox.replaceChild(aiMessage, thinkingMessage);
+                }
+                markdown += data.text;
+                scheduleRender();
+            } else if (event === "done") {
+                // Swap in the server-rendered HTML so the final output matches /ask
+                if (!aiMessage) {
+                    aiMessage = document.createElement("div");
+                    aiMessage.className = "ai-message";
+                    chatBox.replaceChild(aiMessage, thinkingMessage);
+                }
+                renderPending = true;
+                aiMessage.innerHTML = `<strong>KIRA:</strong> ${data.response}`;
+                chatBox.scrollTop = chatBox.scrollHeight;
+            } else if (event === "error") {
+                throw new Error(data.error);
+            }
+        });
     })
     .catch(error => {
-        // Remove thinking message
-        chatBox.removeChild(thinkingMessage);
+        // Remove thinking message (or the partial answer)
+        chatBox.removeChild(aiMessage || thinkingMessage);
         
         // Display error message
         let errorMessage = document.createElement("div");
@@ -289,6 +351,44 @@ function sendMessage() {
     document.getElementById("user-input").value = ""; // Clear input field
 }
 
+// Reads a server-sent event stream from a fetch response, calling onEvent(event, data) per event
+async function readEventStream(response, onEvent) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = "";
+
+    while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        // Events are separated by a blank line
+        let boundary;
+        while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+            const rawEvent = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+
+            let event = "message";
+            let data = "";
+            rawEvent.split("\n").forEach(line => {
+                if (line.startsWith("event:")) event = line.slice(6).trim();
+                else if (line.startsWith("data:")) data += line.slice(5).trim();
+            });
+            if (data) onEvent(event, JSON.parse(data));
+        }
+    }
+}
+
+// Renders Markdown with marked.js, falling back to escaped plain text if it is unavailable
+function renderMarkdown(markdown) {
+    if (window.marked) {
+        return marked.parse(markdown);
+    }
+    const div = document.createElement("div");
+    div.textContent = markdown;
+    return div.innerHTML.replace(/\n/g, "<br>");
+}
+
 function toggleVoiceInput() {
     if (isListening) {
         stopListening();
@@ -0,0 +1,79 @@
+"""
+Consecutive /ask requests must keep dense retrieval.
+
+The WSGI routes used to run each request on a new event loop, and the Ollama
+client (an httpx AsyncClient bound to the first loop) failed on every other
+request with "Event loop is closed". This drives the real OllamaEmbeddings
+client against a local stand-in for the Ollama server, through the same
+background_loop.run(gather_context(...)) call the Flask routes make.
+
+Run from the repository root with:
+    python -m pytest tests
+"""
+import os
+import sys
+import json
+import zlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from langchain_ollama import OllamaEmbeddings
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+os.environ.setdefault("GOOGLE_API_KEY", "test")  # The Gemini client is created on import but not called
+
+from aiFeatures.python import background_loop
+from aiFeatures.python.ask_pipeline import gather_context
+from aiFeatures.python.rag_pipeline import add_texts_to_index, create_empty_faiss_index
+from aiFeatures.python.retrieval_cache import RetrievalCache
+
+CHUNKS = ["Backpropagation applies the chain rule layer by layer.",
+          "The French Revolution began with the storming of the Bastille."]
+
+
+def fake_embedding(text):
+    """Deterministic 8-dimensional embedding; equal texts get equal vectors."""
+    seed = zlib.crc32(text.encode("utf-8"))
+    return [((seed >> shift) & 0xFF) / 255.0 + 0.01 for shift in range(0, 32, 4)]
+
+
+class FakeOllama(BaseHTTPRequestHandler):
+    """Answers Ollama's /api/embed requests."""
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        inputs = request["input"] if isinstance(request["input"], list) else [request["input"]]
+        body = json.dumps({"model": request["model"],
+                           "embeddings": [fake_embedding(text) for text in inputs]}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def ollama_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeOllama)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+
+
+def test_consecutive_requests_keep_dense_retrieval(ollama_url):
+    embeddings = OllamaEmbeddings(model="fake-embed", base_url=ollama_url)
+    vector_store = create_empty_faiss_index(embeddings=embeddings)
+    metadata = {"file_name": "notes.pdf", "file_path": "notes.pdf", "page_index": 0, "total_pages": 1}
+    add_texts_to_index(vector_store, [(text, dict(metadata, page_index=i)) for i, text in enumerate(CHUNKS)])
+
+    for query in (CHUNKS[0], CHUNKS[1], CHUNKS[0]):
+        # One call per request, as in the /ask and /ask-stream routes; a fresh cache so
+        # every request embeds its query through the async client
+        retrieved_info, _ = background_loop.run(gather_context(query, vector_store, RetrievalCache(),
+                                                               speculative=False))
+        assert "Similarity:" in retrieved_info
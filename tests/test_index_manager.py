@@ -0,0 +1,35 @@
+"""
+IncrementalIndexManager persistence.
+
+Run from the repository root with:
+    python -m pytest tests
+"""
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from aiFeatures.python.embedding_pipeline import StubEmbeddings
+from aiFeatures.python.index_manager import ExtractedFile, IncrementalIndexManager
+
+
+def pages(file_name, count):
+    return [(f"Page {i} of {file_name} covers topic number {i}. " * 20,
+             {"file_name": file_name, "file_path": file_name, "page_index": i, "total_pages": count})
+            for i in range(count)]
+
+
+def test_load_keeps_injected_embedder(tmp_path):
+    embeddings = StubEmbeddings(32)
+    manager = IncrementalIndexManager(embeddings=embeddings)
+    manager.add_extracted([ExtractedFile("notes.pdf", 1, "v1", lambda: pages("notes.pdf", 3))])
+    manager.save(str(tmp_path))
+
+    loaded = IncrementalIndexManager(embeddings=embeddings)
+    loaded.load(str(tmp_path))
+    assert loaded.vector_store.embedding_function is embeddings
+
+    # Later updates embed through the same model
+    loaded.add_extracted([ExtractedFile("more.pdf", 1, "v1", lambda: pages("more.pdf", 2))])
+    assert loaded.vector_store.embedding_function is embeddings
+    assert set(loaded.files) == {"notes.pdf", "more.pdf"}